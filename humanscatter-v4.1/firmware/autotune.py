@@ -0,0 +1,105 @@
+import time
+from machine import Pin
+import profile_store
+import receiver
+
+# Receiver link autotuner. With tags transmitting, sweeps the subcarrier
+# offset, then the channel filter bandwidth, then the FSK deviation
+# around the values in receiver.py, keeping the best of each before
+# moving to the next. Every setting polls for WINDOW_MS, keeping frames
+# with a failed CRC (receiver.listen_RX, poll_RX), and is scored by
+# CRC-good packets weighted by link quality (LQI, lower is better), less
+# a cost per failed frame, so the packet rate, the CRC pass rate and the
+# LQI all count. Each sweep starts from the current value, which
+# another one only replaces with a strictly better score and at least
+# MIN_GOOD CRC-good packets. The winner is programmed and saved as the
+# "autotune" profile (profile_store.py), which main.py loads at boot;
+# if no tag was heard at all nothing is saved.
+#
+# Retunes only rewrite the changed registers in RX bursts; offsets go
+# through set_frequency_RX, which uses the FSCAL cache when
+# autocalibration is off. The default grid takes about 2 s.
+# Run this file from Thonny with a tag transmitting.
+
+OFFSET_STEPS = (-200000, -100000, 0, 100000, 200000)   # Hz around f_carrier
+BANDWIDTHS = (541666, 650000, 812500)                   # CC2500 filter steps
+DEVIATION_STEPS = (-50781, 0, 50781)                    # Hz around f_dev, two DEVIATION_M steps at E = 7
+WINDOW_MS = 200         # listening time per setting
+MIN_GOOD = 5            # CRC-good packets a setting needs to replace the current value
+BAD_CRC_COST = 64       # score of a failed frame, against up to 128 for a good one
+
+GDO0_PIN = 2
+
+#================ MEASUREMENT =============
+
+def score(got, ok, lqi):
+    """CRC-good packets, each worth 128 - mean LQI, less BAD_CRC_COST per failed one"""
+    return ok * 128 - lqi - (got - ok) * BAD_CRC_COST
+
+#================ SWEEP =============
+
+def apply(spi, CS, offset, bw, f_dev, changed):
+    if changed == "f_carrier":
+        receiver.set_frequency_RX(spi, CS, receiver.CARRIER_FEQ + offset)
+    elif changed == "bw":
+        receiver.set_filter_bandwidth_RX(spi, CS, bw)
+    else:
+        receiver.set_freq_deviation_RX(spi, CS, f_dev)
+    receiver.listen_RX(spi, CS)
+
+def run(save=True, window_ms=WINDOW_MS):
+    spi = receiver.spi_rx
+    CS = receiver.cs_rx
+    Pin(GDO0_PIN, Pin.IN).irq(handler=None)     # polled
+    best = {"f_carrier": receiver.f_carrier, "bw": receiver.bw, "f_dev": receiver.f_dev}
+    grid = (
+        ("f_carrier", [receiver.f_carrier + step for step in OFFSET_STEPS]),
+        ("bw", BANDWIDTHS),
+        ("f_dev", [receiver.f_dev + step for step in DEVIATION_STEPS]),
+    )
+    rows = []
+    heard = 0
+    t0 = time.ticks_ms()
+    for name, values in grid:
+        # The current value first: its score is the one to beat
+        best_value = best[name]
+        best_score = None
+        for value in [best_value] + [v for v in values if v != best_value]:
+            setting = dict(best)
+            setting[name] = value
+            apply(spi, CS, setting["f_carrier"], setting["bw"], setting["f_dev"], name)
+            c = receiver.poll_RX(spi, CS, window_ms)
+            s = score(c.got, c.ok, c.lqi)
+            heard += c.ok
+            rows.append((name, value, c.got, c.ok, c.lqi // c.ok if c.ok else None, s))
+            if best_score is None:
+                best_score = s
+            elif s > best_score and c.ok >= MIN_GOOD:
+                best_score = s
+                best_value = value
+        best[name] = best_value
+        apply(spi, CS, best["f_carrier"], best["bw"], best["f_dev"], name)
+    elapsed = time.ticks_diff(time.ticks_ms(), t0)
+
+    receiver.f_carrier = best["f_carrier"]
+    receiver.bw = best["bw"]
+    receiver.f_dev = best["f_dev"]
+    receiver.set_irq_RX(GDO0_PIN)
+    receiver.start_listen_RX(spi, CS)
+    report(rows, best, elapsed)
+    if not heard:
+        print("autotune: no CRC-good packet heard, receiver unchanged and not saved")
+    elif save:
+        version = profile_store.save("autotune")
+        print("autotune: saved profile autotune v%d" % version)
+    return best
+
+def report(rows, best, elapsed):
+    print("parameter | value   | rx  | ok  | LQI | score")
+    for name, value, got, ok, lqi, s in rows:
+        print("%-9s | %7d | %3d | %3d | %3s | %d" % (name, value, got, ok, "-" if lqi is None else lqi, s))
+    print("autotune: offset %d Hz, bandwidth %d Hz, deviation %d Hz (%d ms)" % (
+        best["f_carrier"], best["bw"], best["f_dev"], elapsed))
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,88 @@
+from machine import Pin
+import carrier
+import receiver
+
+# Range and power characterisation. Steps the carrier through every
+# frequency and output power in the grid below; at each point it polls
+# decode_packet_RX for PACKETS tag packets and records the packet error
+# rate, mean RSSI and mean LQI (of CRC-good frames). The table is printed
+# and written to campaign_results.csv. On the Pico run this file from Thonny with a tag
+# transmitting; the receiver follows the achieved carrier at
+# + receiver.f_carrier. Afterwards the carrier frequency, power and RF
+# output state and the receiver tuning are put back as they were.
+#
+# Packet errors are counted from gaps in the tag's sequence byte (the
+# first payload byte) plus frames with a failed CRC, both counted by
+# receiver.poll_RX: a failed frame's sequence byte is not trusted, but it
+# fills a slot of the gap before the next good frame.
+
+CHANNELS = (2440000000, 2450000000, 2460000000)     # carrier Hz
+POWER_LEVELS = (0, 1, 2, 3)     # carrier.POWER_DBM index: -4, -1, +2, +5 dBm
+PACKETS = 50            # tag packets per grid point
+POINT_TIMEOUT_MS = 5000 # give up on a point after this
+RESULTS_FILE = "campaign_results.csv"
+
+GDO0_PIN = 2
+
+#================ MEASUREMENT =============
+
+def point(spi, CS, frequency, level):
+    """Tune both radios, measure, return one result row (achieved carrier Hz)"""
+    frequency = carrier.set_frequency(frequency)
+    dbm = carrier.set_power(level)
+    receiver.set_frequency_RX(spi, CS, frequency + receiver.f_carrier)
+    receiver.listen_RX(spi, CS)
+    c = receiver.poll_RX(spi, CS, POINT_TIMEOUT_MS, PACKETS)
+    bad = c.got - c.ok
+    sent = c.got + c.lost
+    return (
+        frequency,
+        dbm,
+        c.got,
+        c.lost,
+        bad,
+        round((c.lost + bad) / sent, 4) if sent else 1.0,
+        round(c.rssi / c.got, 1) if c.got else None,
+        round(c.lqi / c.ok, 1) if c.ok else None,
+    )
+
+#================ RUN =============
+
+HEADER = ("freq_hz", "power_dbm", "received", "lost", "crc_failed", "per", "rssi_dbm", "lqi")
+
+def run(path=RESULTS_FILE, channels=CHANNELS, levels=POWER_LEVELS):
+    spi = receiver.spi_rx
+    CS = receiver.cs_rx
+    regs = list(carrier.ADF4351_REGISTERS)     # frequency and power to restore
+    rf_on = carrier.rf_on
+    carrier.setup_TX()
+    receiver.setup_RX(spi, CS, GDO0_PIN)
+    Pin(GDO0_PIN, Pin.IN).irq(handler=None)     # polled, like bench_poll
+    rows = []
+    for frequency in channels:
+        for level in levels:
+            print("campaign:", frequency, "Hz,", carrier.POWER_DBM[level], "dBm")
+            rows.append(point(spi, CS, frequency, level))
+    carrier.write_registers(regs)
+    carrier.rf_output(rf_on)
+    receiver.set_frequency_RX(spi, CS, receiver.CARRIER_FEQ + receiver.f_carrier)
+    receiver.set_irq_RX(GDO0_PIN)
+    receiver.start_listen_RX(spi, CS)
+    report(rows)
+    with open(path, "w") as f:
+        f.write(",".join(HEADER) + "\n")
+        for row in rows:
+            f.write(",".join("" if v is None else str(v) for v in row) + "\n")
+    print("campaign: wrote", path)
+    return rows
+
+def report(rows):
+    print("  freq MHz | dBm | rx  | lost | crc | PER    | RSSI   | LQI")
+    for f, dbm, got, lost, bad, per, rssi, lqi in rows:
+        print("%6d.%03d | %3d | %3d | %4d | %3d | %5.1f%% | %6s | %s" % (
+            f // 1000000, f // 1000 % 1000, dbm, got, lost, bad, per * 100,
+            "-" if rssi is None else "%.1f" % rssi,
+            "-" if lqi is None else "%.0f" % lqi))
+
+if __name__ == "__main__":
+    run()
@@ -1,37 +1,93 @@
 import time
-from machine import Pin, SPI
+import events
+import pllcalc
+import spibus
+from machine import Pin, Timer
 
 # =================== PINS ====================
-ADF4351_SCK = 10    # SPI Clock
-ADF4351_MOSI = 11   # SPI Data
-ADF4351_LE = 9      # Latch Enable
+ADF4351_LE = 9      # Latch Enable (SCK/MOSI on SPI1, see spibus.py)
+ADF4351_BAUDRATE = 5000000
+ADF4351_MUXOUT = 4  # MUXOUT, digital lock detect
 
 # =================== SPI SETUP ====================
-spi_tx = SPI(
-    1,
-    baudrate=5000000,
-    polarity=0,
-    phase=0,
-    bits=8,
-    firstbit=SPI.MSB,
-    sck=Pin(ADF4351_SCK),
-    mosi=Pin(ADF4351_MOSI),
-    miso=None
-)
-
-LE = Pin(ADF4351_LE, Pin.OUT)
-LE.value(1)
+# SPI1 is shared with the CC2500; the device handle switches the bus to
+# this clock and drives LE as its select line (low while shifting).
+spi_tx = spibus.Device(ADF4351_LE, ADF4351_BAUDRATE)
+LE = spi_tx
 
 # =================== ADF4351 REGISTERS ====================
 ADF4351_REGISTERS = [
     0x00620000,  # R0
     0x08008011,  # R1
-    0x004B3CC2,  # R2
+    0x184B3CC2,  # R2 (MUXOUT = digital lock detect)
     0x000004B3,  # R3
     0x00AC803C,  # R4
     0x00580005   # R5
 ]
 
+# Registers as last latched by the chip (None until written), so retunes
+# only send the ones that change
+adf4351_written = [None] * 6
+
+RF_OUT_EN = 1 << 5  # R4 RF output enable
+RF_MTLD = 1 << 10   # R4 mute till lock detect
+POWER_DBM = (-4, -1, 2, 5)  # R4 output power settings (bits 4:3)
+rf_on = False       # RF output state; ADF4351_REGISTERS keeps it enabled
+
+# Preassembled R4 words for rf_output(), refreshed by gate_words()
+gate_on_reg = 0
+gate_off_reg = 0
+_gate_on = bytearray(4)
+_gate_off = bytearray(4)
+
+# =================== LOCK DETECT ====================
+# Every R0 latch restarts VCO band selection and the PLL loses lock until
+# MUXOUT (digital lock detect) goes high again. Blocking retunes poll it
+# with wait_lock(); hops must not wait in their IRQ, so a MUXOUT rising
+# edge IRQ takes the same measurement.
+
+LOCK_TIMEOUT_US = 50000     # boot table: ~24 ms of band select (R = 300, BS div 200)
+
+muxout = Pin(ADF4351_MUXOUT, Pin.IN)
+lock_last_us = -1   # R0 latch -> lock of the last retune (-1 = timed out)
+lock_max_us = 0
+lock_count = 0
+lock_timeouts = 0
+_latch_at = 0       # ticks_us of the last R0 latch
+_lock_pending = False
+
+def lock_start():
+    global _latch_at, _lock_pending
+    _latch_at = time.ticks_us()
+    _lock_pending = True
+
+def lock_edge(pin):
+    # MUXOUT rising edge (hard IRQ, also polled by wait_lock): no allocation
+    global _lock_pending, lock_last_us, lock_max_us, lock_count
+    if not _lock_pending:
+        return
+    _lock_pending = False
+    dt = time.ticks_diff(time.ticks_us(), _latch_at)
+    lock_last_us = dt
+    if dt > lock_max_us:
+        lock_max_us = dt
+    lock_count += 1
+
+def wait_lock(timeout_us=LOCK_TIMEOUT_US):
+    """
+    Wait for lock after the last R0 latch. Returns the lock time in us,
+    or -1 after timeout_us.
+    """
+    global _lock_pending, lock_last_us, lock_timeouts
+    while _lock_pending:
+        if muxout.value():
+            lock_edge(muxout)
+        elif time.ticks_diff(time.ticks_us(), _latch_at) > timeout_us:
+            _lock_pending = False
+            lock_last_us = -1
+            lock_timeouts += 1
+    return lock_last_us
+
 # =================== FUNCTIONS ====================
 
 def adf4351_write_reg(reg):
@@ -40,34 +96,293 @@ def adf4351_write_reg(reg):
     LE.value(0)
     spi_tx.write(data)
     LE.value(1)
-    time.sleep_us(1)
+    adf4351_written[reg & 0x7] = reg
+    if reg & 0x7 == 0:
+        lock_start()
 
 def setup_TX():
-    """Initialize ADF4351 with precomputed registers"""
+    """
+    Initialize ADF4351 with precomputed registers (RF output on).
+    Returns the lock time in us, -1 if it did not lock.
+    """
+    global rf_on
+    rf_on = True
+    muxout.irq(handler=lock_edge, trigger=Pin.IRQ_RISING, hard=True)
     for reg in reversed(ADF4351_REGISTERS):  # Must write R5 → R0
         adf4351_write_reg(reg)
-    time.sleep_ms(10)
+    gate_words()
+    return wait_lock()
 
-def set_frequency(f_out_hz, ref_clk=25000000):
+def set_frequency(f_out_hz, ref_clk=25000000, spacing=pllcalc.SPACING_HZ, wait=True):
     """
-    Set output frequency dynamically in INT-N mode.
+    Tune the carrier to f_out_hz in fractional-N mode on a spacing Hz
+    grid (see pllcalc.py), writing only the registers that change, and
+    wait for lock (lock_last_us). Returns the achieved frequency in Hz.
     """
-    INT = int(f_out_hz / ref_clk)
-    FRAC = 0
-    MOD = 1
+    fields = pllcalc.solve(f_out_hz, spacing, ref_clk)
+    write_registers(pllcalc.registers(ADF4351_REGISTERS, fields), wait)
+    return fields["frequency"]
 
-    # Update R0 with new INT value
-    ADF4351_REGISTERS[0] = (INT << 15) | (FRAC << 3) | 0
-    setup_TX()
+def write_registers(regs, wait=True):
+    """
+    Make regs the configuration, latching only what the chip lacks. With
+    wait, return once the PLL has locked; otherwise call wait_lock().
+    """
+    chip = list(regs)
+    if not rf_on:
+        chip[4] &= ~RF_OUT_EN
+    order = pllcalc.changed(adf4351_written, chip)
+    for i in order:
+        adf4351_write_reg(chip[i])
+    for i in range(6):
+        ADF4351_REGISTERS[i] = regs[i]
+    gate_words()
+    if order and wait:
+        wait_lock()
+
+def set_power(level):
+    """Set the RF output power to POWER_DBM[level], returns it in dBm"""
+    regs = list(ADF4351_REGISTERS)
+    regs[4] = (regs[4] & ~(0x3 << 3)) | ((level & 0x3) << 3)
+    write_registers(regs)
+    return POWER_DBM[level & 0x3]
+
+def gate_words():
+    """Assemble the rf_output() R4 words from ADF4351_REGISTERS[4]"""
+    global gate_on_reg, gate_off_reg
+    gate_on_reg = ADF4351_REGISTERS[4] | RF_OUT_EN
+    gate_off_reg = gate_on_reg & ~RF_OUT_EN
+    _gate_on[:] = gate_on_reg.to_bytes(4, "big")
+    _gate_off[:] = gate_off_reg.to_bytes(4, "big")
+
+def rf_output(on):
+    """
+    Gate the RF output with one R4 write (RF_OUT_EN), the PLL stays
+    locked. No allocation, so it may run from an IRQ; returns False
+    without writing if SPI1 is in the middle of another transaction.
+    """
+    global rf_on
+    if spibus.busy():
+        return False
+    if on:
+        word = _gate_on
+        reg = gate_on_reg
+    else:
+        word = _gate_off
+        reg = gate_off_reg
+    LE.value(0)
+    spi_tx.write(word)
+    LE.value(1)
+    adf4351_written[4] = reg
+    rf_on = bool(on)
+    return True
+
+def set_mute_till_lock(mtld):
+    """Keep the output muted until the PLL locks (R4 MTLD) on every retune"""
+    if mtld:
+        ADF4351_REGISTERS[4] |= RF_MTLD
+    else:
+        ADF4351_REGISTERS[4] &= ~RF_MTLD
+    gate_words()
+    rf_output(rf_on)
+
+# =================== FREQUENCY HOPPING ====================
+# hop_plan() precomputes, per channel, the ADF4351 words to latch when
+# arriving from the previous channel and the CC2500 burst that retunes
+# the receiver, so the Timer callback only walks the table. R4 words come
+# in both RF_OUT_EN states, so a hop keeps the output as rf_output() left
+# it and refreshes the gate words.
+
+hop_words = []      # per channel: [(register, 4-byte word, off register, off word), ...] in write order
+hop_rx = []         # per channel: CC2500 burst blobs, or None
+hop_channels = []   # achieved carrier frequencies (Hz)
+hop_index = 0
+hop_count = 0       # hops done
+hop_deferred = 0    # hops that waited for another transaction on SPI1
+hop_rx_hook = None  # receiver retune, called with hop_rx[i] (receiver.hop_RX)
+hop_timer = None
+
+def hop_plan(channels, spacing=pllcalc.SPACING_HZ, rx_offset=0, rx_plan=None):
+    """
+    Fill the hop table for channels (Hz). With rx_plan every entry also
+    holds rx_plan(achieved carrier + rx_offset), the receiver's retune
+    blobs (receiver.hop_blobs_RX).
+    Returns the achieved carrier frequencies and register sets.
+    """
+    global hop_words, hop_rx, hop_channels
+    regs = []
+    achieved = []
+    for f in channels:
+        fields = pllcalc.solve(f, spacing)
+        regs.append(pllcalc.registers(ADF4351_REGISTERS, fields))
+        achieved.append(fields["frequency"])
+    words = []
+    rx = []
+    for i in range(len(regs)):
+        order = pllcalc.changed(regs[i - 1], regs[i])
+        entry = []
+        for k in order:
+            reg = regs[i][k]
+            off = reg & ~RF_OUT_EN if k == 4 else reg
+            entry.append((reg, reg.to_bytes(4, "big"), off, off.to_bytes(4, "big")))
+        words.append(entry)
+        rx.append(None if rx_plan is None else rx_plan(achieved[i] + rx_offset))
+    hop_words = words
+    hop_rx = rx
+    hop_channels = achieved
+    return achieved, regs
+
+def start_hopping(channels, dwell_ms, spacing=pllcalc.SPACING_HZ, rx_offset=0, rx_plan=None, rx_hook=None):
+    """
+    Hop over channels (Hz), dwell_ms on each, from a hardware Timer.
+    rx_hook(blobs) retunes the receiver along with the blobs of rx_plan
+    (see hop_plan). Returns the achieved carrier frequencies.
+    """
+    global hop_index, hop_count, hop_deferred, hop_rx_hook, hop_timer
+    stop_hopping()
+    achieved, regs = hop_plan(channels, spacing, rx_offset, rx_plan)
+    hop_index = 0
+    hop_count = 0
+    hop_deferred = 0
+    hop_rx_hook = rx_hook
+    write_registers(regs[0])
+    if rx_hook is not None and hop_rx[0] is not None:
+        rx_hook(hop_rx[0])
+    hop_timer = Timer()
+    hop_timer.init(mode=Timer.PERIODIC, period=dwell_ms, callback=hop_tick)
+    return achieved
+
+def stop_hopping():
+    global hop_timer
+    if hop_timer is not None:
+        hop_timer.deinit()
+        hop_timer = None
+
+def hop_tick(timer):
+    # Hard IRQ: no allocation, table lookups and SPI writes only
+    global hop_deferred
+    if spibus.busy():
+        hop_deferred += 1
+        spibus.defer(_hop_ref)
+        return
+    hop_next(0)
+
+def hop_next(arg):
+    """Latch the next channel of the hop table and retune the receiver"""
+    global hop_index, hop_count, gate_on_reg, gate_off_reg
+    i = hop_index + 1
+    if i >= len(hop_words):
+        i = 0
+    for reg, word, off, word_off in hop_words[i]:
+        LE.value(0)
+        spi_tx.write(word if rf_on else word_off)
+        LE.value(1)
+        adf4351_written[reg & 0x7] = reg if rf_on else off
+        ADF4351_REGISTERS[reg & 0x7] = reg
+        if reg & 0x7 == 4:
+            # gate_words() without allocating
+            gate_on_reg = reg
+            gate_off_reg = off
+            for k in range(4):
+                _gate_on[k] = word[k]
+                _gate_off[k] = word_off[k]
+    if hop_words[i]:
+        lock_start()    # the last word is R0
+    hop_index = i
+    hop_count += 1
+    hook = hop_rx_hook
+    if hook is not None and hop_rx[i] is not None:
+        hook(hop_rx[i])
+
+_hop_ref = hop_next
 
 def start_carrier_TX():
-    """Enable RF output"""
-    setup_TX()
+    """Enable RF output: one R4 write once the chip is configured"""
+    if None in adf4351_written:
+        setup_TX()
+    else:
+        rf_output(True)
 
 def stop_carrier_TX():
-    """Disable RF output (power down)"""
-    reg4 = ADF4351_REGISTERS[4] & ~(3 << 3)  # Clear power bits
-    adf4351_write_reg(reg4)
+    """Disable RF output (R4 RF_OUT_EN off, the PLL keeps its lock)"""
+    rf_output(False)
+
+# =================== CARRIER SESSION ====================
+# carrier_timer() counts carrier on-time with a 1 s hardware Timer. After
+# session_max_on_s seconds on, the RF output goes off (events.TX_TIMEOUT);
+# session_off_s seconds later it comes back on (events.TX_RESTART).
+# Duty cycle: max_on / (max_on + off).
+# carrier_wake() restarts early, e.g. when tag traffic is expected.
+
+SESSION_TICK_MS = 1000
+
+session_max_on_s = 0    # 0 = no limit
+session_off_s = 0       # 0 = stay off until carrier_wake()
+session_on_s = 0        # seconds on in this session
+session_idle_s = 0      # seconds off since the last timeout
+carrier_on_total_s = 0
+sessions = 0            # restarts
+session_timer = None
+
+def carrier_timer(max_on_s, off_s=0):
+    """
+    Limit the carrier to max_on_s seconds per session, restarting it
+    after off_s seconds off (0 = only on carrier_wake()).
+    """
+    global session_max_on_s, session_off_s, session_on_s, session_idle_s, session_timer
+    session_max_on_s = max_on_s
+    session_off_s = off_s
+    session_on_s = 0
+    session_idle_s = 0
+    if session_timer is None:
+        session_timer = Timer()
+    session_timer.init(mode=Timer.PERIODIC, period=SESSION_TICK_MS, callback=session_tick)
+
+def stop_carrier_timer():
+    global session_timer
+    if session_timer is not None:
+        session_timer.deinit()
+        session_timer = None
+
+def session_tick(timer):
+    # Hard IRQ: count seconds, the R4 write runs scheduled
+    global session_on_s, session_idle_s, carrier_on_total_s
+    if rf_on:
+        session_on_s += 1
+        carrier_on_total_s += 1
+        due = session_max_on_s and session_on_s >= session_max_on_s
+    else:
+        session_idle_s += 1
+        due = session_off_s and session_idle_s >= session_off_s
+    if due:
+        events.schedule(_session_ref)   # retried on the next tick if full
+
+def session_update(arg):
+    """Switch the RF output if the session timer says so"""
+    if spibus.busy():
+        spibus.defer(_session_ref)
+        return
+    if rf_on and session_max_on_s and session_on_s >= session_max_on_s:
+        carrier_sleep()
+    elif not rf_on and session_off_s and session_idle_s >= session_off_s:
+        carrier_wake()
+
+_session_ref = session_update
+
+def carrier_sleep():
+    """End the session: RF output off, posts events.TX_TIMEOUT"""
+    global session_idle_s
+    session_idle_s = 0
+    rf_output(False)
+    events.post(events.TX_TIMEOUT)
+
+def carrier_wake():
+    """Start a new session now: RF output on, posts events.TX_RESTART"""
+    global session_on_s, sessions
+    session_on_s = 0
+    rf_output(True)
+    sessions += 1
+    events.post(events.TX_RESTART)
 
 def test_adf4351():
     print("Initializing ADF4351 at 2.45 GHz...")
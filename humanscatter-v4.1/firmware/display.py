@@ -6,15 +6,17 @@ from machine import Pin, SPI, ADC
 from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_P4
 
 # ================== DISABLE RGB LED PINS ==================
-# Pico Display uses GPIO6, GPIO7, GPIO8 for RGB LEDs.
-# Since GPIO8 is used by CC2500 MISO, we lock them as inputs.
-for pin in [6, 7, 8]:
+# Pico Display uses GPIO6, GPIO7, GPIO8 for RGB LEDs; lock them as inputs.
+# GPIO8 is also the CC2500 MISO: SPI1 (spibus.py) owns it from the first
+# import of carrier, and Pin(8, Pin.IN) would mux it back to SIO, after
+# which every CC2500 read returns garbage. Leave it to SPI1.
+for pin in [6, 7]:
     machine.Pin(pin, machine.Pin.IN)
 # ==========================================================
 
 #-------------- Screen Functions --------------
 
-def setup_screen():
+def setup_screen(animate=True):
     display = PicoGraphics(display=DISPLAY_PICO_DISPLAY, pen_type=PEN_P4, rotate=0)
     display.set_backlight(1)
     display.set_font("bitmap8")
@@ -29,6 +31,22 @@ def setup_screen():
         GREEN2 = display.create_pen(0, 255, 135)
         RED = display.create_pen(255, 0, 0)
         
+    if animate:
+        intro(display, color)
+    
+    #Set Up main UI
+    clear(display,color)
+    display.set_pen(color.GREEN)
+    display.line(142, 0, 142, 25, 3)
+    display.line(0, 25, 240, 25, 2)
+    display.set_pen(color.GREEN2)
+    display.text("HUMANSCATTER", 10, 2, 240, 2)
+    display.text("RSSI", 152, 2, 240, 2)
+    display.update()
+
+    return(display, color)
+
+def intro(display, color):
     #Intro Animation
     clear(display,color)
     """
@@ -137,18 +155,6 @@ def setup_screen():
     display.text("HUMANSCATTER", 100, 90, 240, 2)
     display.update()
     time.sleep_ms(200)
-    
-    #Set Up main UI
-    clear(display,color)
-    display.set_pen(color.GREEN)
-    display.line(142, 0, 142, 25, 3)
-    display.line(0, 25, 240, 25, 2)
-    display.set_pen(color.GREEN2)
-    display.text("HUMANSCATTER", 10, 2, 240, 2)
-    display.text("RSSI", 152, 2, 240, 2)
-    display.update()
-
-    return(display, color)
 
 def clear(display, color):
     display.set_pen(color.BLACK)
@@ -185,5 +191,5 @@ def print_carrier_timeout(display, color):
     display.text("CARRIER STOP", 3, 80, 240, 4)
     display.text('!', 118, 21, 240, 6)
     display.set_pen(color.WHITE) #White Pen
-    display.text("restart the device", 30, 115, 235, 2)
+    display.text("restarting soon", 42, 115, 235, 2)
     display.update()
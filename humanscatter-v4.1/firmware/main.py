@@ -1,6 +1,11 @@
 import time
 import machine
-from machine import Pin, SPI
+from machine import Pin
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
 
 # ====================== SAFE IMPORTS ======================
 try:
@@ -9,32 +14,70 @@ except ImportError:
     print("[ERROR] PicoGraphics module not found! Check your UF2 firmware.")
     PicoGraphics = None
 
+# display.py, render.py and ui.py are imported when the display starts
 try:
+    import boot_profile
     import carrier
     import receiver
-    import display
+    import events
+    import profile_store
+    import runtime
 except Exception as e:
     print("[ERROR] Failed to import local modules:", e)
+    boot_profile = None
     carrier = None
     receiver = None
-    display = None
+    events = None
+    profile_store = None
+    runtime = None
+
+display = None
+render = None
+
+def boot_mark(phase):
+    if boot_profile:
+        boot_profile.mark(phase)
+
+boot_mark("imports")
+
+# ====================== BOOT PROFILE ======================
+# production: radios first, display after; debug: today's bench boot
+# (see boot_profile.py). Without boot_profile.py, boot as debug.
+if boot_profile:
+    print("[DEBUG] Boot profile:", boot_profile.load())
+    BOOT_DELAY_MS = boot_profile.delay_ms
+    LED_TEST = boot_profile.led_test
+    DISPLAY_FIRST = boot_profile.display_first
+    BOOT_ANIMATION = boot_profile.animation
+else:
+    BOOT_DELAY_MS, LED_TEST, DISPLAY_FIRST, BOOT_ANIMATION = 3000, True, True, True
 
 # ====================== BOOT DELAY ======================
-print("[DEBUG] Waiting 3s before starting...")
-time.sleep(3)
+if BOOT_DELAY_MS:
+    print("[DEBUG] Waiting %d ms before starting..." % BOOT_DELAY_MS)
+    time.sleep_ms(BOOT_DELAY_MS)
 
 # ====================== PINS ======================
 LED_CARRIER_PIN = 1   # GPIO1 → Carrier active LED
 LED_MESSAGE_PIN = 0   # GPIO0 → Message received LED
 
-RX_SCK = 10
-RX_MISO = 8
-RX_MOSI = 11
-CS_RX_PIN = 22
+CS_RX_PIN = 22        # SPI1 pins are owned by spibus.py
 GDO0_PIN = 2
 GD2_PIN = 3   # optional
 
-carrier_timeout = 20  # seconds
+carrier_timeout = 20  # seconds of carrier per session (0 = no limit)
+carrier_off = 10      # seconds off before the carrier restarts
+
+# Carrier hopping: channels in Hz (empty = fixed carrier), dwell per channel.
+# The receiver follows at channel + receiver.f_carrier, each of its
+# channels calibrated once (receiver FSCAL cache).
+HOP_CHANNELS = []
+HOP_DWELL_MS = 100
+
+MSG_LED_MS = 100      # message LED blink length
+MSG_HOLD_MS = 2000    # keep a message on screen before "waiting" again
+TELEMETRY_MS = 30000  # period of the counters report on the console
+DEMO_MESSAGES = False # fake frame into the ring every 4 s (no tag needed), demo texts on screen
 
 # ====================== LED SETUP ======================
 try:
@@ -48,15 +91,16 @@ try:
     print("[DEBUG] LEDs initialized successfully!")
 
     # Test LEDs separately at boot
-    print("[DEBUG] Testing LEDs...")
-    LED_CARRIER.value(1)
-    time.sleep(0.3)
-    LED_CARRIER.value(0)
-    time.sleep(0.2)
-    LED_MESSAGE.value(1)
-    time.sleep(0.3)
-    LED_MESSAGE.value(0)
-    print("[DEBUG] LED test complete!")
+    if LED_TEST:
+        print("[DEBUG] Testing LEDs...")
+        LED_CARRIER.value(1)
+        time.sleep(0.3)
+        LED_CARRIER.value(0)
+        time.sleep(0.2)
+        LED_MESSAGE.value(1)
+        time.sleep(0.3)
+        LED_MESSAGE.value(0)
+        print("[DEBUG] LED test complete!")
 
 except Exception as e:
     print("[ERROR] Failed to initialize LEDs:", e)
@@ -86,58 +130,88 @@ except Exception as e:
     print("[ERROR] Failed to set power LED:", e)
 
 
+boot_mark("leds")
+
 # ====================== DISPLAY SETUP ======================
-display_humanscatter = None
-color = None
+# The display belongs to the renderer on core 1, which plays the boot
+# animation while core 0 goes on. DISPLAY_FIRST starts it here, before
+# the radios; otherwise it starts once the receiver is listening.
+display_on = False
 
-if display and PicoGraphics:
+def start_display():
+    global display, render, display_on
     try:
-        print("[DEBUG] Initializing Pico Display...")
-        display_humanscatter, color = display.setup_screen()
-        print("[DEBUG] Pico Display initialized successfully!")
+        import display
+        import render
     except Exception as e:
-        print("[ERROR] Failed to initialize display:", e)
-else:
-    print("[WARN] Skipping display setup — PicoGraphics or display.py missing!")
+        print("[ERROR] Failed to import display modules:", e)
+        display = None
+        render = None
+    if display and PicoGraphics and render:
+        try:
+            print("[DEBUG] Starting Pico Display renderer on core 1...")
+            render.start(BOOT_ANIMATION)
+            display_on = True
+            print("[DEBUG] Pico Display renderer started!")
+        except Exception as e:
+            print("[ERROR] Failed to start display renderer:", e)
+    else:
+        print("[WARN] Skipping display setup — PicoGraphics or display.py missing!")
+    boot_mark("display")
+
+if DISPLAY_FIRST:
+    start_display()
 
 # ====================== SPI RECEIVER SETUP ======================
 radio = None
 CS_RX = None
 try:
     print("[DEBUG] Setting up SPI for CC2500 receiver...")
-    radio = SPI(
-        1,
-        baudrate=5_000_000,
-        polarity=0,
-        phase=0,
-        bits=8,
-        firstbit=SPI.MSB,
-        sck=Pin(RX_SCK),
-        mosi=Pin(RX_MOSI),
-        miso=Pin(RX_MISO)
-    )
-    CS_RX = Pin(CS_RX_PIN, Pin.OUT)
+    # Shared SPI1 device handle: its own clock, and the chip select
+    radio = receiver.spi_rx
+    CS_RX = receiver.cs_rx
     print("[DEBUG] SPI configured successfully!")
 except Exception as e:
     print("[ERROR] Failed to configure SPI:", e)
 
+# ====================== STORED PROFILE ======================
+stored_RX = None    # CC2500 blobs of the stored profile, None = defaults
+if profile_store and carrier and receiver:
+    try:
+        stored = profile_store.boot()
+        if stored is None:
+            print("[DEBUG] No stored radio profile, using defaults")
+        else:
+            name, version, stored_RX = stored
+            print("[DEBUG] Radio profile", name, "v%d" % version)
+        if profile_store.corrupt:
+            print("[WARN] Corrupt stored profiles ignored:", profile_store.corrupt)
+    except Exception as e:
+        print("[ERROR] Failed to load stored profile:", e)
+boot_mark("profile")
+
 # ====================== CARRIER SETUP ======================
 if carrier:
     try:
         print("[DEBUG] Setting up ADF4351 carrier...")
-        carrier.setup_TX()
-        print("[DEBUG] ADF4351 setup complete!")
+        lock_us = carrier.setup_TX()
+        if lock_us < 0:
+            print("[WARN] ADF4351 PLL did not lock!")
+        else:
+            print("[DEBUG] ADF4351 setup complete! PLL locked in", lock_us, "us")
     except Exception as e:
         print("[ERROR] Carrier setup failed:", e)
+boot_mark("setup_TX")
 
 # ====================== RECEIVER SETUP ======================
 if receiver and radio and CS_RX:
     try:
         print("[DEBUG] Setting up CC2500 receiver...")
-        receiver.setup_RX(radio, CS_RX, GDO0_PIN)
+        receiver.setup_RX(radio, CS_RX, GDO0_PIN, stored_RX)
         print("[DEBUG] CC2500 receiver setup complete!")
     except Exception as e:
         print("[ERROR] Receiver setup failed:", e)
+boot_mark("setup_RX")
 
 time.sleep_us(100)
 
@@ -150,98 +224,187 @@ if carrier:
         print("[DEBUG] Carrier started successfully!")
     except Exception as e:
         print("[ERROR] Failed to start carrier:", e)
+boot_mark("carrier_on")
 
 # ====================== START RECEIVER ======================
 if receiver and radio and CS_RX:
     try:
         print("[DEBUG] Starting receiver listening mode...")
         receiver.start_listen_RX(radio, CS_RX)
-        receiver.event_RX = "no_reception"
         print("[DEBUG] Receiver listening mode active!")
     except Exception as e:
         print("[ERROR] Failed to start receiver:", e)
+boot_mark("listening")
 
-# ====================== INITIAL EVENTS ======================
-if receiver and carrier:
-    receiver.event_RX = "no_reception"
-    carrier.event_TX = "no_timeout"
-    print(f"[DEBUG] Initial RX event: {receiver.event_RX}")
-    print(f"[DEBUG] Initial TX event: {carrier.event_TX}")
-
-# ====================== MAIN LOOP ======================
-cnt = 1
-cnt2 = 0
-
-if receiver and carrier:
+# ====================== START HOPPING ======================
+if carrier and receiver and HOP_CHANNELS:
     try:
-        receiver.dummy_message_generator()
-        carrier.carrier_timer(carrier_timeout)
+        print("[DEBUG] Starting carrier hopping...")
+        receiver.set_autocal_RX(radio, CS_RX, False)
+        hops = carrier.start_hopping(HOP_CHANNELS, HOP_DWELL_MS, rx_offset=receiver.f_carrier,
+                                     rx_plan=receiver.hop_blobs_RX, rx_hook=receiver.hop_RX)
+        print("[DEBUG] Hopping over", hops, "Hz every", HOP_DWELL_MS, "ms")
     except Exception as e:
-        print("[ERROR] Failed to start timers:", e)
+        print("[ERROR] Failed to start hopping:", e)
 
-print("[DEBUG] Entering main loop...")
+# ====================== DEFERRED DISPLAY ======================
+if not DISPLAY_FIRST:
+    start_display()
 
-try:
+# ====================== INITIAL EVENTS ======================
+if events:
+    events.take()   # drop flags raised during setup, the ring is read anyway
+    print("[DEBUG] Event flags cleared")
+
+# ====================== TASKS ======================
+# Packets are drained from the CC2500 by the GDO0 IRQ into the receiver
+# ring; packet_task empties the ring and fans each message out to the
+# other tasks through bounded queues. None of them can hold up the ring:
+# a full queue drops its oldest item, and under a burst only the newest
+# message reaches the screen.
+SCREEN_WAITING = 0
+SCREEN_TIMEOUT = 1
+
+if runtime:
+    ui_q = runtime.Queue(1)         # next screen: a Message or SCREEN_*
+    led_q = runtime.Queue(1)        # message LED blinks
+    log_q = runtime.Queue(8)        # messages to print on the console
+    carrier_q = runtime.Queue(4)    # carrier session flags
+
+received = 0    # messages taken from the ring
+cnt2 = 0
+
+async def packet_task():
+    """Event pump: empty the receiver ring, forward carrier session flags"""
+    global received, cnt2
+    wake = runtime.wake_flag()
     while True:
-        # If receiver got a message
-        if receiver and receiver.event_RX == "reception":
+        ev = events.take()
+        if ev & (events.TX_TIMEOUT | events.TX_RESTART):
+            carrier_q.put(ev)
+        while receiver.ring_count():
             try:
-                print("[DEBUG] Message received!")
-                message = receiver.decode_packet_RX(
-                    radio, CS_RX, receiver.RX_BUFFER_SIZE, receiver.Message()
-                )
-
-                # Blink message LED when message is received
-                LED_MESSAGE.value(1)
-                time.sleep_ms(100)
-                LED_MESSAGE.value(0)
-
-                # Demo messages
-                if cnt2 == 0:
-                    message.data = "Hello je backscatte comment ça va le sang"
-                    message.RSSI += 5
-                elif cnt2 == 1:
-                    message.data = "Salut je suis Amaury, étudiant à RISE"
-                    message.RSSI += 3
-                elif cnt2 == 2:
-                    message.data = "J'adore la Suède, super pays!"
-                    message.RSSI += 8
-
-                cnt2 = (cnt2 + 1) % 3
-
-                receiver.print_RX(message)
-
-                if display_humanscatter:
-                    display.print_msg(display_humanscatter, message, color)
-
-                time.sleep_ms(2000)
-                receiver.start_listen_RX(radio, CS_RX)
-                receiver.event_RX = "no_reception"
-                cnt = 1
+                message = receiver.ring_pop(receiver.Message())
+                if not received:
+                    boot_mark("first_packet")
+
+                # Demo messages: shown in place of the received text
+                if DEMO_MESSAGES:
+                    if cnt2 == 0:
+                        message.data = "Hello je backscatte comment ça va le sang"
+                        message.RSSI += 5
+                    elif cnt2 == 1:
+                        message.data = "Salut je suis Amaury, étudiant à RISE"
+                        message.RSSI += 3
+                    elif cnt2 == 2:
+                        message.data = "J'adore la Suède, super pays!"
+                        message.RSSI += 8
+
+                    cnt2 = (cnt2 + 1) % 3
+                received += 1
+                led_q.put(message)
+                ui_q.put(message)
+                log_q.put(message)
             except Exception as e:
                 print("[ERROR] Failed during reception:", e)
+        await wake.wait()
+
+async def display_task():
+    """Pick the screen, drawn on core 1; back to "waiting" MSG_HOLD_MS after a message"""
+    showing = None
+    item = SCREEN_WAITING
+    while True:
+        if item == SCREEN_WAITING:
+            print("[DEBUG] Waiting for messages...")
+            render.post(render.WAITING)
+        elif item == SCREEN_TIMEOUT:
+            render.post(render.TIMEOUT)
+        else:
+            render.post(render.MESSAGE, item)
+        showing = item
+        item = None
+        while item is None:
+            try:
+                item = await asyncio.wait_for_ms(ui_q.get(), MSG_HOLD_MS)
+            except asyncio.TimeoutError:
+                if showing != SCREEN_WAITING and showing != SCREEN_TIMEOUT:
+                    item = SCREEN_WAITING
+
+async def led_task():
+    """Blink the message LED once per message, merged under a burst"""
+    while True:
+        await led_q.get()
+        LED_MESSAGE.value(1)
+        await asyncio.sleep_ms(MSG_LED_MS)
+        LED_MESSAGE.value(0)
 
-        # If no messages yet
-        elif receiver and receiver.event_RX == "no_reception":
-            if cnt:
-                print("[DEBUG] Waiting for messages...")
-                if display_humanscatter:
-                    display.print_waiting(display_humanscatter, "WAITING", color)
-                cnt = 0
-
-        # Carrier timeout
-        elif carrier and carrier.event_TX == "timeout":
-            print("[DEBUG] Carrier timeout! Stopping...")
-            carrier.stop_carrier_TX()
+async def carrier_task():
+    """Follow the carrier session timer: LED and screen"""
+    while True:
+        await carrier_q.get()
+        if carrier.rf_on:
+            print("[DEBUG] Carrier restarted")
+            LED_CARRIER.value(1)
+            ui_q.put(SCREEN_WAITING)
+        else:
+            print("[DEBUG] Carrier timeout! RF off for", carrier_off, "s")
             LED_CARRIER.value(0)  # Turn carrier LED OFF
-            if display_humanscatter:
-                display.print_carrier_timeout(display_humanscatter, color)
-            break
+            ui_q.put(SCREEN_TIMEOUT)
 
-        time.sleep(0.05)
+async def telemetry_task():
+    """Print received messages, and the counters every TELEMETRY_MS"""
+    due = time.ticks_add(time.ticks_ms(), TELEMETRY_MS)
+    while True:
+        try:
+            message = await asyncio.wait_for_ms(log_q.get(), max(1, time.ticks_diff(due, time.ticks_ms())))
+            print("[DEBUG] Message received!")
+            receiver.print_RX(message)
+        except asyncio.TimeoutError:
+            pass
+        if time.ticks_diff(time.ticks_ms(), due) >= 0:
+            due = time.ticks_add(due, TELEMETRY_MS)
+            print("[INFO] rx %d, CRC drops %d, ring drops %d, queue drops ui %d log %d, schedule full %d, carrier sessions %d" % (
+                received, receiver.crc_dropped, receiver.ring_dropped, ui_q.dropped, log_q.dropped,
+                events.sched_failed, carrier.sessions))
+            if display_on:
+                print("[INFO] screens drawn %d, merged %d, core 1 busy %d ms, %d px pushed" % (
+                    render.drawn, render.coalesced, render.busy_us // 1000,
+                    render.screen.pixels if render.screen else 0))
+                if render.failed:
+                    print("[ERROR] Display renderer:", render.failed)
+
+async def main_tasks():
+    tasks = []
+    if receiver:
+        tasks.append(asyncio.create_task(packet_task()))
+        tasks.append(asyncio.create_task(led_task()))
+        tasks.append(asyncio.create_task(telemetry_task()))
+    if carrier:
+        tasks.append(asyncio.create_task(carrier_task()))
+    if display_on:
+        tasks.append(asyncio.create_task(display_task()))
+    await asyncio.gather(*tasks)
+
+# ====================== MAIN LOOP ======================
+if receiver and carrier:
+    try:
+        if DEMO_MESSAGES:
+            receiver.dummy_message_generator()
+        carrier.carrier_timer(carrier_timeout, carrier_off)
+    except Exception as e:
+        print("[ERROR] Failed to start timers:", e)
+
+boot_mark("main_loop")
+if boot_profile:
+    boot_profile.report()
+
+print("[DEBUG] Entering main loop...")
 
+try:
+    if runtime:
+        asyncio.run(main_tasks())
 except Exception as e:
     print("[FATAL] Crash in main loop:", e)
-    print("[INFO] Entering safe idle mode...")
-    while True:
-        time.sleep(1)  # Keep USB REPL alive
+print("[INFO] Entering safe idle mode...")
+while True:
+    time.sleep(1)  # Keep USB REPL alive
@@ -0,0 +1,105 @@
+#================ ADF4351 FREQUENCY MATH =============
+
+# Pure register arithmetic for the ADF4351 carrier (datasheet Rev. A,
+# "Register Map" and "RF Synthesizer - A Worked Example"):
+#
+#   f_PFD = REF_IN * (1 + D) / (R * (1 + T))        (D = T = 0 here)
+#   f_VCO = (INT + FRAC / MOD) * f_PFD               (fundamental feedback)
+#   RF_OUT = f_VCO / RF divider
+#
+# Integer math only: floats are single precision on the Pico. No
+# hardware imports, so it also runs on CPython.
+
+REF_HZ = 25000000
+VCO_MIN = 2200000000
+VCO_MAX = 4400000000
+OUT_MIN = 34375000          # VCO_MIN / 64
+OUT_MAX = VCO_MAX
+PFD_MAX = 32000000          # fractional-N
+MOD_MAX = 4095
+BS_CLK_MAX = 125000         # band select clock, low mode
+PRESCALER_89_VCO = 3600000000   # 4/5 prescaler only up to 3.6 GHz
+
+LDP = 1 << 7                # R2 lock detect precision: 0 = 10 ns, 1 = 6 ns
+
+# Default output step: the finest MOD the R counter allows below this
+SPACING_HZ = 1000
+
+def solve(f_out, spacing=SPACING_HZ, ref=REF_HZ):
+    """
+    Divider, R counter and INT/FRAC/MOD for f_out Hz on a spacing Hz
+    grid. Returns a dict of the register fields and the achieved
+    frequency (rounded to 1 Hz).
+    """
+    if not OUT_MIN <= f_out <= OUT_MAX:
+        raise ValueError("ADF4351 output %d Hz out of range" % f_out)
+    div = 1
+    while f_out * div < VCO_MIN:
+        div *= 2
+    f_vco = f_out * div
+    # Lowest R counter whose PFD still splits into VCO steps no coarser
+    # than spacing * div with MOD <= MOD_MAX
+    step = max(1, spacing * div)
+    r = max(1, (ref + PFD_MAX - 1) // PFD_MAX)
+    while (ref + r * step - 1) // (r * step) > MOD_MAX and r < 1023:
+        r += 1
+    mod = max(2, min(MOD_MAX, (ref + r * step - 1) // (r * step)))
+    n_mod = (f_vco * r * mod + ref // 2) // ref     # (INT + FRAC/MOD) * MOD
+    # MOD is not reduced by gcd(FRAC, MOD): keeping it fixed for a given
+    # spacing and divider lets nearby retunes change R0 alone
+    n_int, frac = divmod(n_mod, mod)
+    prescaler = 1 if f_vco > PRESCALER_89_VCO else 0
+    if n_int < (75 if prescaler else 23) or n_int > 65535:
+        raise ValueError("ADF4351 INT %d out of range" % n_int)
+    bs_div = min(255, (ref + r * BS_CLK_MAX - 1) // (r * BS_CLK_MAX))
+    return {
+        "int": n_int,
+        "frac": frac,
+        "mod": mod,
+        "r": r,
+        "div": div,
+        "prescaler": prescaler,
+        "bs_div": bs_div,
+        "frequency": ((n_int * mod + frac) * ref + r * mod * div // 2) // (r * mod * div),
+    }
+
+def registers(base, fields):
+    """Copy of the six registers in base with the fields of solve() applied"""
+    regs = list(base)
+    regs[0] = (fields["int"] << 15) | (fields["frac"] << 3) | 0
+    regs[1] = (regs[1] & ~((1 << 27) | (0xFFF << 3))) | (fields["prescaler"] << 27) | (fields["mod"] << 3)
+    # R counter, no reference doubler or /2; lock detect precision (LDP)
+    # 10 ns for fractional-N, 6 ns when FRAC = 0 (integer-N)
+    ldp = 0 if fields["frac"] else 1
+    regs[2] = (regs[2] & ~((0x3 << 24) | (0x3FF << 14) | LDP)) | (fields["r"] << 14) | (ldp << 7)
+    div_sel = 0
+    while (1 << div_sel) < fields["div"]:
+        div_sel += 1
+    regs[4] = (regs[4] & ~((0x7 << 20) | (0xFF << 12))) | (div_sel << 20) | (fields["bs_div"] << 12)
+    return regs
+
+def frequency(regs, ref=REF_HZ):
+    """RF output frequency the registers give (Hz, rounded)"""
+    n_int = (regs[0] >> 15) & 0xFFFF
+    frac = (regs[0] >> 3) & 0xFFF
+    mod = (regs[1] >> 3) & 0xFFF or 1
+    r = (regs[2] >> 14) & 0x3FF or 1
+    doubler = (regs[2] >> 25) & 1
+    half = (regs[2] >> 24) & 1
+    div = 1 << ((regs[4] >> 20) & 0x7)
+    num = (n_int * mod + frac) * ref * (1 + doubler)
+    den = r * (1 + half) * mod
+    if not (regs[4] >> 23) & 1:
+        div = 1     # divided feedback: N counts the divided output
+    return (num + den * div // 2) // (den * div)
+
+def changed(old, new):
+    """
+    Register indexes to write to move the chip from old to new: the
+    changed ones from R5 down, then R0 whenever anything changed (R0
+    starts VCO band selection and loads the double-buffered divider).
+    """
+    order = [i for i in (5, 4, 3, 2, 1) if old[i] != new[i]]
+    if order or old[0] != new[0]:
+        order.append(0)
+    return order
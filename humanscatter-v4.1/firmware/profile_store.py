@@ -0,0 +1,145 @@
+import binascii
+import struct
+import carrier
+import receiver
+
+#================ PROFILE STORE =============
+
+# Named radio profiles on the Pico filesystem, one file read at boot:
+#
+#   "HSPS", format, entry count, active name (16 bytes)
+#   per entry: name (16 bytes), version, CC2500 blob length,
+#              carrier Hz, subcarrier offset, bandwidth, deviation,
+#              data rate, ADF4351 R0..R5, CC2500 blob, CRC32
+#
+# The CC2500 blob is one burst write of configuration registers 0x00-0x2E
+# (the receiver's register shadow), so a stored profile loads with a
+# single SPI transaction and no register math. An entry whose CRC does
+# not match is ignored; with no valid active entry the firmware falls
+# back to the compiled-in defaults of receiver.py and carrier.py.
+#
+#   profile_store.save("board")     # current state, made active
+#   profile_store.select("default") # used from the next boot
+
+STORE_FILE = "radio_store.bin"
+MAGIC = b"HSPS"
+FORMAT = 1
+NAME_LEN = 16
+
+_HEADER = "<4sBB16s"
+_ENTRY = "<16sHH5I6I"
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_ENTRY_SIZE = struct.calcsize(_ENTRY)
+
+corrupt = []    # names of entries that failed their CRC in the last read()
+
+def _name(raw):
+    raw = raw.rstrip(b"\x00")
+    try:
+        return raw.decode()
+    except UnicodeError:
+        # Damaged bytes (the active name has no CRC): printable, matches no entry
+        return "".join(chr(c) if 32 <= c < 127 else "?" for c in raw)
+
+def read(path=STORE_FILE):
+    """
+    (active name, {name: (version, rx blob, ADF4351 registers, values)})
+    with values = (carrier Hz, offset, bw, f_dev, r_data). None if the
+    file is missing or not a store.
+    """
+    global corrupt
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER_SIZE:
+        return None
+    magic, fmt, count, active = struct.unpack_from(_HEADER, data, 0)
+    if magic != MAGIC or fmt != FORMAT:
+        return None
+    entries = {}
+    corrupt = []
+    pos = _HEADER_SIZE
+    for _ in range(count):
+        if pos + _ENTRY_SIZE > len(data):
+            break
+        fields = struct.unpack_from(_ENTRY, data, pos)
+        rx_len = fields[2]
+        end = pos + _ENTRY_SIZE + rx_len
+        if end + 4 > len(data):
+            corrupt.append(_name(fields[0]))
+            break
+        if binascii.crc32(memoryview(data)[pos:end]) != struct.unpack_from("<I", data, end)[0]:
+            corrupt.append(_name(fields[0]))
+        else:
+            entries[_name(fields[0])] = (fields[1], data[pos + _ENTRY_SIZE:end], list(fields[8:14]), fields[3:8])
+        pos = end + 4
+    return _name(active), entries
+
+def write(active, entries, path=STORE_FILE):
+    """Write the whole store (entries as returned by read)"""
+    out = bytearray(struct.pack(_HEADER, MAGIC, FORMAT, len(entries), active.encode()))
+    for name, (version, rx, regs, values) in entries.items():
+        entry = struct.pack(_ENTRY, name.encode(), version, len(rx), *(tuple(values) + tuple(regs))) + rx
+        out += entry
+        out += struct.pack("<I", binascii.crc32(entry))
+    with open(path, "wb") as f:
+        f.write(out)
+
+def load(name=None, path=STORE_FILE):
+    """The active (or named) entry, None if missing or corrupt"""
+    store = read(path)
+    if store is None:
+        return None
+    active, entries = store
+    return entries.get(name or active)
+
+def apply(entry):
+    """
+    Put a stored entry into receiver.py and carrier.py before setup_RX and
+    setup_TX. Returns the CC2500 blobs for setup_RX.
+    """
+    version, rx, regs, values = entry
+    receiver.CARRIER_FEQ, receiver.f_carrier, receiver.bw, receiver.f_dev, receiver.r_data = values
+    for i in range(6):
+        carrier.ADF4351_REGISTERS[i] = regs[i]
+    return [rx]
+
+def boot(path=STORE_FILE):
+    """Apply the active profile: (name, version, CC2500 blobs), or None for the defaults"""
+    store = read(path)
+    if store is None:
+        return None
+    active, entries = store
+    entry = entries.get(active)
+    if entry is None:
+        return None
+    return active, entry[0], apply(entry)
+
+def save(name, make_active=True, path=STORE_FILE):
+    """Store the running configuration of both radios as name; returns its version"""
+    if len(name.encode()) > NAME_LEN:
+        raise ValueError("profile name longer than %d bytes" % NAME_LEN)
+    store = read(path)
+    active, entries = store if store is not None else (name, {})
+    version = entries[name][0] + 1 if name in entries else 1
+    image = bytearray(receiver.shadow_RX)
+    # Autocalibration on: FSCAL values are per channel and not stored
+    image[0x18] = (image[0x18] & ~receiver.MCSM0_AUTOCAL) | 0x10
+    rx = bytes([0x40]) + bytes(image)       # burst write from 0x00
+    values = (receiver.CARRIER_FEQ, receiver.f_carrier, receiver.bw, receiver.f_dev, receiver.r_data)
+    entries[name] = (version, rx, list(carrier.ADF4351_REGISTERS), values)
+    write(name if make_active else active, entries, path)
+    return version
+
+def select(name, path=STORE_FILE):
+    """Make name the profile loaded at the next boot"""
+    store = read(path)
+    if store is None or name not in store[1]:
+        raise KeyError(name)
+    write(name, store[1], path)
+
+def names(path=STORE_FILE):
+    store = read(path)
+    return [] if store is None else sorted(store[1])
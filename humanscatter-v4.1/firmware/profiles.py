@@ -0,0 +1,14 @@
+# Generated by tools/compile_profile.py from tools/radio_profiles.json, do not edit.
+
+# name: (CC2500 burst blobs, (frequency, f_dev, r_data, bw) requested,
+#        achieved values)
+RX_PROFILES = {
+    'default': (
+        (
+            b"\x42\x06",
+            b"\x48\x05\x00\x00\x0a\x00\x5e\x7c\x07\x0b\xf8\x03\x20\x04\x75\x07\x30\x18\x1d\x1c\xc7\x00\xb0\x87\x6b\xf8\xb6\x10\xa9\x0a\x00\x11",
+        ),
+        (2456597222, 347222, 100000, 794444),
+        {'bandwidth': 812500, 'datarate': 99975, 'deviation': 330078, 'frequency': 2456596527},
+    ),
+}
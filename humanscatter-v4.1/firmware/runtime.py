@@ -0,0 +1,52 @@
+import asyncio
+import events
+
+#================ TASK RUNTIME =============
+
+# main.py runs as asyncio tasks on core 0. IRQ handlers never touch the
+# tasks: they post() event flags, and wake_flag() makes every post() set a
+# ThreadSafeFlag the event pump task waits on. Tasks hand work to each
+# other through bounded Queues whose put() never waits, so a slow
+# consumer (display, USB prints) loses its oldest items instead of
+# holding up the task that empties the receiver ring.
+
+def wake_flag():
+    """ThreadSafeFlag set by every events.post(); one task may wait on it"""
+    if events.wake is None:
+        events.wake = asyncio.ThreadSafeFlag()
+    return events.wake
+
+class Queue:
+    """
+    Bounded FIFO between tasks, preallocated. put() drops the oldest item
+    when full (counted in dropped); get() waits for an item.
+    """
+    def __init__(self, size):
+        self.items = [None] * size
+        self.tail = 0
+        self.count = 0
+        self.puts = 0
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def put(self, item):
+        size = len(self.items)
+        if self.count == size:
+            self.items[self.tail] = None
+            self.tail = (self.tail + 1) % size
+            self.count -= 1
+            self.dropped += 1
+        self.items[(self.tail + self.count) % size] = item
+        self.count += 1
+        self.puts += 1
+        self.ready.set()
+
+    async def get(self):
+        while not self.count:
+            self.ready.clear()
+            await self.ready.wait()
+        item = self.items[self.tail]
+        self.items[self.tail] = None
+        self.tail = (self.tail + 1) % len(self.items)
+        self.count -= 1
+        return item
@@ -0,0 +1,141 @@
+#================ RETAINED UI =============
+
+# The main screen as widgets that remember what they show. Setting a
+# widget to what it already shows does nothing; flush() redraws only the
+# changed widgets, in one pass per frame, and sends one full frame
+# against two for display.print_msg (clear_text + text).
+#
+# PARTIAL_UPDATE pushes only the changed boxes with
+# PicoGraphics.partial_update(): a message (RSSI field, message body,
+# status line) is then about 60% of one frame on the display SPI bus.
+# Some builds have the method but their ST7789 driver ignores it, which
+# leaves the screen frozen, and that cannot be told from here; set it
+# True only for a build checked on the panel.
+
+PARTIAL_UPDATE = False
+GLYPH_H = 8         # bitmap8 font height at scale 1
+
+class Widget:
+    """Fixed box on the screen, redrawn when marked dirty"""
+    def __init__(self, x, y, w, h):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.dirty = True
+
+    def draw(self, display, color):
+        """Draw the widget; returns the height of its box that changed"""
+        return self.h
+
+class Header(Widget):
+    """Title bar: HUMANSCATTER, RSSI caption and the green rules"""
+    def draw(self, display, color):
+        display.set_pen(color.BLACK)
+        display.rectangle(self.x, self.y, self.w, self.h)
+        display.set_pen(color.GREEN)
+        display.line(142, 0, 142, 25, 3)
+        display.line(0, 25, 240, 25, 2)
+        display.set_pen(color.GREEN2)
+        display.text("HUMANSCATTER", 10, 2, 240, 2)
+        display.text("RSSI", 152, 2, 240, 2)
+        return self.h
+
+class Label(Widget):
+    """Text at (tx, ty) in its box, word wrapped at wrap pixels if given"""
+    def __init__(self, x, y, w, h, tx, ty, wrap=None):
+        super().__init__(x, y, w, h)
+        self.tx = tx
+        self.ty = ty
+        self.wrap = wrap
+        self.text = ""
+        self.pen = None
+        self.scale = 2
+        self.used = h       # rows of the box the drawn text may cover
+
+    def set(self, text, pen, scale=2):
+        if text != self.text or pen != self.pen or scale != self.scale:
+            self.text = text
+            self.pen = pen
+            self.scale = scale
+            self.dirty = True
+
+    def rows(self, display):
+        # Rows the text covers from the box top, with a spare line for
+        # words pushed down by wrapping
+        if not self.text:
+            return 0
+        lines = 1
+        if self.wrap:
+            lines = display.measure_text(self.text, self.scale) // self.wrap + 2
+        return min(self.h, self.ty - self.y + lines * GLYPH_H * self.scale)
+
+    def draw(self, display, color):
+        rows = self.rows(display)
+        changed = max(rows, self.used)
+        display.set_pen(color.BLACK)
+        display.rectangle(self.x, self.y, self.w, changed)
+        if self.text:
+            display.set_pen(self.pen)
+            display.text(self.text, self.tx, self.ty, self.wrap or 240, self.scale)
+        self.used = rows
+        return changed
+
+class Screen:
+    """Main screen: header, RSSI field, message body and status line"""
+    def __init__(self, display, color):
+        self.display = display
+        self.color = color
+        self.header = Header(0, 0, 240, 28)
+        self.rssi = Label(195, 2, 45, 20, 195, 2)
+        self.body = Label(0, 30, 240, 88, 5, 35, 235)
+        self.status = Label(0, 120, 240, 15, 5, 124)
+        self.widgets = (self.header, self.rssi, self.body, self.status)
+        self.full = True        # next flush repaints the whole screen
+        self.flushes = 0
+        self.pixels = 0         # pixels pushed to the panel
+
+    def message(self, message):
+        c = self.color
+        self.rssi.set(str(message.RSSI), c.WHITE)
+        self.body.set(message.data, c.WHITE)
+        self.status.set("SEQ %d  LQI %d" % (message.sequence, message.link_quality_indicator), c.GREEN2, 1)
+
+    def waiting(self):
+        self.rssi.set("", None)
+        self.body.set("message pending", self.color.CYAN, 3)
+
+    def invalidate(self):
+        """Something else drew over the screen: repaint it all next flush"""
+        self.full = True
+
+    def flush(self):
+        """Draw the dirty widgets and push them; False if nothing changed"""
+        display = self.display
+        color = self.color
+        if self.full:
+            display.set_pen(color.BLACK)
+            display.clear()
+            for w in self.widgets:
+                w.dirty = True
+        partial = PARTIAL_UPDATE and not self.full and hasattr(display, "partial_update")
+        drawn = 0
+        pushed = 0
+        for w in self.widgets:
+            if w.dirty:
+                rows = w.draw(display, color)
+                w.dirty = False
+                drawn += 1
+                if partial and rows:
+                    display.partial_update(w.x, w.y, w.w, rows)
+                    pushed += w.w * rows
+        if not drawn:
+            return False
+        if not partial:
+            width, height = display.get_bounds()
+            display.update()
+            pushed = width * height
+        self.full = False
+        self.flushes += 1
+        self.pixels += pushed
+        return True
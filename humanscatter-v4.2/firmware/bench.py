@@ -0,0 +1,377 @@
+import gc
+import json
+import sys
+import time
+import machine
+from machine import Pin
+import carrier
+import receiver
+import display
+import events
+import runtime
+import ui
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+# Firmware benchmarks. On the Pico run this file from Thonny with a tag
+# transmitting; results go to bench_results.json on the board. On a host
+# run it through the simulated peripherals with tools/bench.py, which
+# also compares result files between firmware builds.
+#
+# Every stage is timed in one pass and measured for heap allocation in a
+# second pass with the GC disabled around each call. SPI traffic is
+# counted by thin wrappers around the SPI objects (about 10 us per call
+# on the Pico, included in the timings). The receive stages run main.py's
+# packet task under asyncio; drawing is on core 1 there, so print_msg and
+# ui_message are timed on their own.
+
+ROUNDS = 20             # calls per setup stage
+PACKETS = 100           # packets timed per receive stage
+ALLOC_PACKETS = 20      # packets measured for allocation per receive stage
+RX_WINDOW_MS = 20000    # stop waiting for tag packets after this
+RESULTS_FILE = "bench_results.json"
+
+GDO0_PIN = 2
+
+#================ COUNTERS =============
+
+spi_transactions = 0
+spi_bytes = 0
+
+class CountingSPI:
+    """SPI object wrapper adding every call to the module SPI counters"""
+    def __init__(self, spi):
+        self.spi = spi
+
+    def write(self, buf):
+        global spi_transactions, spi_bytes
+        spi_transactions += 1
+        spi_bytes += len(buf)
+        self.spi.write(buf)
+
+    def read(self, nbytes, write=0x00):
+        global spi_transactions, spi_bytes
+        spi_transactions += 1
+        spi_bytes += nbytes
+        return self.spi.read(nbytes, write)
+
+    def readinto(self, buf, write=0x00):
+        global spi_transactions, spi_bytes
+        spi_transactions += 1
+        spi_bytes += len(buf)
+        self.spi.readinto(buf, write)
+
+    def write_readinto(self, write_buf, read_buf):
+        global spi_transactions, spi_bytes
+        spi_transactions += 1
+        spi_bytes += len(write_buf)
+        self.spi.write_readinto(write_buf, read_buf)
+
+class CountingDisplay:
+    """PicoGraphics wrapper counting each update() as one full-frame SPI write"""
+    def __init__(self, display):
+        self.display = display
+        width, height = display.get_bounds()
+        self.frame_bytes = width * height * 2
+        if hasattr(display, "partial_update"):
+            self.partial_update = self._partial_update
+
+    def _partial_update(self, x, y, w, h):
+        global spi_transactions, spi_bytes
+        spi_transactions += 1
+        spi_bytes += w * h * 2
+        self.display.partial_update(x, y, w, h)
+
+    def update(self):
+        global spi_transactions, spi_bytes
+        spi_transactions += 1
+        spi_bytes += self.frame_bytes
+        self.display.update()
+
+    def __getattr__(self, name):
+        return getattr(self.display, name)
+
+#================ STATISTICS =============
+
+def summary(samples):
+    s = sorted(samples)
+    n = len(s)
+    if not n:
+        return {"n": 0}
+    return {
+        "n": n,
+        "mean_us": sum(s) // n,
+        "p50_us": s[n // 2],
+        "p90_us": s[n * 9 // 10],
+        "p99_us": s[min(n - 1, n * 99 // 100)],
+        "max_us": s[-1],
+    }
+
+def stage_result(times, allocs, transactions, nbytes, per):
+    r = summary(times)
+    per = max(per, 1)
+    r["spi_transactions"] = transactions / per
+    r["spi_bytes"] = nbytes / per
+    r["alloc_bytes"] = sum(allocs) / max(len(allocs), 1)
+    r["alloc_bytes_max"] = max(allocs) if allocs else 0
+    return r
+
+def alloc_start():
+    gc.collect()
+    gc.disable()
+    return gc.mem_alloc()
+
+def alloc_end(a0):
+    a = gc.mem_alloc() - a0
+    gc.enable()
+    return a
+
+#================ SETUP STAGES =============
+
+def bench_call(fn, *args):
+    """Time fn(*args) ROUNDS times, then measure its allocations"""
+    times = []
+    t0_spi = spi_transactions
+    b0_spi = spi_bytes
+    for _ in range(ROUNDS):
+        gc.collect()
+        t0 = time.ticks_us()
+        fn(*args)
+        times.append(time.ticks_diff(time.ticks_us(), t0))
+    transactions = spi_transactions - t0_spi
+    nbytes = spi_bytes - b0_spi
+    allocs = []
+    for _ in range(ROUNDS):
+        a0 = alloc_start()
+        fn(*args)
+        allocs.append(alloc_end(a0))
+    return stage_result(times, allocs, transactions, nbytes, ROUNDS)
+
+_ui_next = 0
+
+def ui_message(screen, messages):
+    """The next of messages on the retained UI screen, one flush"""
+    global _ui_next
+    _ui_next = (_ui_next + 1) % len(messages)
+    screen.message(messages[_ui_next])
+    screen.flush()
+
+def ui_messages():
+    messages = []
+    for i, text in enumerate(("Hello tag", "Backscatter packet long enough to wrap on two lines", "42")):
+        m = receiver.Message()
+        m.data = text
+        m.RSSI = -60 - i
+        m.sequence = i
+        messages.append(m)
+    return messages
+
+#================ RECEIVE STAGES =============
+
+class DrainProbe:
+    """Stands in for receiver._drain_ref and times every scheduled drain"""
+    def __init__(self, drain):
+        self.drain = drain
+        self.measure_alloc = False
+        self.reset()
+
+    def reset(self):
+        self.latency = []       # GDO0 IRQ -> drain start
+        self.times = []
+        self.posted = None      # end of the first drain that woke the packet task
+        self.allocs = []
+        self.packets = 0
+        self.transactions = 0
+        self.bytes = 0
+
+    def __call__(self, arg):
+        global spi_transactions, spi_bytes
+        t0 = time.ticks_us()
+        irq = receiver._irq_ticks
+        before = receiver.ring_count_total
+        t_spi = spi_transactions
+        b_spi = spi_bytes
+        if self.measure_alloc and gc.isenabled():
+            # (not when it interrupts an allocation window of the main loop)
+            gc.disable()
+            a0 = gc.mem_alloc()
+            self.drain(arg)
+            self.allocs.append(gc.mem_alloc() - a0)
+            gc.enable()
+        elif self.measure_alloc:
+            self.drain(arg)
+        else:
+            self.drain(arg)
+            t1 = time.ticks_us()
+            self.times.append(time.ticks_diff(t1, t0))
+            self.latency.append(time.ticks_diff(t0, irq))
+            if self.posted is None and receiver.ring_count_total != before:
+                self.posted = t1
+        self.packets += receiver.ring_count_total - before
+        self.transactions += spi_transactions - t_spi
+        self.bytes += spi_bytes - b_spi
+
+async def display_stub(ui_q):
+    """Stands in for main.py's display task, whose render.post() only fills a mailbox"""
+    while True:
+        await ui_q.get()
+
+async def packet_task(probe, packets, measure_alloc, samples):
+    """
+    main.py's packet task: sleep on the event flag, then empty the ring
+    into the display queue. Times ring_pop and the wake, from the end of
+    the drain that posted RX_PACKET to the first ring_pop after it.
+    """
+    pop_t, pop_a, wake_t = samples
+    wake = runtime.wake_flag()
+    ui_q = runtime.Queue(1)
+    stub = asyncio.create_task(display_stub(ui_q))
+    message = receiver.Message()
+    got = 0
+    start = time.ticks_ms()
+    while got < packets:
+        events.take()
+        if receiver.ring_count() and probe.posted is not None:
+            if not measure_alloc:
+                wake_t.append(time.ticks_diff(time.ticks_us(), probe.posted))
+            probe.posted = None
+        while receiver.ring_count() and got < packets:
+            got += 1
+            if measure_alloc:
+                a0 = alloc_start()
+                receiver.ring_pop(message)
+                pop_a.append(alloc_end(a0))
+            else:
+                t0 = time.ticks_us()
+                receiver.ring_pop(message)
+                pop_t.append(time.ticks_diff(time.ticks_us(), t0))
+            ui_q.put(message)
+        left = RX_WINDOW_MS - time.ticks_diff(time.ticks_ms(), start)
+        if got >= packets or left <= 0:
+            break
+        try:
+            await asyncio.wait_for_ms(wake.wait(), left)
+        except asyncio.TimeoutError:
+            break
+    stub.cancel()
+
+def bench_receive(probe, packets, measure_alloc):
+    """
+    Run the packet task under asyncio until packets arrived.
+    Returns (ring_pop times, ring_pop allocations, wake-to-pop latencies).
+    """
+    samples = ([], [], [])
+    probe.measure_alloc = measure_alloc
+    probe.posted = None
+    asyncio.run(packet_task(probe, packets, measure_alloc, samples))
+    probe.measure_alloc = False
+    return samples
+
+def bench_poll(spi, CS, packets):
+    """decode_packet_RX polled with the GDO0 IRQ off, per decoded packet"""
+    global spi_transactions, spi_bytes
+    Pin(GDO0_PIN, Pin.IN).irq(handler=None)
+    message = receiver.Message()
+    times = []
+    allocs = []
+    t_spi = 0
+    b_spi = 0
+    start = time.ticks_ms()
+    while len(allocs) < ALLOC_PACKETS and time.ticks_diff(time.ticks_ms(), start) < RX_WINDOW_MS:
+        message.length = 0
+        t0 = spi_transactions
+        b0 = spi_bytes
+        if len(times) < packets:
+            t = time.ticks_us()
+            receiver.decode_packet_RX(spi, CS, receiver.RX_BUFFER_SIZE, message)
+            t = time.ticks_diff(time.ticks_us(), t)
+            if message.length:
+                times.append(t)
+                t_spi += spi_transactions - t0
+                b_spi += spi_bytes - b0
+        else:
+            a0 = alloc_start()
+            receiver.decode_packet_RX(spi, CS, receiver.RX_BUFFER_SIZE, message)
+            a = alloc_end(a0)
+            if message.length:
+                allocs.append(a)
+        if message.overflow:
+            receiver.start_listen_RX(spi, CS)
+    receiver.set_irq_RX(GDO0_PIN)
+    return stage_result(times, allocs, t_spi, b_spi, len(times))
+
+#================ RUN =============
+
+def run(path=RESULTS_FILE, label=None):
+    rx_spi = CountingSPI(receiver.spi_rx)
+    cs = receiver.cs_rx
+    carrier.spi_tx = CountingSPI(carrier.spi_tx)
+    disp, color = display.setup_screen()
+    disp = CountingDisplay(disp)
+
+    stages = {}
+    print("bench: setup_TX")
+    stages["setup_TX"] = bench_call(carrier.setup_TX)
+    print("bench: setup_RX")
+    stages["setup_RX"] = bench_call(receiver.setup_RX, rx_spi, cs, GDO0_PIN)
+
+    carrier.start_carrier_TX()
+    print("bench: rf_output")
+    stages["rf_output"] = bench_call(carrier.rf_output, True)
+    receiver.start_listen_RX(rx_spi, cs)
+    probe = DrainProbe(receiver._drain_ref)
+    receiver._drain_ref = probe
+
+    print("bench: receive, waiting for", PACKETS, "packets")
+    pop_t, _, wake_t = bench_receive(probe, PACKETS, False)
+    latency = probe.latency
+    drain_t = probe.times
+    drain_spi = (probe.transactions, probe.bytes, probe.packets)
+    probe.reset()
+    _, pop_a, _ = bench_receive(probe, ALLOC_PACKETS, True)
+    drain_a = probe.allocs
+    receiver._drain_ref = probe.drain
+
+    stages["irq_to_drain"] = stage_result(latency, [], 0, 0, 1)
+    stages["drain_FIFO_RX"] = stage_result(drain_t, drain_a, drain_spi[0], drain_spi[1], drain_spi[2])
+    stages["ring_pop"] = stage_result(pop_t, pop_a, 0, 0, len(pop_t))
+    stages["packet_wake"] = stage_result(wake_t, [], 0, 0, 1)
+    messages = ui_messages()
+    print("bench: print_msg")
+    stages["print_msg"] = bench_call(display.print_msg, disp, messages[1], color)
+    print("bench: ui_message")
+    screen = ui.Screen(disp, color)
+    screen.flush()
+    stages["ui_message"] = bench_call(ui_message, screen, messages)
+    print("bench: decode_packet_RX")
+    stages["decode_packet_RX"] = bench_poll(rx_spi, cs, PACKETS)
+
+    results = {
+        "label": label or sys.platform,
+        "platform": sys.platform,
+        "implementation": sys.implementation.name,
+        "cpu_hz": machine.freq(),
+        "stages": stages,
+    }
+    report(results)
+    with open(path, "w") as f:
+        json.dump(results, f)
+    print("bench: wrote", path)
+    return results
+
+def report(results):
+    print("stage            |     n |   p50 us |   p99 us |   max us | SPI/call | bytes/call | alloc B")
+    for name in sorted(results["stages"]):
+        r = results["stages"][name]
+        if not r["n"]:
+            print("%-16s |     0 | (no samples)" % name)
+            continue
+        print("%-16s | %5d | %8d | %8d | %8d | %8.1f | %10.1f | %7.0f" % (
+            name, r["n"], r["p50_us"], r["p99_us"], r["max_us"],
+            r["spi_transactions"], r["spi_bytes"], r["alloc_bytes"]))
+
+if __name__ == "__main__":
+    run()
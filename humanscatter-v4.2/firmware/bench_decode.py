@@ -0,0 +1,76 @@
+import time
+import payload
+
+# Per-packet payload decode time, on the Pico (run from Thonny) or on a
+# host with plain CPython: python bench_decode.py
+
+try:
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+except AttributeError:
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+    def ticks_diff(a, b):
+        return a - b
+
+ROUNDS = 200
+SIZES = (8, 32, 62)
+
+def legacy_decode(byte_data):
+    # The original receiver.bytes_to_utf8_string, kept for comparison
+    utf8_string = ""
+    i = 0
+    while i < len(byte_data):
+        byte = byte_data[i]
+        if byte <= 0x7F:
+            utf8_string += chr(byte)
+            i += 1
+        elif 0xC0 <= byte <= 0xDF and i + 1 < len(byte_data) and 0x80 <= byte_data[i+1] <= 0xBF:
+            utf8_string += chr((byte & 0x1F) << 6 | (byte_data[i+1] & 0x3F))
+            i += 2
+        elif 0xE0 <= byte <= 0xEF and i + 2 < len(byte_data) and all(0x80 <= byte_data[i+j] <= 0xBF for j in range(1, 3)):
+            utf8_string += chr((byte & 0x0F) << 12 | (byte_data[i+1] & 0x3F) << 6 | (byte_data[i+2] & 0x3F))
+            i += 3
+        elif 0xF0 <= byte <= 0xF7 and i + 3 < len(byte_data) and all(0x80 <= byte_data[i+j] <= 0xBF for j in range(1, 4)):
+            utf8_string += chr((byte & 0x07) << 18 | (byte_data[i+1] & 0x3F) << 12 | (byte_data[i+2] & 0x3F) << 6 | (byte_data[i+3] & 0x3F))
+            i += 4
+        else:
+            i += 1
+    return utf8_string
+
+def sample(size, malformed=False):
+    # Frame layout as in the RX FIFO: length, sequence, text
+    data = bytearray()
+    for ch in "Suède " * 20:
+        enc = ch.encode("utf-8")
+        if len(data) + len(enc) > size:
+            break
+        data += enc
+    while len(data) < size:
+        data.append(0x20)
+    if malformed:
+        for i in range(3, size, 7):
+            data[i] = 0xFF
+    return bytearray([size + 1, 0]) + data
+
+def per_packet_us(fn, frame):
+    t0 = ticks_us()
+    for _ in range(ROUNDS):
+        fn(frame)
+    return ticks_diff(ticks_us(), t0) / ROUNDS
+
+def run():
+    cases = (
+        ("legacy", lambda f: legacy_decode(f[2:f[0] + 1]), False),
+        ("decode_utf8", lambda f: payload.decode_utf8(f, 2, f[0] + 1), False),
+        ("malformed", lambda f: payload.decode_utf8(f, 2, f[0] + 1), True),
+        ("raw bytes", lambda f: bytes(memoryview(f)[2:f[0] + 1]), False),
+    )
+    print("payload | " + " | ".join("%11s" % c[0] for c in cases) + "   (us/packet)")
+    for size in SIZES:
+        row = []
+        for name, fn, malformed in cases:
+            row.append("%11.1f" % per_packet_us(fn, sample(size, malformed)))
+        print("%5d B | " % size + " | ".join(row))
+
+run()
@@ -0,0 +1,76 @@
+import time
+import machine
+
+#================ BOOT PROFILES =============
+
+# How main.py brings the board up:
+#
+#   production: carrier and receiver first, then the display on core 1
+#               without the intro animation; no boot delay, no LED test
+#   debug:      the bench boot: 3 s to break into the REPL, LED test,
+#               display and animation before the radios
+#
+# The profile name is one line in PROFILE_FILE on the Pico filesystem.
+# Without the file (a fresh flash) or with an unknown name the board boots
+# DEFAULT, debug, so the REPL window is there to select another:
+#
+#   boot_profile.select("production")   # used from the next boot
+#
+# A production board gives no boot delay; to get back to debug, stop the
+# running firmware from Thonny and select("debug") or delete PROFILE_FILE.
+#
+# mark() stamps the end of a boot phase with time.ticks_us(), which on the
+# RP2040 counts from the last reset (power-on, brown-out or watchdog), so
+# a stamp is the time since the board came out of reset.
+
+#              delay ms, LED test, display first, animation
+PROFILES = {
+    "production": (0, False, False, False),
+    "debug": (3000, True, True, True),
+}
+DEFAULT = "debug"
+PROFILE_FILE = "boot_profile.txt"
+
+name = DEFAULT
+delay_ms, led_test, display_first, animation = PROFILES[DEFAULT]
+
+phases = []     # (phase, us since reset) in boot order
+
+def load(path=PROFILE_FILE):
+    """Read the profile to boot with; returns its name"""
+    global name, delay_ms, led_test, display_first, animation
+    try:
+        with open(path) as f:
+            stored = f.read().strip()
+    except OSError:
+        stored = DEFAULT
+    if stored not in PROFILES:
+        print("[WARN] Unknown boot profile", stored, "- using", DEFAULT)
+        stored = DEFAULT
+    name = stored
+    delay_ms, led_test, display_first, animation = PROFILES[name]
+    return name
+
+def select(profile, path=PROFILE_FILE):
+    """Boot with profile from the next reset"""
+    if profile not in PROFILES:
+        raise ValueError("unknown boot profile %s" % profile)
+    with open(path, "w") as f:
+        f.write(profile)
+
+def mark(phase):
+    phases.append((phase, time.ticks_us()))
+
+def at_us(phase):
+    """Time since reset at the end of phase, None if not reached yet"""
+    for p, t in phases:
+        if p == phase:
+            return t
+    return None
+
+def report():
+    print("[BOOT] profile %s, reset cause %d" % (name, machine.reset_cause()))
+    prev = 0
+    for p, t in phases:
+        print("[BOOT] %-12s %9d us  (+%d us)" % (p, t, time.ticks_diff(t, prev)))
+        prev = t
@@ -0,0 +1,53 @@
+import machine
+import micropython
+
+#================ EVENT FLAGS =============
+
+# Bit flags raised from IRQ and scheduled context and collected by the
+# main loop with one take() per iteration. post() only ORs a bit and
+# bumps a counter, so it is safe in a hard IRQ; the counters keep how
+# often each event happened, so bursts between two take() calls are not
+# lost. Work that cannot run in an IRQ goes through schedule(). Under the
+# asyncio runtime post() also sets the ThreadSafeFlag in wake, so the
+# task pumping events sleeps until there is something to take().
+
+RX_PACKET = 0x01    # receiver ring got packets (receiver.ring_count())
+TX_TIMEOUT = 0x02   # carrier session ended, RF output off
+TX_RESTART = 0x04   # carrier session started, RF output on
+NUM_FLAGS = 3
+
+flags = 0
+counts = [0] * NUM_FLAGS    # posts per flag since boot
+sched_failed = 0            # schedule() calls that found the queue full
+wake = None                 # asyncio.ThreadSafeFlag set by post(), see runtime.py
+
+def post(flag):
+    # IRQ safe: no allocation
+    global flags
+    flags |= flag
+    i = 0
+    while flag > 1:
+        flag >>= 1
+        i += 1
+    counts[i] += 1
+    if wake is not None:
+        wake.set()
+
+def take():
+    """Flags posted since the last take(), cleared in the same step"""
+    global flags
+    state = machine.disable_irq()
+    f = flags
+    flags = 0
+    machine.enable_irq(state)
+    return f
+
+def schedule(fn, arg=0):
+    """micropython.schedule for IRQ handlers: False (and counted) if the queue is full"""
+    global sched_failed
+    try:
+        micropython.schedule(fn, arg)
+        return True
+    except RuntimeError:
+        sched_failed += 1
+        return False
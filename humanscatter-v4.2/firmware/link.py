@@ -0,0 +1,61 @@
+import time
+import carrier
+import pllcalc
+import receiver
+import regcalc
+
+#================ JOINT RETUNE =============
+
+# One entry point for moving the link: the ADF4351 carrier and the CC2500,
+# which listens at carrier + backscatter subcarrier offset. Both radios
+# are programmed back to back and settle in parallel: the PLL relocks
+# while the CC2500 calibrates (or, with the FSCAL cache, settles) into RX.
+#
+# Plans (PLL solution and CC2500 burst blobs) are kept per frequency pair,
+# so returning to a channel skips the math. The register words are
+# rebuilt from the current ADF4351_REGISTERS each time, keeping power and
+# gating settings.
+
+RX_TIMEOUT_US = 2000    # CC2500 IDLE -> RX, calibration included
+
+plans = {}              # (carrier Hz, offset Hz, spacing, autocal) -> plan
+last_retune_us = 0
+last_lock_us = 0
+
+def plan(carrier_hz, offset_hz, spacing=pllcalc.SPACING_HZ):
+    """
+    (PLL fields, CC2500 blobs, achieved carrier Hz, achieved RX Hz) for
+    a carrier frequency and subcarrier offset, cached in plans.
+    """
+    key = (carrier_hz, offset_hz, spacing, receiver.autocal_RX)
+    p = plans.get(key)
+    if p is None:
+        fields = pllcalc.solve(carrier_hz, spacing)
+        blobs = receiver.hop_blobs_RX(fields["frequency"] + offset_hz)
+        freq = blobs[0]
+        word = (freq[1] << 16) | (freq[2] << 8) | freq[3]
+        p = (fields, blobs, fields["frequency"], regcalc.F_XOSC * word >> 16)
+        plans[key] = p
+    return p
+
+def retune(carrier_hz, offset_hz=None, spacing=pllcalc.SPACING_HZ):
+    """
+    Move both radios: carrier to carrier_hz, receiver to the achieved
+    carrier + offset_hz (default receiver.f_carrier). Stops hopping.
+    Returns (achieved carrier Hz, achieved RX Hz, retune time in us).
+    """
+    global last_retune_us, last_lock_us
+    if offset_hz is None:
+        offset_hz = receiver.f_carrier
+    fields, blobs, f_tx, f_rx = plan(carrier_hz, offset_hz, spacing)
+    carrier.stop_hopping()
+    t0 = time.ticks_us()
+    carrier.write_registers(pllcalc.registers(carrier.ADF4351_REGISTERS, fields), False)
+    receiver.hop_RX(blobs)      # SIDLE, FREQ (+ FSCAL), SRX
+    last_lock_us = carrier.wait_lock()
+    receiver.wait_state_RX(receiver._rx_spi, receiver._rx_cs, 0x0D, RX_TIMEOUT_US)
+    last_retune_us = time.ticks_diff(time.ticks_us(), t0)
+    # The carrier the PLL gives, which the receiver is tuned against
+    receiver.CARRIER_FEQ = f_tx
+    receiver.f_carrier = offset_hz
+    return f_tx, f_rx, last_retune_us
@@ -0,0 +1,62 @@
+#================ PAYLOAD DECODING =============
+
+# Tag payloads are UTF-8 text. The built-in decoder handles the normal
+# case in C; only malformed payloads go through the Python fallback.
+
+_scratch = bytearray(64)
+
+def decode_utf8(buf, start, end):
+    """Decode buf[start:end] as UTF-8, dropping malformed sequences"""
+    mv = memoryview(buf)[start:end]
+    try:
+        return str(mv, "utf-8")
+    except UnicodeError:
+        return decode_utf8_tolerant(mv)
+
+def decode_utf8_tolerant(data):
+    """
+    Single pass over data: copy every well-formed UTF-8 sequence into a
+    scratch buffer, skip the rest, then decode the result once.
+    """
+    global _scratch
+    n = len(data)
+    if len(_scratch) < n:
+        _scratch = bytearray(n)
+    out = _scratch
+    o = 0
+    i = 0
+    while i < n:
+        b = data[i]
+        if b <= 0x7F:
+            out[o] = b
+            o += 1
+            i += 1
+            continue
+        # Sequence length and allowed range of the first continuation byte
+        if 0xC2 <= b <= 0xDF:
+            size, lo, hi = 2, 0x80, 0xBF
+        elif 0xE0 <= b <= 0xEF:
+            size = 3
+            lo = 0xA0 if b == 0xE0 else 0x80
+            hi = 0x9F if b == 0xED else 0xBF
+        elif 0xF0 <= b <= 0xF4:
+            size = 4
+            lo = 0x90 if b == 0xF0 else 0x80
+            hi = 0x8F if b == 0xF4 else 0xBF
+        else:
+            i += 1
+            continue
+        if i + size > n or not lo <= data[i + 1] <= hi:
+            i += 1
+            continue
+        j = 2
+        while j < size and 0x80 <= data[i + j] <= 0xBF:
+            j += 1
+        if j < size:
+            i += 1
+            continue
+        for k in range(size):
+            out[o + k] = data[i + k]
+        o += size
+        i += size
+    return str(memoryview(out)[:o], "utf-8")
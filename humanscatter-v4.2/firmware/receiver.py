@@ -1,7 +1,12 @@
 import time
 import carrier
+import events
 import machine
-import math
+import micropython
+import payload
+import profiles
+import regcalc
+import spibus
 from machine import Pin, SPI, ADC, Timer
 from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_P4
 
@@ -10,11 +15,22 @@ from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_P4
 # Print Receiver Radio Configuration
 config_prints = False
 
+# Decode payloads to str; False hands consumers the raw payload bytes
+decode_text = True
+
+# Stay in RX between packets and drain the FIFO while listening; False
+# returns the radio to IDLE after each packet and re-arms it (recalibrates)
+rx_stay = True
+
+# Drain: drop frames whose CRC failed (status byte bit 7), see listen_RX
+drop_bad_crc = False
+
 # Radio Parameters
-BAUDRATE = 100000
+BAUDRATE = 6500000      # SPI clock, CC2500 maximum for burst access
 F_XOSC = 26000000
 CARRIER_FEQ = 2450000000
 RX_BUFFER_SIZE = 64
+RING_SIZE = 8       # Preallocated packet slots between the IRQ and main loop
 
 # Values
 r_data = 100000
@@ -23,29 +39,14 @@ f_dev = 347222
 f_carrier = 6597222
 
 # --- NEW PIN CONFIGURATION ---
-PIN_SCK = 10
-PIN_MOSI = 11
-PIN_MISO = 8
-PIN_CS = 22
+PIN_CS = 22             # SCK/MOSI/MISO on SPI1, see spibus.py
 PIN_GDO0 = 2
 PIN_GD2 = 3
 
-# SPI initialization
-spi_rx = SPI(
-    1,
-    baudrate=BAUDRATE,
-    polarity=0,
-    phase=0,
-    bits=8,
-    firstbit=SPI.MSB,
-    sck=Pin(PIN_SCK),
-    mosi=Pin(PIN_MOSI),
-    miso=Pin(PIN_MISO)
-)
-
-# Chip Select Pin
-cs_rx = Pin(PIN_CS, Pin.OUT)
-cs_rx.value(1)  # Active low
+# SPI1 device handle, shared bus with the ADF4351. It is also the chip
+# select: cs_rx.value(0) switches the bus to BAUDRATE and asserts CS.
+spi_rx = spibus.Device(PIN_CS, BAUDRATE)
+cs_rx = spi_rx
 
 # Interrupt pins
 gdo0_pin = Pin(PIN_GDO0, Pin.IN)
@@ -58,28 +59,24 @@ SIDLE = 0x36    #Idle mode of radio
 SRX = 0x34      #Receive mode of radio
 SFRX = 0x3A     #Clear FIFO
 SRES = 0x30     #Reset radio
+SCAL = 0x33     #Calibrate frequency synthesizer
+_SIDLE_CMD = bytes([SIDLE])     # preallocated for IRQ-context strobes
+_SRX_CMD = bytes([SRX])
 
-# Registers
-cc2500_receiver_settings=[[0x02, 0x06],
-                          [0x08, 0x05],
-                          [0x0b, 0x0A],
-                          [0x0e, 0x7C],
-                          [0x0f, 0x08],
-                          [0x10, 0x0B],
-                          [0x11, 0xF1],
-                          [0x12, 0x03],
-                          [0x13, 0x23],
-                          [0x14, 0xFF],
-                          [0x15, 0x76],
-                          [0x18, 0x18],
-                          [0x19, 0x1D],
-                          [0x1a, 0x1C],
-                          [0x1b, 0xC7],
-                          [0x1c, 0x00],
-                          [0x1d, 0xB0],
-                          [0x21, 0xB6],
-                          [0x25, 0x00],
-                          [0x26, 0x11]]
+# Receive modes (start_listen_RX)
+MCSM1_RX_IDLE = 0x00    # RXOFF_MODE: IDLE after a packet
+MCSM1_RX_STAY = 0x0C    # RXOFF_MODE: stay in RX
+PKTCTRL1_STATUS = 0x04              # APPEND_STATUS
+MCSM0_AUTOCAL = 0x30    # FS_AUTOCAL field, 0x10 = calibrate on IDLE -> RX/TX
+MARCSTATE = 0x35        # status register, 0x01 = IDLE
+FSCAL3 = 0x23           # FSCAL3, FSCAL2, FSCAL1: synthesizer calibration
+CAL_TIMEOUT_US = 2000
+
+# Registers (see regcalc.py)
+cc2500_receiver_settings = regcalc.cc2500_receiver_settings
+
+# Precompiled profile loaded by setup_RX (profiles.py, tools/compile_profile.py)
+rx_profile = "default"
 
 
 class Message:
@@ -90,151 +87,406 @@ class Message:
     length = 0
     sequence = 0
     link_quality_indicator = 0
+    ticks = 0
+
+#================ PACKET RING =============
+
+# Raw FIFO frames (length, payload, RSSI, LQI) are copied here by the
+# scheduled drain and consumed by the main loop with ring_pop().
+micropython.alloc_emergency_exception_buf(100)
+
+def frame_views(buf):
+    # [0] is the length byte, [1 + n] the payload and status of an n byte
+    # packet: fixed memoryviews so FIFO reads never slice or allocate.
+    mv = memoryview(buf)
+    return [mv[0:1]] + [mv[1:n + 3] for n in range(len(buf) - 2)]
+
+ring_buf = [bytearray(RX_BUFFER_SIZE) for _ in range(RING_SIZE)]
+ring_views = [frame_views(buf) for buf in ring_buf]
+ring_ticks = [0] * RING_SIZE
+ring_head = 0           # next slot written by drain_FIFO_RX
+ring_tail = 0           # next slot read by ring_pop
+ring_count_total = 0    # packets stored since boot
+ring_dropped = 0        # packets lost because the ring was full
+crc_dropped = 0         # frames with a failed CRC dropped by the drain
+ring_sched_failed = 0   # IRQs that found the schedule queue full
+
+_rx_spi = None
+_rx_cs = None
+_rx_gdo0 = None
+_rx_status = bytearray(2)     # chip status + RXBYTES
+_rx_header = bytearray(1)     # chip status clocked out with the FIFO header
+_rx_buf = bytearray(RX_BUFFER_SIZE)
+_rx_views = frame_views(_rx_buf)
+_irq_ticks = 0
+_drain_pending = False
+
+#================ REGISTER SHADOW =============
+
+# RAM copy of the configuration registers 0x00-0x2E, filled by one burst
+# readback in setup_RX and kept current by write_register_RX, so bit
+# merges never need an SPI read. FSCAL3..FSCAL1 change on calibration
+# and are not tracked.
+NUM_CONFIG_REGS = regcalc.NUM_CONFIG_REGS
+shadow_RX = bytearray(NUM_CONFIG_REGS)
+profile_RX = None       # burst blobs of the running profile (setup_RX)
+
+#================ FSCAL CACHE =============
+
+# Synthesizer calibration results per channel, keyed by the FREQ2..0
+# word. With autocalibration off (set_autocal_RX) retunes write them back
+# with the frequency and SRX only waits for the synthesizer to settle,
+# skipping the ~720 us calibration. Calibrations are taken at the current
+# temperature: clear the cache after large temperature changes.
+fscal_cache = {}
+autocal_RX = True
+_fscal = bytearray(3)
 
 #================ FUNCTIONS =============
 
 #-------------- setup functions --------------
 
-def setup_RX(spi, CS, Pin_interrupt):
+def setup_RX(spi, CS, Pin_interrupt, blobs=None):
+    """
+    Reset and configure the radio with blobs (a stored profile, see
+    profile_store.py), else the precompiled or runtime-compiled profile.
+    """
+    global _rx_spi, _rx_cs, profile_RX, autocal_RX
+    _rx_spi = spi
+    _rx_cs = CS
     write_strobe_RX(spi, CS, SRES)
     time.sleep_us(100)
     write_strobe_RX(spi, CS, SIDLE)
+    sync_shadow_RX(spi, CS)
     
-    write_register_RX(spi, CS, cc2500_receiver_settings)
+    profile_RX = blobs
+    if profile_RX is None:
+        profile_RX = compiled_profile_RX(rx_profile)
+    if profile_RX is None:
+        profile_RX = compile_profile_RX()
+    write_burst_RX(spi, CS, profile_RX)
+    autocal_RX = bool(shadow_RX[0x18] & MCSM0_AUTOCAL)
     if (config_prints):
         print("set spi config  RX:")
-        print([f"0x{byte:02X}" for pair in cc2500_receiver_settings for byte in pair])
-        print(cc2500_receiver_settings)
+        print([f"0x{byte:02X}" for blob in profile_RX for byte in blob])
+        print(regcalc.achieved(shadow_RX))
     set_irq_RX(Pin_interrupt)
-    set_frequency_RX(spi, CS, f_carrier + CARRIER_FEQ)
-    set_freq_deviation_RX(spi, CS, f_dev)
-    set_datarate_RX(spi, CS, r_data)
-    set_filter_bandwidth_RX(spi, CS, bw)
-    write_register_RX(spi, CS, [[0x10,0x0B]])
+
+def compiled_profile_RX(name):
+    """
+    Burst blobs of a profile from profiles.py, or None if it is missing or
+    was compiled for other values than the ones configured above.
+    """
+    entry = profiles.RX_PROFILES.get(name)
+    if entry is None or entry[1] != (f_carrier + CARRIER_FEQ, f_dev, r_data, bw):
+        return None
+    return entry[0]
+
+def compile_profile_RX():
+    """
+    Fallback when profiles.py is stale: stage the profile in shadow_RX
+    with the runtime formulas and return its burst blobs.
+    """
+    return regcalc.compile_rx(f_carrier + CARRIER_FEQ, f_dev, r_data, bw, shadow_RX)
+
+def load_profile_RX(spi, CS, name):
+    """Switch the radio to another precompiled profile"""
+    global profile_RX
+    blobs = profiles.RX_PROFILES[name][0]
+    write_strobe_RX(spi, CS, SIDLE)
+    write_burst_RX(spi, CS, blobs)
+    profile_RX = blobs
 
 def interrupt_handler_RX(Pin):
-    global event
-    event = "reception"
+    # Hard IRQ: no allocation here, just timestamp and hand off the drain.
+    global _irq_ticks, _drain_pending, ring_sched_failed
+    _irq_ticks = time.ticks_us()
+    if not _drain_pending:
+        if events.schedule(_drain_ref):
+            _drain_pending = True
+        else:
+            ring_sched_failed += 1
     
 def set_irq_RX(Pin_interrupt):
+    global _rx_gdo0
     interrupt_pin = machine.Pin(Pin_interrupt, mode=Pin.IN)
-    interrupt_pin.irq(trigger=Pin.IRQ_FALLING,handler=interrupt_handler_RX)
+    interrupt_pin.irq(trigger=Pin.IRQ_FALLING,handler=interrupt_handler_RX,hard=True)
+    _rx_gdo0 = interrupt_pin
+
+#-------------- packet ring functions --------------
+
+def drain_FIFO_RX(arg):
+    """Scheduled from the GDO0 IRQ: move the received packets into the ring"""
+    global _drain_pending, crc_dropped
+    _drain_pending = False
+    spi = _rx_spi
+    CS = _rx_cs
+    if spi is None:
+        return
+    if spibus.busy():
+        # Interrupted a transaction on SPI1, run again once it ends
+        spibus.defer(_drain_ref)
+        return
+    n = read_packet_RX(spi, CS, ring_views[ring_head])
+    while n > 0:
+        if drop_bad_crc and not ring_buf[ring_head][n - 1] & 0x80:
+            # Slot not published: the next frame overwrites it
+            crc_dropped += 1
+        else:
+            ring_commit(_irq_ticks)
+        if not rx_stay:
+            break
+        n = read_packet_RX(spi, CS, ring_views[ring_head])
+    # In stay mode the receiver keeps listening; re-arm it only after an
+    # overflow, or after every packet when MCSM1 returns it to IDLE
+    if n < 0 or not rx_stay:
+        start_listen_RX(spi, CS)
+
+def ring_commit(ticks):
+    """Publish the slot at ring_head, or count a drop if the ring is full"""
+    global ring_head, ring_count_total, ring_dropped
+    if ring_count() < RING_SIZE - 1:
+        ring_ticks[ring_head] = ticks
+        ring_head = (ring_head + 1) % RING_SIZE
+        ring_count_total += 1
+        events.post(events.RX_PACKET)
+    else:
+        ring_dropped += 1
+
+_drain_ref = drain_FIFO_RX
+
+def ring_count():
+    return (ring_head - ring_tail) % RING_SIZE
+
+def ring_pop(message):
+    """Decode the oldest ring slot into message, or return None if empty"""
+    global ring_tail
+    if ring_head == ring_tail:
+        return None
+    parse_packet_RX(ring_buf[ring_tail], message)
+    message.ticks = ring_ticks[ring_tail]
+    ring_tail = (ring_tail + 1) % RING_SIZE
+    return message
 
 #-------------- radio config functions --------------
     
 def set_datarate_RX(spi, CS, r_data):
     write_strobe_RX(spi, CS, SIDLE)
-    drate_e = int(math.log2((r_data * (1 << 20)) / F_XOSC))
-    drate_m = int((r_data * (1<<28)) / (F_XOSC * (1 << drate_e)) - 256.0)
-    r_data_calculated = int(((256.0 + drate_m) * (1<<drate_e) * F_XOSC) / (1<<28)) 
-    mdmcfg3 = read_register_RX(spi, CS, 0x10)[0];
-    msg = [[0x10, (mdmcfg3 & 0xf0) + (drate_e & 0x0f)], [0x11, drate_m]]
-    write_register_RX(spi, CS, msg)
-    if (config_prints):
-        print(f"set RX r_data : [{drate_e} {drate_m}] {r_data_calculated}")
-        print("\nset_datarate RX")
-        print([f"0x{byte:02X}" for pair in msg for byte in pair])
-        print(msg)
+    write_register_RX(spi, CS, datarate_regs_RX(r_data))
+
+def datarate_regs_RX(r_data):
+    return print_regs_RX("set_datarate RX", regcalc.datarate_regs(shadow_RX, r_data))
 
 def set_filter_bandwidth_RX(spi, CS, bw):
     write_strobe_RX(spi, CS, SIDLE)
-    chanbw_e = int(math.log2(F_XOSC / ((1<<5) * bw) / math.log2(2.0)))
-    chanbw_m = int(F_XOSC / (8.0 * bw * (1<<chanbw_e)) - 4.0)
-    bw_calculated = int(F_XOSC / (8.0 * (4.0 + chanbw_m) * (1<<chanbw_e)))
-    mdmcfg3 = read_register_RX(spi, CS, 0x10)[0];
-    msg = [[0x10, ((chanbw_e & 0x03)<<6) + ((chanbw_m & 0x03)<<4) + (mdmcfg3 & 0x0f)]]
-    write_register_RX(spi, CS, msg)
-    if (config_prints):
-        print(f"set RX bw: [{chanbw_e} {chanbw_m}] {bw_calculated}")
-        print("\nset_filter_bandwidth RX")
-        print([f"0x{byte:02X}" for pair in msg for byte in pair])
-        print(msg)
+    write_register_RX(spi, CS, filter_bandwidth_regs_RX(bw))
+
+def filter_bandwidth_regs_RX(bw):
+    return print_regs_RX("set_filter_bandwidth RX", regcalc.filter_bandwidth_regs(shadow_RX, bw))
 
 def set_freq_deviation_RX(spi, CS, f_dev):
-    write_strobe_RX(spi, CS, SIDLE)  
-    deviation_e = int(math.log2(f_dev * (1<<14) / F_XOSC))
-    deviation_m = int(f_dev * (1<<17) / ((1<<deviation_e) * F_XOSC) - 8.0)
-    f_dev_calculated = int(F_XOSC * (8.0 + deviation_m + 1.0) * (1<<deviation_e) / (1<<17))
-    msg = [[0x15, ((deviation_e & 0x07)<<4) + (deviation_m & 0x07)]]
-    write_register_RX(spi, CS, msg)
-    if (config_prints):
-        print(f"set RX f_dev: [{deviation_e} {deviation_m}] {f_dev_calculated}")
-        print("\nset_frequency_deviation RX")
-        print([f"0x{byte:02X}" for pair in msg for byte in pair])
-        print(msg)
+    write_strobe_RX(spi, CS, SIDLE)
+    write_register_RX(spi, CS, freq_deviation_regs_RX(f_dev))
+
+def freq_deviation_regs_RX(f_dev):
+    return print_regs_RX("set_frequency_deviation RX", regcalc.freq_deviation_regs(shadow_RX, f_dev))
 
 def set_frequency_RX(spi, CS, frequency):
     write_strobe_RX(spi, CS, SIDLE)
-    freq = int(frequency * ((1<<16) / F_XOSC))
-    channel = 0
-    channspc_e = 0
-    channspc_m = int(((frequency * (1 << 16)) / F_XOSC - freq - (1 << 6)) * (1 << 2))
-    frequency_calculated = int(F_XOSC * (freq + channel * (256 + channspc_m) / (1 << 2)) / (1 << 16))
-    #
-    mdmcfg1 = read_register_RX(spi, CS, 0x13)[0];
-    msg = [[0x0a, channel],
-           [0x0d, ((freq & 0x007f0000)>>16)],
-           [0x0e, ((freq & 0x0000ff00)>>8)],
-           [0x0f, (freq & 0x000000ff) - 1],
-           [0x13, (mdmcfg1 & 0xf0) + (channspc_e & 0X03) + 32],
-           [0x14, (channspc_m)]]
-    write_register_RX(spi, CS, msg)
+    write_register_RX(spi, CS, frequency_regs_RX(frequency))
+    if not autocal_RX:
+        write_register_RX(spi, CS, fscal_regs_RX(spi, CS, frequency))
+
+def freq_word_RX(data):
+    """FREQ2..0 word of frequency register pairs (cache key)"""
+    word = 0
+    for addr, value in data:
+        if 0x0D <= addr <= 0x0F:
+            word |= value << (8 * (0x0F - addr))
+    return word
+
+def calibrate_RX(spi, CS, frequency):
+    """
+    Tune to frequency, run a manual calibration (SCAL) and cache its
+    FSCAL3..FSCAL1. Leaves the radio in IDLE; returns the cached bytes.
+    """
+    write_strobe_RX(spi, CS, SIDLE)
+    data = regcalc.frequency_regs(shadow_RX, frequency)
+    write_register_RX(spi, CS, data)
+    write_strobe_RX(spi, CS, SCAL)
+    wait_state_RX(spi, CS, 0x01, CAL_TIMEOUT_US)
+    CS.value(0)
+    spi.readinto(_rx_header, FSCAL3 | 0xC0)     # burst read FSCAL3..FSCAL1
+    spi.readinto(_fscal, 0x00)
+    CS.value(1)
+    cal = bytes(_fscal)
+    fscal_cache[freq_word_RX(data)] = cal
+    return cal
+
+def wait_state_RX(spi, CS, state, timeout_us):
+    """Poll MARCSTATE until it reads state (0x01 IDLE, 0x0D RX); False on timeout"""
+    t0 = time.ticks_us()
+    while True:
+        CS.value(0)
+        spi.readinto(_rx_status, MARCSTATE | 0xC0)
+        CS.value(1)
+        if _rx_status[1] & 0x1F == state:
+            return True
+        if time.ticks_diff(time.ticks_us(), t0) > timeout_us:
+            return False
+
+def calibrate_channels_RX(spi, CS, frequencies):
+    """Calibrate every frequency once, then retune from the cache only"""
+    for frequency in frequencies:
+        calibrate_RX(spi, CS, frequency)
+    set_autocal_RX(spi, CS, False)
+
+def set_autocal_RX(spi, CS, on):
+    """MCSM0 FS_AUTOCAL: calibrate on every IDLE -> RX, or use fscal_cache"""
+    global autocal_RX
+    autocal_RX = bool(on)
+    mcsm0 = (shadow_RX[0x18] & ~MCSM0_AUTOCAL) | (0x10 if on else 0x00)
+    write_register_RX(spi, CS, [[0x18, mcsm0]])
+
+def fscal_regs_RX(spi, CS, frequency):
+    """
+    FSCAL3..FSCAL1 pairs for frequency from fscal_cache, calibrating the
+    channel first if it is new (the radio is then left tuned to it)
+    """
+    cal = fscal_cache.get(freq_word_RX(regcalc.frequency_regs(shadow_RX, frequency)))
+    if cal is None:
+        cal = calibrate_RX(spi, CS, frequency)
+    return [[FSCAL3, cal[0]], [FSCAL3 + 1, cal[1]], [FSCAL3 + 2, cal[2]]]
+
+def hop_blobs_RX(frequency):
+    """
+    Burst blobs retuning to frequency for hop_RX: FREQ2..0, plus the
+    cached FSCAL3..FSCAL1 when autocalibration is off.
+    """
+    data = [pair for pair in regcalc.frequency_regs(shadow_RX, frequency) if 0x0D <= pair[0] <= 0x0F]
+    if not autocal_RX:
+        data += fscal_regs_RX(_rx_spi, _rx_cs, frequency)
+    return [bytes(blob) for blob in regcalc.compile_burst(shadow_RX, data, 0)]
+
+def frequency_regs_RX(frequency):
+    return print_regs_RX("set_frequency RX", regcalc.frequency_regs(shadow_RX, frequency))
+
+def print_regs_RX(title, msg):
     if (config_prints):
-        print(f"set RX frequency [{freq} {channel} {channspc_e} {channspc_m}] {frequency_calculated}")
-        print("\nset_frequency RX")
+        print("\n" + title)
         print([f"0x{byte:02X}" for pair in msg for byte in pair])
         print(msg)
+    return msg
 
 def bytes_to_utf8_string(byte_data):
-    utf8_string = ""
-    i = 0
-    while i < len(byte_data):
-        byte = byte_data[i]
-        if byte <= 0x7F:
-            utf8_string += chr(byte)
-            i += 1
-        elif 0xC0 <= byte <= 0xDF and i + 1 < len(byte_data) and 0x80 <= byte_data[i+1] <= 0xBF:
-            utf8_string += chr((byte & 0x1F) << 6 | (byte_data[i+1] & 0x3F))
-            i += 2
-        elif 0xE0 <= byte <= 0xEF and i + 2 < len(byte_data) and all(0x80 <= byte_data[i+j] <= 0xBF for j in range(1, 3)):
-            utf8_string += chr((byte & 0x0F) << 12 | (byte_data[i+1] & 0x3F) << 6 | (byte_data[i+2] & 0x3F))
-            i += 3
-        elif 0xF0 <= byte <= 0xF7 and i + 3 < len(byte_data) and all(0x80 <= byte_data[i+j] <= 0xBF for j in range(1, 4)):
-            utf8_string += chr((byte & 0x07) << 18 | (byte_data[i+1] & 0x3F) << 12 | (byte_data[i+2] & 0x3F) << 6 | (byte_data[i+3] & 0x3F))
-            i += 4
-        else:
-            i += 1
-    return utf8_string
+    return payload.decode_utf8(byte_data, 0, len(byte_data))
 
-    
-def decode_packet_RX(spi,CS,RX_BUFFER_SIZE,message):
+
+def read_packet_RX(spi, CS, views):
+    """
+    Burst-read one raw FIFO frame (length, payload, RSSI, LQI) into the
+    buffer behind views (see frame_views), without allocating.
+    Returns the number of bytes read, 0 if the FIFO holds no complete
+    frame and -1 on overflow or a corrupt length byte (the FIFO must then
+    be flushed).
+    """
     CS.value(0)
-    tmp_buf = spi.read(2,0xFB)
+    spi.readinto(_rx_status, 0xFB)      # RXBYTES
     CS.value(1)
-    message.overflow = bool(tmp_buf[1] & 0x80)
-    if(not message.overflow):
-        size = (tmp_buf[1] & 0x7F) - 2
-        CS.value(0)
-        tmp_buf = spi.read(1,0xFF)
-        #buf = spi.read(min(min(size,62),RX_BUFFER_SIZE),0xFF)
-        buf = spi.read(62,0xFF)
-        tmp_buf = spi.read(2,0xFF)
+    avail = _rx_status[1]
+    if avail & 0x80:
+        return -1
+    if avail < 3:
+        return 0
+    # GDO0 high: a packet is arriving behind the complete frames and its
+    # length byte may be next. Leave the FIFO to the drain on its falling
+    # edge. GDO0 low after the RXBYTES read means avail was stable.
+    if _rx_gdo0 is not None and _rx_gdo0.value():
+        return 0
+    length_view = views[0]
+    CS.value(0)
+    spi.readinto(_rx_header, 0xFF)      # burst RX FIFO header
+    spi.readinto(length_view, 0xFF)
+    n = length_view[0]
+    if n + 3 > avail or n + 1 >= len(views):
         CS.value(1)
-        
-        #Fill the message Class
-        message.CRC_check = bool(tmp_buf[1] & 0x80)
-        message.link_quality_indicator = (tmp_buf[1] & 0X7F)
-        
-        if(buf[0] >= 128):
-            message.RSSI = (tmp_buf[0] - 256)/2 - 70
-        else:
-            message.RSSI = (tmp_buf[0])/2 - 70
-            
-        message.length = int(buf[0]) 
-        message.sequence = int(buf[1])
-        message.data = bytes_to_utf8_string(buf[2:message.length + 1])
+        return -1
+    spi.readinto(views[n + 1], 0xFF)    # payload + RSSI + LQI
+    CS.value(1)
+    return n + 3
+
+def parse_packet_RX(buf, message):
+    """Fill message from a raw frame stored by read_packet_RX"""
+    message.overflow = False
+    message.length = int(buf[0])
+    message.sequence = int(buf[1])
+    rssi = buf[message.length + 1]
+    status = buf[message.length + 2]
+    message.CRC_check = bool(status & 0x80)
+    message.link_quality_indicator = (status & 0X7F)
+    if(rssi >= 128):
+        message.RSSI = (rssi - 256)/2 - 70
+    else:
+        message.RSSI = (rssi)/2 - 70
+    if decode_text:
+        message.data = payload.decode_utf8(buf, 2, message.length + 1)
+    else:
+        message.data = bytes(memoryview(buf)[2:message.length + 1])
+    return(message)
+    
+def decode_packet_RX(spi,CS,RX_BUFFER_SIZE,message):
+    n = read_packet_RX(spi, CS, _rx_views)
+    message.overflow = n < 0
+    if(n > 0):
+        parse_packet_RX(_rx_buf, message)
     return(message)
 
+class FrameCount:
+    """Polled frames: received, CRC-good, lost to sequence gaps, sums for the means"""
+    def __init__(self):
+        self.got = 0
+        self.ok = 0
+        self.lost = 0
+        self.rssi = 0       # RSSI sum, every frame
+        self.lqi = 0        # LQI sum, CRC-good frames
+        self.last = None    # sequence byte of the last CRC-good frame
+        self.bad_run = 0    # CRC-failed frames since then
+
+    def add(self, message):
+        self.got += 1
+        self.rssi += message.RSSI
+        if not message.CRC_check:
+            # Its sequence byte is not trusted; it fills a slot of the next gap
+            self.bad_run += 1
+            return
+        self.ok += 1
+        self.lqi += message.link_quality_indicator
+        if self.last is not None:
+            self.lost += max(0, ((message.sequence - self.last - 1) & 0xFF) - self.bad_run)
+        self.last = message.sequence
+        self.bad_run = 0
+
+def poll_RX(spi, CS, window_ms, packets=0):
+    """
+    With the GDO0 IRQ off and the radio in listen_RX: poll
+    decode_packet_RX for window_ms, or until packets frames arrived.
+    Returns a FrameCount.
+    """
+    count = FrameCount()
+    message = Message()
+    start = time.ticks_ms()
+    while (not packets or count.got < packets) and time.ticks_diff(time.ticks_ms(), start) < window_ms:
+        message.length = 0
+        decode_packet_RX(spi, CS, RX_BUFFER_SIZE, message)
+        if message.overflow:
+            listen_RX(spi, CS)
+            continue
+        if not message.length:
+            time.sleep_us(500)
+            continue
+        count.add(message)
+    return count
+
 #-------------- SPI functions --------------
 
 def write_strobe_RX(spi, CS, data):
@@ -245,13 +497,33 @@ def write_strobe_RX(spi, CS, data):
     CS.value(1)
 
 def write_register_RX(spi, CS, data):
-    msg = bytearray()
+    write_burst_RX(spi, CS, compile_burst_RX(data, 0))
+
+def stage_RX(data):
+    """Apply [address, value] pairs to shadow_RX only, return data"""
+    return regcalc.stage(shadow_RX, data)
+
+def compile_burst_RX(data, max_gap=regcalc.BURST_MAX_GAP):
+    """Burst blobs for data, gaps filled from shadow_RX (see regcalc)"""
+    return regcalc.compile_burst(shadow_RX, data, max_gap)
+
+def write_burst_RX(spi, CS, blobs):
+    """Send blobs from compile_burst_RX, one CS window each"""
+    for blob in blobs:
+        CS.value(0)
+        spi.write(blob)
+        CS.value(1)
+        addr = blob[0] & 0x3F
+        for i in range(1, len(blob)):
+            if addr < NUM_CONFIG_REGS:
+                shadow_RX[addr] = blob[i]
+            addr += 1
+
+def sync_shadow_RX(spi, CS):
+    """Burst-read every configuration register into shadow_RX"""
     CS.value(0)
-    for i in range(len(data)):
-        msg.append(data[i][0])
-        msg.append(data[i][1])
-        spi.write(msg)
-        msg = bytearray()
+    spi.readinto(_rx_header, 0xC0)      # burst read from 0x00
+    spi.readinto(shadow_RX, 0x00)
     CS.value(1)
 
 def read_register_RX(spi, CS, address):
@@ -262,13 +534,52 @@ def read_register_RX(spi, CS, address):
     msg = [b for b in buf]
     return (msg)
         
+def listen_RX(spi, CS, keep_bad_crc=True):
+    """
+    Flush the FIFO and enter RX, staying in RX between packets. Frames
+    queue up in the FIFO, where CRC_AUTOFLUSH would flush the good ones
+    before a bad one too (the datasheet allows it with one packet in the
+    FIFO only), so it stays off; keep_bad_crc=False makes the drain drop
+    frames with a failed CRC itself.
+    """
+    global drop_bad_crc
+    write_strobe_RX(spi, CS, SIDLE)
+    write_register_RX(spi, CS, [[0x07, PKTCTRL1_STATUS], [0x17, MCSM1_RX_STAY]])
+    drop_bad_crc = not keep_bad_crc
+    write_strobe_RX(spi, CS, SFRX)
+    write_strobe_RX(spi, CS, SRX)
+
 def start_listen_RX(spi, CS):
+    """Flush the FIFO and enter RX for the drain, in the rx_stay mode"""
+    global drop_bad_crc
+    if rx_stay:
+        listen_RX(spi, CS, keep_bad_crc=False)
+        return
     write_strobe_RX(spi, CS, SIDLE)
-    msg = [[0x17, 0x00]]   #after receiving a packet, return to idle
-    write_register_RX(spi, CS, msg)
+    write_register_RX(spi, CS, [[0x07, PKTCTRL1_STATUS], [0x17, MCSM1_RX_IDLE]])
+    drop_bad_crc = False
     write_strobe_RX(spi, CS, SFRX)
     write_strobe_RX(spi, CS, SRX)
     
+def hop_RX(blobs):
+    """
+    Retune to burst blobs from hop_blobs_RX, precompiled by
+    carrier.hop_plan. Runs from the carrier's hop timer IRQ, so nothing
+    here allocates. With autocalibration on the radio recalibrates on the
+    way back to RX; otherwise the blobs carry the cached FSCAL values.
+    """
+    spi = _rx_spi
+    CS = _rx_cs
+    if spi is None:
+        return
+    CS.value(0)
+    spi.write(_SIDLE_CMD)
+    CS.value(1)
+    write_burst_RX(spi, CS, blobs)
+    CS.value(0)
+    spi.write(_SRX_CMD)
+    CS.value(1)
+
 def stop_listen_RX(spi, CS):
     write_strobe_RX(spi, CS, SIDLE)
 
@@ -306,9 +617,22 @@ def print_registers_RX(spi, CS):
         time.sleep_ms(1)
         print(f"{{.address = 0x{r:02X}, .value = 0x{buf[1]:02X}}},")
         
+def dummy_packet_push(seq):
+    # Empty-payload frame with CRC OK; main.py fills in the demo text.
+    # Demo only (main.DEMO_MESSAGES): it goes through the real ring.
+    buf = ring_buf[ring_head]
+    buf[0] = 1
+    buf[1] = seq & 0xFF
+    buf[2] = 0
+    buf[3] = 0x80
+    ring_commit(time.ticks_us())
+
 def dummy_event_update(timer):
-    global event_RX
-    event_RX = "reception"
+    global dummy_seq
+    dummy_seq += 1
+    events.schedule(dummy_packet_push, dummy_seq)
+
+dummy_seq = 0
 
 def dummy_message_generator():
     tim = Timer()
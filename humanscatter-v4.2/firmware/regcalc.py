@@ -0,0 +1,141 @@
+import math
+
+#================ CC2500 REGISTER MATH =============
+
+# Pure register arithmetic shared by receiver.py and the host-side
+# tools/compile_profile.py. No hardware imports, so it runs on CPython.
+# Register pairs are [address, value]; an "image" is a bytearray of the
+# 47 configuration registers that bit merges read from.
+
+F_XOSC = 26000000
+NUM_CONFIG_REGS = 0x2F
+
+# Register gaps up to this size are bridged with image values so that a
+# profile loads in a few burst writes instead of one write per register.
+BURST_MAX_GAP = 3
+
+# Reset values of 0x00 IOCFG2 .. 0x2E TEST0 (CC2500 datasheet)
+CC2500_RESET = bytes([
+    0x29, 0x2E, 0x3F, 0x07, 0xD3, 0x91, 0xFF, 0x04,
+    0x45, 0x00, 0x00, 0x0F, 0x00, 0x5E, 0xC4, 0xEC,
+    0x8C, 0x22, 0x02, 0x22, 0xF8, 0x47, 0x07, 0x30,
+    0x04, 0x36, 0x6C, 0x03, 0x40, 0x91, 0x87, 0x6B,
+    0xF8, 0x56, 0x10, 0xA9, 0x0A, 0x20, 0x0D, 0x41,
+    0x00, 0x59, 0x7F, 0x3F, 0x88, 0x31, 0x0B,
+])
+
+# Registers
+cc2500_receiver_settings=[[0x02, 0x06],
+                          [0x08, 0x05],
+                          [0x0b, 0x0A],
+                          [0x0e, 0x7C],
+                          [0x0f, 0x08],
+                          [0x10, 0x0B],
+                          [0x11, 0xF1],
+                          [0x12, 0x03],
+                          [0x13, 0x23],
+                          [0x14, 0xFF],
+                          [0x15, 0x76],
+                          [0x18, 0x18],
+                          [0x19, 0x1D],
+                          [0x1a, 0x1C],
+                          [0x1b, 0xC7],
+                          [0x1c, 0x00],
+                          [0x1d, 0xB0],
+                          [0x21, 0xB6],
+                          [0x25, 0x00],
+                          [0x26, 0x11]]
+
+#-------------- parameter -> register pairs --------------
+
+def datarate_regs(image, r_data):
+    drate_e = int(math.log2((r_data * (1 << 20)) / F_XOSC))
+    drate_m = int((r_data * (1<<28)) / (F_XOSC * (1 << drate_e)) - 256.0)
+    mdmcfg4 = image[0x10]
+    return [[0x10, (mdmcfg4 & 0xf0) | (drate_e & 0x0f)], [0x11, drate_m & 0xff]]
+
+def filter_bandwidth_regs(image, bw):
+    chanbw_e = int(math.log2(F_XOSC / ((1<<5) * bw) / math.log2(2.0)))
+    chanbw_m = int(F_XOSC / (8.0 * bw * (1<<chanbw_e)) - 4.0)
+    mdmcfg4 = image[0x10]
+    return [[0x10, ((chanbw_e & 0x03)<<6) | ((chanbw_m & 0x03)<<4) | (mdmcfg4 & 0x0f)]]
+
+def freq_deviation_regs(image, f_dev):
+    deviation_e = int(math.log2(f_dev * (1<<14) / F_XOSC))
+    deviation_m = int(f_dev * (1<<17) / ((1<<deviation_e) * F_XOSC) - 8.0)
+    return [[0x15, ((deviation_e & 0x07)<<4) + (deviation_m & 0x07)]]
+
+def frequency_regs(image, frequency):
+    freq = int(frequency * ((1<<16) / F_XOSC))
+    channel = 0
+    channspc_e = 0
+    channspc_m = int(((frequency * (1 << 16)) / F_XOSC - freq - (1 << 6)) * (1 << 2))
+    mdmcfg1 = image[0x13]
+    return [[0x0a, channel],
+            [0x0d, ((freq & 0x007f0000)>>16)],
+            [0x0e, ((freq & 0x0000ff00)>>8)],
+            [0x0f, ((freq & 0x000000ff) - 1) & 0xff],
+            [0x13, (mdmcfg1 & 0xf0) | 0x20 | (channspc_e & 0X03)],
+            [0x14, channspc_m & 0xff]]
+
+#-------------- register image -> achieved values --------------
+
+def achieved(image):
+    """Frequency, deviation, data rate and bandwidth an image really gives"""
+    freq = (image[0x0d] << 16) | (image[0x0e] << 8) | image[0x0f]
+    spacing = F_XOSC / (1 << 18) * (256 + image[0x14]) * (1 << (image[0x13] & 0x03))
+    mdmcfg4 = image[0x10]
+    dev = image[0x15]
+    return {
+        "frequency": int(F_XOSC * freq / (1 << 16) + image[0x0a] * spacing),
+        "deviation": int(F_XOSC * (8 + (dev & 0x07)) * (1 << ((dev >> 4) & 0x07)) / (1 << 17)),
+        "datarate": int((256 + image[0x11]) * (1 << (mdmcfg4 & 0x0f)) * F_XOSC / (1 << 28)),
+        "bandwidth": int(F_XOSC / (8 * (4 + ((mdmcfg4 >> 4) & 0x03)) * (1 << (mdmcfg4 >> 6)))),
+    }
+
+#-------------- profiles and burst blobs --------------
+
+def stage(image, data):
+    """Apply [address, value] pairs to image, return data"""
+    for pair in data:
+        if pair[0] < NUM_CONFIG_REGS:
+            image[pair[0]] = pair[1] & 0xFF
+    return data
+
+def compile_burst(image, data, max_gap=BURST_MAX_GAP):
+    """
+    Turn [address, value] pairs into burst write blobs (address | 0x40
+    followed by the values) over contiguous address ranges. Gaps of up to
+    max_gap registers are filled from image.
+    """
+    values = {}
+    for pair in data:
+        values[pair[0]] = pair[1] & 0xFF
+    blobs = []
+    blob = None
+    last = -2
+    for addr in sorted(values):
+        if blob is not None and addr - last - 1 <= max_gap and addr < NUM_CONFIG_REGS:
+            for gap in range(last + 1, addr):
+                blob.append(image[gap])
+        else:
+            blob = bytearray([addr | 0x40])
+            blobs.append(blob)
+        blob.append(values[addr])
+        last = addr
+    return blobs
+
+def compile_rx(frequency, f_dev, r_data, bw, image=None):
+    """
+    Stage a full receiver profile in image (reset values if None) and
+    return its burst blobs.
+    """
+    if image is None:
+        image = bytearray(CC2500_RESET)
+    msg = []
+    msg += stage(image, cc2500_receiver_settings)
+    msg += stage(image, frequency_regs(image, frequency))
+    msg += stage(image, freq_deviation_regs(image, f_dev))
+    msg += stage(image, datarate_regs(image, r_data))
+    msg += stage(image, filter_bandwidth_regs(image, bw))
+    return compile_burst(image, msg)
@@ -0,0 +1,93 @@
+import _thread
+import time
+import display
+import ui
+
+#================ CORE 1 RENDERER =============
+
+# The display is drawn on core 1 (a plain thread on the host). The worker
+# creates the PicoGraphics instance, plays the boot animation if asked,
+# then applies one screen command at a time to the retained ui.Screen,
+# which pushes only the widgets that changed; nothing on core 0 touches
+# the display. The Pico Display sits on SPI0, so core 1 never competes with
+# the radios on SPI1, and IRQs and scheduled callbacks stay on core 0.
+#
+# post() leaves the command in a one-slot mailbox guarded by a lock. A
+# command the worker has not taken yet is replaced by the next one
+# (counted in coalesced): every command is a full screen, so only the
+# newest is worth drawing.
+
+WAITING = 1     # "message pending"
+MESSAGE = 2     # arg: receiver.Message, not changed after post()
+TIMEOUT = 3     # carrier timeout page, over the whole screen
+
+running = False
+failed = None   # exception that stopped the worker
+posted = 0
+drawn = 0
+coalesced = 0
+errors = 0
+busy_us = 0     # core 1 time spent drawing
+screen = None   # ui.Screen of the worker
+
+_lock = _thread.allocate_lock()     # guards the mailbox
+_ready = _thread.allocate_lock()    # held while the mailbox is empty
+_ready.acquire()
+_cmd = 0
+_arg = None
+
+def start(animate=True):
+    """Start the worker; it draws the boot animation before any command"""
+    global running
+    if not running:
+        running = True
+        _thread.start_new_thread(_worker, (animate,))
+
+def post(cmd, arg=None):
+    """Hand a screen to core 1 without waiting for it to be drawn"""
+    global _cmd, _arg, posted, coalesced
+    _lock.acquire()
+    if _cmd:
+        coalesced += 1
+    _cmd = cmd
+    _arg = arg
+    posted += 1
+    if _ready.locked():
+        _ready.release()
+    _lock.release()
+
+def _worker(animate):
+    global _cmd, _arg, running, failed, drawn, errors, busy_us, screen
+    try:
+        disp, color = display.setup_screen(animate)
+        screen = ui.Screen(disp, color)
+    except Exception as e:
+        failed = e
+        running = False
+        return
+    while True:
+        _ready.acquire()
+        _lock.acquire()
+        cmd = _cmd
+        arg = _arg
+        _cmd = 0
+        _arg = None
+        _lock.release()
+        if not cmd:
+            continue
+        t0 = time.ticks_us()
+        try:
+            if cmd == MESSAGE:
+                screen.message(arg)
+                screen.flush()
+            elif cmd == WAITING:
+                screen.waiting()
+                screen.flush()
+            elif cmd == TIMEOUT:
+                display.print_carrier_timeout(disp, color)
+                screen.invalidate()
+            drawn += 1
+        except Exception as e:
+            errors += 1
+            failed = e
+        busy_us += time.ticks_diff(time.ticks_us(), t0)
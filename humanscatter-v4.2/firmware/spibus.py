@@ -0,0 +1,101 @@
+import micropython
+from machine import Pin, SPI
+
+#================ SPI1 BUS =============
+
+# SPI1 is shared by the ADF4351 carrier (LE on GPIO9) and the CC2500
+# receiver (CS on GPIO22). This module owns the one SPI object; each chip
+# gets a Device with its own clock, mode and select pin, and the bus is
+# only reconfigured when a transaction starts on a different device.
+#
+# The receiver drains its FIFO from a scheduled callback and the carrier
+# hops from a timer IRQ; both can run between any two bytecodes of the
+# main loop. A callback that finds the bus in the middle of another
+# transaction calls defer() and is scheduled again once it ends.
+
+PIN_SCK = 10
+PIN_MOSI = 11
+PIN_MISO = 8
+
+spi = SPI(
+    1,
+    baudrate=1_000_000,
+    polarity=0,
+    phase=0,
+    bits=8,
+    firstbit=SPI.MSB,
+    sck=Pin(PIN_SCK),
+    mosi=Pin(PIN_MOSI),
+    miso=Pin(PIN_MISO)
+)
+
+config = (1_000_000, 0, 0)  # (baudrate, polarity, phase) SPI1 is set to
+owner = None                # Device whose select pin is asserted
+deferred = [None] * 4       # callbacks waiting for the bus (IRQ safe, no allocation)
+reconfigs = 0
+
+class Device:
+    """
+    One chip on SPI1. select()/deselect() frame a transaction; value()
+    does the same with Pin semantics (0 = selected), so code written for
+    an (spi, CS) pair can take a Device for both.
+    """
+    def __init__(self, cs_pin, baudrate, polarity=0, phase=0):
+        self.cs = Pin(cs_pin, Pin.OUT)
+        self.cs.value(1)    # Active low
+        self.config = (baudrate, polarity, phase)
+
+    def select(self):
+        global owner, config, reconfigs
+        owner = self        # first, so an IRQ from here on sees the bus busy
+        if config != self.config:
+            config = self.config
+            spi.init(baudrate=config[0], polarity=config[1], phase=config[2])
+            reconfigs += 1
+        self.cs.value(0)
+
+    def deselect(self):
+        global owner
+        self.cs.value(1)
+        owner = None
+        for i in range(len(deferred)):
+            fn = deferred[i]
+            if fn is not None:
+                deferred[i] = None
+                try:
+                    micropython.schedule(fn, 0)
+                except RuntimeError:
+                    pass    # queue full: dropped, as for a missed IRQ
+
+    def value(self, v):
+        if v:
+            self.deselect()
+        else:
+            self.select()
+
+    def write(self, buf):
+        spi.write(buf)
+
+    def read(self, nbytes, write=0x00):
+        return spi.read(nbytes, write)
+
+    def readinto(self, buf, write=0x00):
+        spi.readinto(buf, write)
+
+    def write_readinto(self, write_buf, read_buf):
+        spi.write_readinto(write_buf, read_buf)
+
+def busy():
+    """True while a transaction is open on any device"""
+    return owner is not None
+
+def defer(fn):
+    """Schedule fn(0) when the open transaction ends (once per fn)"""
+    free = -1
+    for i in range(len(deferred)):
+        if deferred[i] is fn:
+            return
+        if deferred[i] is None and free < 0:
+            free = i
+    if free >= 0:
+        deferred[free] = fn
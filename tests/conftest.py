@@ -0,0 +1,44 @@
+"""Host tests of the firmware, run with ``python -m pytest tests``.
+
+Pure-math modules (regcalc.py, pllcalc.py) are imported from each
+firmware tree as they are; modules that touch the hardware run on
+tools/hostsim.
+"""
+
+import glob
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import hostsim  # noqa: E402
+
+FIRMWARE_DIRS = sorted(glob.glob(os.path.join(ROOT, "humanscatter-v4.*", "firmware")))
+
+
+@pytest.fixture(params=FIRMWARE_DIRS, ids=lambda d: os.path.basename(os.path.dirname(d)))
+def firmware_dir(request):
+    return request.param
+
+
+def load(firmware_dir, name):
+    """Import module name fresh from firmware_dir, without the simulator"""
+    sys.path.insert(0, firmware_dir)
+    try:
+        sys.modules.pop(name, None)
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(firmware_dir)
+
+
+@pytest.fixture
+def board(firmware_dir):
+    """A fresh simulated reader with firmware_dir first on the import path"""
+    b = hostsim.install()
+    hostsim.use_firmware(firmware_dir)
+    yield b
+    hostsim.forget_firmware(firmware_dir)
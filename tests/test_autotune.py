@@ -0,0 +1,51 @@
+"""Receiver autotuner sweeps (user-019)."""
+
+import importlib
+import os
+
+WINDOW_MS = 60
+
+
+def start(board, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)     # profile_store writes to the working directory
+    carrier = importlib.import_module("carrier")
+    receiver = importlib.import_module("receiver")
+    assert carrier.setup_TX() >= 0
+    receiver.setup_RX(receiver.spi_rx, receiver.cs_rx, 2)
+    return importlib.import_module("autotune"), receiver
+
+
+def test_no_traffic_keeps_profile(board, monkeypatch, tmp_path):
+    autotune, receiver = start(board, monkeypatch, tmp_path)
+    before = {"f_carrier": receiver.f_carrier, "bw": receiver.bw, "f_dev": receiver.f_dev}
+    assert autotune.run(window_ms=WINDOW_MS) == before
+    assert (receiver.f_carrier, receiver.bw, receiver.f_dev) == tuple(before.values())
+    assert not os.path.exists(tmp_path / autotune.profile_store.STORE_FILE)
+
+
+def test_tag_heard_is_saved(board, monkeypatch, tmp_path):
+    autotune, receiver = start(board, monkeypatch, tmp_path)
+    board.cc2500.start_traffic(300, jitter=0.2)
+    best = autotune.run(window_ms=WINDOW_MS)
+    # Within one offset step of the tag (both are inside the filter)
+    assert abs(best["f_carrier"] - board.cc2500.tag.offset_hz) <= 100000
+    assert autotune.profile_store.names() == ["autotune"]
+
+
+def test_crc_failures_cost_score(board, monkeypatch, tmp_path):
+    autotune, receiver = start(board, monkeypatch, tmp_path)
+    assert autotune.score(30, 10, 200) < autotune.score(10, 10, 200)
+    # Offset sweep: the current value hears 10 good frames among 30, the
+    # next one (-200 kHz) the same 10 good frames alone; nothing else
+    counts = [(30, 10), (10, 10)]
+
+    def poll(spi, cs, window_ms, packets=0):
+        c = receiver.FrameCount()
+        c.got, c.ok = counts.pop(0) if counts else (0, 0)
+        c.lqi = 20 * c.ok
+        return c
+
+    monkeypatch.setattr(receiver, "poll_RX", poll)
+    offset = receiver.f_carrier
+    best = autotune.run(window_ms=WINDOW_MS)
+    assert best["f_carrier"] == offset + autotune.OFFSET_STEPS[0]
@@ -0,0 +1,21 @@
+"""Boot profile selection (user-025)."""
+
+import importlib
+
+
+def test_missing_file_boots_debug(board, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)     # the profile file is in the working directory
+    boot_profile = importlib.import_module("boot_profile")
+    assert boot_profile.load() == "debug"
+    assert boot_profile.delay_ms > 0 and boot_profile.led_test
+
+
+def test_selected_profile_used(board, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    boot_profile = importlib.import_module("boot_profile")
+    boot_profile.select("production")
+    assert boot_profile.load() == "production"
+    assert boot_profile.delay_ms == 0
+    with open(boot_profile.PROFILE_FILE, "w") as f:
+        f.write("bogus")
+    assert boot_profile.load() == "debug"
@@ -0,0 +1,59 @@
+"""Campaign packet accounting (user-016)."""
+
+import importlib
+
+PERIOD_US = 10000
+
+
+def test_crc_failed_frames_counted_once(board):
+    carrier = importlib.import_module("carrier")
+    receiver = importlib.import_module("receiver")
+    campaign = importlib.import_module("campaign")
+    spi, cs = receiver.spi_rx, receiver.cs_rx
+    assert carrier.setup_TX() >= 0
+    machine = importlib.import_module("machine")
+    receiver.setup_RX(spi, cs, campaign.GDO0_PIN)
+    machine.Pin(campaign.GDO0_PIN, machine.Pin.IN).irq(handler=None)     # polled, as run() does
+    receiver.listen_RX(spi, cs)
+    assert not board.cc2500.regs[0x07] & 0x08, "CRC autoflush drops the failed frames"
+
+    # Sequence 1..8: 3 and 6 fail their CRC, 5 is never heard
+    now = board.sim.now_us()
+    for seq in (1, 2, 3, 4, 6, 7, 8):
+        board.cc2500.send(bytes([seq]) + b"tag packet", crc_ok=seq not in (3, 6),
+                          at_us=now + seq * PERIOD_US)
+    c = receiver.poll_RX(spi, cs, 1000, 7)
+    got, lost, bad = c.got, c.lost, c.got - c.ok
+    assert (got, lost, bad) == (7, 1, 2)
+    assert "crc_flushed" not in [what for _, what in board.cc2500.packet_log]
+    # 3 of 8 packets were not received intact
+    assert (lost + bad) / (got + lost) == 3 / 8
+
+
+def test_run_restores_radios(board, monkeypatch, tmp_path):
+    carrier = importlib.import_module("carrier")
+    receiver = importlib.import_module("receiver")
+    campaign = importlib.import_module("campaign")
+    pllcalc = importlib.import_module("pllcalc")
+    spi, cs = receiver.spi_rx, receiver.cs_rx
+    assert carrier.setup_TX() >= 0
+    receiver.setup_RX(spi, cs, campaign.GDO0_PIN)
+    receiver.start_listen_RX(spi, cs)
+    assert carrier.rf_output(False)
+    regs = list(carrier.ADF4351_REGISTERS)
+    f_out = board.adf4351.output_frequency()
+    freq = [board.cc2500.regs[a] for a in (0x0D, 0x0E, 0x0F)]
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(campaign, "POINT_TIMEOUT_MS", 20)
+    off_grid = 2440000300
+    rows = campaign.run(channels=(off_grid,), levels=(3,))
+    # Rows and receiver tuning follow the frequency the PLL gives
+    assert rows[0][0] == pllcalc.solve(off_grid, pllcalc.SPACING_HZ, 25000000)["frequency"]
+    assert rows[0][0] != off_grid
+
+    assert carrier.ADF4351_REGISTERS == regs
+    assert board.adf4351.output_frequency() == f_out
+    assert not carrier.rf_on
+    assert not board.adf4351.regs[4] & carrier.RF_OUT_EN
+    assert [board.cc2500.regs[a] for a in (0x0D, 0x0E, 0x0F)] == freq
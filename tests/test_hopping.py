@@ -0,0 +1,89 @@
+"""Timer-driven carrier hopping from the precomputed table (user-012)."""
+
+import importlib
+
+import pytest
+
+CHANNELS = [2440000000, 2445000000, 2450000000, 2455000000, 2460000000]
+HOPS = 40
+
+
+def start(board, dwell_ms):
+    carrier = importlib.import_module("carrier")
+    receiver = importlib.import_module("receiver")
+    spi, cs = receiver.spi_rx, receiver.cs_rx
+    assert carrier.setup_TX() >= 0
+    receiver.setup_RX(spi, cs, 2)
+    receiver.start_listen_RX(spi, cs)
+    receiver.set_autocal_RX(spi, cs, False)
+    board.cc2500.track_carrier = True     # the tag backscatters the hopping carrier
+    board.cc2500.start_traffic(50, jitter=0.2)
+    carrier.start_hopping(CHANNELS, dwell_ms, rx_offset=receiver.f_carrier,
+                          rx_plan=receiver.hop_blobs_RX, rx_hook=receiver.hop_RX)
+    return carrier, receiver, len(board.adf4351.latches)
+
+
+def hop_times(board, first):
+    # 2450 MHz has FRAC = 0: hops to and from it also latch R2 (LDP)
+    latches = board.adf4351.latches[first:]
+    assert latches and all(reg in (0, 2) for _, reg, _ in latches), "a hop latched more than R2 and R0"
+    return [t for t, reg, _ in latches if reg == 0]
+
+
+def check_hops(board, carrier, times, dwell_ms, late_us):
+    dwell_us = dwell_ms * 1000
+    intervals = sorted(b - a for a, b in zip(times, times[1:]))
+    assert len(intervals) >= HOPS - 2
+    assert carrier.hop_count == len(times)
+    assert abs(intervals[len(intervals) // 2] - dwell_us) <= 100
+    # Board time is host time: a host stall can make a hop late, so allow
+    # a few intervals off the dwell
+    late = [i for i in intervals if abs(i - dwell_us) > late_us]
+    assert len(late) <= len(intervals) // 10, late
+    assert board.adf4351.garbage_latches == 0
+    # The receiver followed every hop: no packet missed for a wrong tuning
+    assert board.cc2500.received > 0 and board.cc2500.lost_tuning == 0
+
+
+@pytest.mark.parametrize("dwell_ms", [20, 100])
+def test_hop_timing(board, dwell_ms):
+    carrier, receiver, first = start(board, dwell_ms)
+    board.sim.run_until(board.sim.now_us() + (HOPS * dwell_ms + dwell_ms // 2) * 1000)
+    carrier.stop_hopping()
+    check_hops(board, carrier, hop_times(board, first), dwell_ms, 1000)
+    assert carrier.hop_deferred == 0
+
+
+def test_hops_deferred_while_spi1_busy(board):
+    # The main loop keeps SPI1 busy: hops wait for the end of its transaction
+    dwell_ms = 5
+    carrier, receiver, first = start(board, dwell_ms)
+    spi, cs = receiver.spi_rx, receiver.cs_rx
+    buf = bytearray(16)
+    end = board.sim.now_us() + (HOPS * dwell_ms + dwell_ms // 2) * 1000
+    while board.sim.now_us() < end:
+        cs.value(0)
+        spi.readinto(buf, 0xFF)
+        cs.value(1)
+    carrier.stop_hopping()
+    check_hops(board, carrier, hop_times(board, first), dwell_ms, 1000)
+    assert carrier.hop_deferred > 0
+
+
+def test_hops_keep_rf_output_off(board):
+    # 2440 and 2000 MHz use different output dividers, so every hop latches R4
+    carrier = importlib.import_module("carrier")
+    assert carrier.setup_TX() >= 0
+    assert carrier.rf_output(False)
+    first = len(board.adf4351.latches)
+    carrier.start_hopping([2440000000, 2000000000], 5)
+    board.sim.run_until(board.sim.now_us() + 52000)
+    carrier.stop_hopping()
+    r4 = [word for _, reg, word in board.adf4351.latches[first:] if reg == 4]
+    assert len(r4) >= 10
+    assert not any(word & carrier.RF_OUT_EN for word in r4), "a hop turned the RF output on"
+
+    # The gate words follow the divider of the channel hopped to
+    assert carrier.rf_output(True)
+    assert board.adf4351.regs[4] == carrier.ADF4351_REGISTERS[4] | carrier.RF_OUT_EN
+    assert board.adf4351.output_frequency() == pytest.approx(carrier.hop_channels[carrier.hop_index], abs=1)
@@ -0,0 +1,18 @@
+"""Joint carrier and receiver retune (user-018)."""
+
+import importlib
+
+
+def test_retune_records_achieved_carrier(board):
+    carrier = importlib.import_module("carrier")
+    receiver = importlib.import_module("receiver")
+    link = importlib.import_module("link")
+    assert carrier.setup_TX() >= 0
+    receiver.setup_RX(receiver.spi_rx, receiver.cs_rx, 2)
+    # Off the PLL grid: the achieved carrier differs from the request
+    requested = 2450000000 + link.pllcalc.SPACING_HZ // 3
+    f_tx, f_rx, _ = link.retune(requested)
+    assert f_tx != requested
+    assert receiver.CARRIER_FEQ == f_tx == board.adf4351.output_frequency()
+    # Recomputing the receiver plan from the stored values gives the same tuning
+    assert link.plan(receiver.CARRIER_FEQ, receiver.f_carrier)[3] == f_rx
@@ -0,0 +1,21 @@
+"""main.py hands real tag packets on unchanged (user-001)."""
+
+import contextlib
+import io
+import re
+
+import hostsim
+
+
+def test_tag_packets_reach_console_unchanged(board, firmware_dir):
+    board.cc2500.start_traffic(20)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        # production: no 3 s boot delay
+        hostsim.run_firmware(firmware_dir, seconds=1.5, files={"boot_profile.txt": "production"})
+    # Console lines: length | sequence | text | RSSI
+    lines = re.findall(r"^\d+ \| (\d+) \| (.*) \| (-?[\d.]+)$", out.getvalue(), re.M)
+    assert len(lines) >= 10
+    for seq, text, rssi in lines:
+        assert text == "tag packet %s" % seq
+        assert float(rssi) == -60.0
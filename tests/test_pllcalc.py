@@ -0,0 +1,125 @@
+"""ADF4351 fractional-N math (user-011) against the datasheet formulas."""
+
+import importlib
+import math
+import random
+from fractions import Fraction
+
+import pytest
+
+from conftest import load
+
+SPACINGS = (1000, 5000, 100000, 1000000)
+TARGETS_PER_SPACING = 3000
+
+
+def targets(pllcalc, n, seed):
+    # Log-uniform over the whole output range, both ends included
+    rng = random.Random(seed)
+    lo, hi = math.log(pllcalc.OUT_MIN), math.log(pllcalc.OUT_MAX)
+    out = [pllcalc.OUT_MIN, pllcalc.OUT_MAX, 2450000000, 2451000000]
+    out += [int(math.exp(rng.uniform(lo, hi))) for _ in range(n - len(out))]
+    return out
+
+
+def datasheet_rf_out(fields, ref):
+    # RF_OUT = (INT + FRAC/MOD) * REF_IN / R / RF divider
+    return Fraction((fields["int"] * fields["mod"] + fields["frac"]) * ref,
+                    fields["r"] * fields["mod"] * fields["div"])
+
+
+@pytest.fixture
+def pllcalc(firmware_dir):
+    return load(firmware_dir, "pllcalc")
+
+
+@pytest.mark.parametrize("spacing", SPACINGS)
+def test_solve_limits(pllcalc, spacing):
+    ref = pllcalc.REF_HZ
+    for f_out in targets(pllcalc, TARGETS_PER_SPACING, spacing):
+        fields = pllcalc.solve(f_out, spacing)
+        div, r, mod = fields["div"], fields["r"], fields["mod"]
+        f_vco = f_out * div
+        assert div in (1, 2, 4, 8, 16, 32, 64)
+        assert pllcalc.VCO_MIN <= f_vco <= pllcalc.VCO_MAX
+        pfd = Fraction(ref, r)
+        assert 1 <= r <= 1023 and pfd <= pllcalc.PFD_MAX
+        assert 2 <= mod <= pllcalc.MOD_MAX and 0 <= fields["frac"] < mod
+        assert fields["prescaler"] == (f_vco > pllcalc.PRESCALER_89_VCO)
+        assert (75 if fields["prescaler"] else 23) <= fields["int"] <= 65535
+        assert 1 <= fields["bs_div"] <= 255 and pfd / fields["bs_div"] <= pllcalc.BS_CLK_MAX
+        # Output step no coarser than the grid, so within half a step
+        assert pfd / (mod * div) <= spacing
+        exact = datasheet_rf_out(fields, ref)
+        assert abs(exact - f_out) <= Fraction(spacing, 2)
+        assert abs(exact - fields["frequency"]) <= Fraction(1, 2)
+
+
+def test_registers_round_trip(pllcalc, firmware_dir):
+    base = [0x00620000, 0x08008011, 0x184B3CC2, 0x000004B3, 0x00AC803C, 0x00580005]
+    for f_out in targets(pllcalc, 500, 1):
+        fields = pllcalc.solve(f_out)
+        regs = pllcalc.registers(base, fields)
+        assert (regs[0] >> 15) & 0xFFFF == fields["int"]
+        assert (regs[0] >> 3) & 0xFFF == fields["frac"]
+        assert (regs[1] >> 3) & 0xFFF == fields["mod"]
+        assert (regs[1] >> 27) & 1 == fields["prescaler"]
+        assert (regs[2] >> 14) & 0x3FF == fields["r"]
+        assert (regs[2] >> 24) & 0x3 == 0
+        assert regs[2] & pllcalc.LDP == (0 if fields["frac"] else pllcalc.LDP)
+        assert 1 << ((regs[4] >> 20) & 0x7) == fields["div"]
+        assert (regs[4] >> 12) & 0xFF == fields["bs_div"]
+        # Control bits and the fields solve() does not own are kept
+        assert [reg & 0x7 for reg in regs] == [0, 1, 2, 3, 4, 5]
+        assert regs[3] == base[3] and regs[5] == base[5]
+        mask = ~((0x3 << 24) | (0x3FF << 14) | pllcalc.LDP)
+        assert regs[2] & mask == base[2] & mask
+        assert pllcalc.frequency(regs) == fields["frequency"]
+
+
+def test_nearby_retune_writes_r0_only(pllcalc):
+    base = [0x00620000, 0x08008011, 0x184B3CC2, 0x000004B3, 0x00AC803C, 0x00580005]
+    old = pllcalc.registers(base, pllcalc.solve(2440000000))
+    for f_out in (2440001000, 2441000000, 2449999000):
+        new = pllcalc.registers(base, pllcalc.solve(f_out))
+        assert pllcalc.changed(old, new) == [0]
+    assert pllcalc.changed(old, old) == []
+    # FRAC = 0 (integer-N): 6 ns lock detect precision in R2, then R0
+    new = pllcalc.registers(base, pllcalc.solve(2450000000))
+    assert pllcalc.solve(2450000000)["frac"] == 0
+    assert new[2] & pllcalc.LDP and not old[2] & pllcalc.LDP
+    assert pllcalc.changed(old, new) == [2, 0]
+    # Another RF divider (and so R and MOD): R5 down, R0 last
+    new = pllcalc.registers(base, pllcalc.solve(1225000000))
+    order = pllcalc.changed(old, new)
+    assert order[0] == 4 and order[-1] == 0 and order == sorted(order, reverse=True)
+    # Nothing latched yet: everything, R5 down to R0
+    assert pllcalc.changed([None] * 6, old) == [5, 4, 3, 2, 1, 0]
+
+
+def test_out_of_range(pllcalc):
+    with pytest.raises(ValueError):
+        pllcalc.solve(pllcalc.OUT_MIN - 1)
+    with pytest.raises(ValueError):
+        pllcalc.solve(pllcalc.OUT_MAX + 1)
+    with pytest.raises(ValueError):
+        pllcalc.solve(0)
+    # A 10 kHz reference would need INT > 65535
+    with pytest.raises(ValueError):
+        pllcalc.solve(2450000000, ref=10000)
+
+
+def test_carrier_on_simulator(board):
+    carrier = importlib.import_module("carrier")
+    pllcalc = importlib.import_module("pllcalc")
+    assert carrier.setup_TX() >= 0
+    adf = board.adf4351
+    for f_out in targets(pllcalc, 60, 2):
+        assert carrier.set_frequency(f_out) == pllcalc.frequency(adf.regs)
+        assert abs(adf.output_frequency() - f_out) <= pllcalc.SPACING_HZ / 2 + 1
+        assert carrier.lock_last_us >= 0
+    carrier.set_frequency(2440000000)
+    latched = len(adf.latches)
+    assert abs(carrier.set_frequency(2441000000) - 2441000000) <= pllcalc.SPACING_HZ / 2
+    assert [reg for _, reg, _ in adf.latches[latched:]] == [0]
+    assert adf.garbage_latches == 0
@@ -0,0 +1,49 @@
+"""Profile store reads of a damaged file (user-020)."""
+
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def store(board, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)     # the store file is in the working directory
+    profile_store = importlib.import_module("profile_store")
+    receiver = importlib.import_module("receiver")
+    receiver.setup_RX(receiver.spi_rx, receiver.cs_rx, 2)
+    profile_store.save("other")
+    profile_store.save("board")
+    return profile_store
+
+
+def damage(profile_store, offset, value=0xFF):
+    with open(profile_store.STORE_FILE, "rb") as f:
+        data = bytearray(f.read())
+    data[offset] = value
+    with open(profile_store.STORE_FILE, "wb") as f:
+        f.write(data)
+
+
+def test_flipped_entry_name_is_corrupt(store):
+    # First name byte of the first entry ("other"): not UTF-8, CRC fails
+    damage(store, store._HEADER_SIZE)
+    active, entries = store.read()
+    assert active == "board" and list(entries) == ["board"]
+    assert len(store.corrupt) == 1 and store.corrupt[0].startswith("?")
+    assert store.names() == ["board"]
+    assert store.boot()[0] == "board"
+    store.select("board")
+    assert store.save("third") == 1
+    with pytest.raises(KeyError):
+        store.select("other")
+
+
+def test_flipped_active_name_falls_back(store):
+    # The header has no CRC: a damaged active name matches no entry
+    damage(store, 6)
+    active, entries = store.read()
+    assert active.startswith("?") and sorted(entries) == ["board", "other"]
+    assert store.boot() is None
+    assert store.names() == ["board", "other"]
+    store.select("board")
+    assert store.boot()[0] == "board"
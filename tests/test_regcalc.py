@@ -0,0 +1,136 @@
+"""CC2500 register math and compiled profiles (user-006).
+
+The reference functions below are the arithmetic of the set_*_RX
+functions receiver.py had before regcalc.py, with register reads taken
+from the image and values truncated to a byte as the SPI write did.
+"""
+
+import json
+import math
+import os
+
+import pytest
+
+import compile_profile
+from conftest import ROOT, load
+
+F_XOSC = 26000000
+
+FREQUENCIES = [2400000000 + 1234567 * i for i in range(0, 65, 4)] + [2456597222]
+DEVIATIONS = [25000, 47607, 100000, 200000, 347222, 380859]
+DATARATES = [1200, 9600, 38400, 100000, 250000, 500000]
+BANDWIDTHS = [58036, 101562, 203125, 325000, 541666, 794444, 812500]
+
+
+def ref_datarate(mdmcfg4, r_data):
+    drate_e = int(math.log2((r_data * (1 << 20)) / F_XOSC))
+    drate_m = int((r_data * (1 << 28)) / (F_XOSC * (1 << drate_e)) - 256.0)
+    return [[0x10, (mdmcfg4 & 0xf0) + (drate_e & 0x0f)], [0x11, drate_m & 0xff]]
+
+
+def ref_bandwidth(mdmcfg4, bw):
+    chanbw_e = int(math.log2(F_XOSC / ((1 << 5) * bw) / math.log2(2.0)))
+    chanbw_m = int(F_XOSC / (8.0 * bw * (1 << chanbw_e)) - 4.0)
+    return [[0x10, ((chanbw_e & 0x03) << 6) + ((chanbw_m & 0x03) << 4) + (mdmcfg4 & 0x0f)]]
+
+
+def ref_deviation(f_dev):
+    deviation_e = int(math.log2(f_dev * (1 << 14) / F_XOSC))
+    deviation_m = int(f_dev * (1 << 17) / ((1 << deviation_e) * F_XOSC) - 8.0)
+    return [[0x15, ((deviation_e & 0x07) << 4) + (deviation_m & 0x07)]]
+
+
+def ref_frequency(mdmcfg1, frequency):
+    freq = int(frequency * ((1 << 16) / F_XOSC))
+    channel = 0
+    channspc_e = 0
+    channspc_m = int(((frequency * (1 << 16)) / F_XOSC - freq - (1 << 6)) * (1 << 2))
+    return [[0x0a, channel],
+            [0x0d, ((freq & 0x007f0000) >> 16)],
+            [0x0e, ((freq & 0x0000ff00) >> 8)],
+            [0x0f, ((freq & 0x000000ff) - 1) & 0xff],
+            # The old code added 32 to a register read that returned the
+            # status byte (0); with the register value it must not carry
+            [0x13, (mdmcfg1 & 0xf0) | (channspc_e & 0x03) | 32],
+            [0x14, channspc_m & 0xff]]
+
+
+def ref_setup_image(regcalc, frequency, f_dev, r_data, bw):
+    """Register file after the old setup_RX: the settings table, the four
+    set_*_RX calls and the final MDMCFG4 = 0x0B write. Its register reads
+    returned the chip status byte (0 in IDLE with an empty FIFO)."""
+    image = bytearray(regcalc.CC2500_RESET)
+    status = 0x00
+    regcalc.stage(image, regcalc.cc2500_receiver_settings)
+    regcalc.stage(image, ref_frequency(status, frequency))
+    regcalc.stage(image, ref_deviation(f_dev))
+    regcalc.stage(image, ref_datarate(status, r_data))
+    regcalc.stage(image, ref_bandwidth(status, bw))
+    regcalc.stage(image, [[0x10, 0x0B]])
+    return image
+
+
+def apply_blobs(regcalc, blobs):
+    image = bytearray(regcalc.CC2500_RESET)
+    for blob in blobs:
+        assert blob[0] & 0x40, "not a burst write"
+        addr = blob[0] & 0x3F
+        image[addr:addr + len(blob) - 1] = blob[1:]
+    return image
+
+
+@pytest.fixture
+def regcalc(firmware_dir):
+    return load(firmware_dir, "regcalc")
+
+
+def test_register_formulas(regcalc):
+    image = bytearray(regcalc.CC2500_RESET)
+    regcalc.stage(image, regcalc.cc2500_receiver_settings)
+    for frequency in FREQUENCIES:
+        assert regcalc.frequency_regs(image, frequency) == ref_frequency(image[0x13], frequency)
+    for f_dev in DEVIATIONS:
+        assert regcalc.freq_deviation_regs(image, f_dev) == ref_deviation(f_dev)
+    for r_data in DATARATES:
+        assert regcalc.datarate_regs(image, r_data) == ref_datarate(image[0x10], r_data)
+    for bw in BANDWIDTHS:
+        assert regcalc.filter_bandwidth_regs(image, bw) == ref_bandwidth(image[0x10], bw)
+
+
+def test_achieved_values(regcalc):
+    image = bytearray(regcalc.CC2500_RESET)
+    regcalc.stage(image, regcalc.cc2500_receiver_settings)
+    for r_data, bw in zip(DATARATES, BANDWIDTHS):
+        regcalc.stage(image, regcalc.datarate_regs(image, r_data))
+        regcalc.stage(image, regcalc.filter_bandwidth_regs(image, bw))
+        drate_e = image[0x10] & 0x0f
+        chanbw_e, chanbw_m = image[0x10] >> 6, (image[0x10] >> 4) & 0x03
+        got = regcalc.achieved(image)
+        assert got["datarate"] == int(((256.0 + image[0x11]) * (1 << drate_e) * F_XOSC) / (1 << 28))
+        assert got["bandwidth"] == int(F_XOSC / (8.0 * (4.0 + chanbw_m) * (1 << chanbw_e)))
+    for frequency in FREQUENCIES:
+        regcalc.stage(image, regcalc.frequency_regs(image, frequency))
+        freq = (image[0x0d] << 16) | (image[0x0e] << 8) | image[0x0f]
+        assert regcalc.achieved(image)["frequency"] == int(F_XOSC * freq / (1 << 16))
+
+
+def test_compile_rx_matches_old_setup(regcalc, firmware_dir):
+    receiver_values = (2450000000 + 6597222, 347222, 100000, 794444)
+    blobs = regcalc.compile_rx(*receiver_values)
+    assert apply_blobs(regcalc, blobs) == ref_setup_image(regcalc, *receiver_values)
+
+
+def test_compile_rx_stages_image(regcalc):
+    for values in zip(FREQUENCIES, DEVIATIONS, DATARATES, BANDWIDTHS):
+        image = bytearray(regcalc.CC2500_RESET)
+        blobs = regcalc.compile_rx(*values, image=image)
+        assert apply_blobs(regcalc, blobs) == image
+
+
+def test_profiles_py_up_to_date(regcalc, firmware_dir):
+    source = "tools/radio_profiles.json"
+    with open(os.path.join(ROOT, source)) as f:
+        declared = json.load(f)
+    expected = compile_profile.render(compile_profile.compile_profiles(regcalc, declared), source)
+    with open(os.path.join(firmware_dir, "profiles.py"), newline="") as f:
+        assert f.read() == expected, "profiles.py is stale: run tools/compile_profile.py"
@@ -0,0 +1,46 @@
+"""Stay-in-RX drain with a bad frame in the FIFO (user-007)."""
+
+import importlib
+
+import pytest
+
+PERIOD_US = 3000
+
+
+@pytest.fixture
+def rx(board):
+    carrier = importlib.import_module("carrier")
+    receiver = importlib.import_module("receiver")
+    machine = importlib.import_module("machine")
+    assert carrier.setup_TX() >= 0
+    receiver.setup_RX(receiver.spi_rx, receiver.cs_rx, 2)
+    receiver.start_listen_RX(receiver.spi_rx, receiver.cs_rx)
+    # No drain until the test calls it: the three frames queue up
+    machine.Pin(2, machine.Pin.IN).irq(handler=None)
+    return receiver
+
+
+def queue_frames(board, crc):
+    now = board.sim.now_us()
+    for seq, ok in enumerate(crc, 1):
+        board.cc2500.send(bytes([seq]) + b"tag packet", crc_ok=ok, at_us=now + seq * PERIOD_US)
+    board.sim.run_until(now + (len(crc) + 1) * PERIOD_US)
+
+
+def test_autoflush_loses_queued_frames(board, rx):
+    # What CRC_AUTOFLUSH does in stay mode: the good frame goes too
+    rx.write_register_RX(rx.spi_rx, rx.cs_rx, [[0x07, 0x0C]])
+    queue_frames(board, (True, False))
+    assert board.cc2500.fifo == b""
+    assert board.cc2500.lost_autoflush == 1
+
+
+def test_drain_drops_only_the_bad_frame(board, rx):
+    assert not board.cc2500.regs[0x07] & 0x08, "CRC autoflush on in stay mode"
+    queue_frames(board, (True, False, True))
+    assert board.cc2500.received == 3 and board.cc2500.lost_autoflush == 0
+    rx.drain_FIFO_RX(0)
+    assert (rx.ring_count(), rx.crc_dropped) == (2, 1)
+    message = rx.Message()
+    sequences = [rx.ring_pop(message).sequence for _ in range(2)]
+    assert sequences == [1, 3] and message.CRC_check
@@ -0,0 +1,50 @@
+"""setup_RX loads the receiver profile with burst writes (user-005)."""
+
+import importlib
+
+# setup_RX on the SPI bus: SRES, SIDLE, the shadow read-back and the
+# profile bursts. One spi.write per register pair took 39 calls and 116
+# bytes before the profile was burst-written.
+SETUP_RX_CALLS = 6
+SETUP_RX_BYTES = 84
+
+
+def profile_pairs(regcalc, receiver):
+    """The receiver profile as [address, value] pairs, in setup order"""
+    image = bytearray(regcalc.CC2500_RESET)
+    pairs = []
+    pairs += regcalc.stage(image, regcalc.cc2500_receiver_settings)
+    pairs += regcalc.stage(image, regcalc.frequency_regs(image, receiver.f_carrier + receiver.CARRIER_FEQ))
+    pairs += regcalc.stage(image, regcalc.freq_deviation_regs(image, receiver.f_dev))
+    pairs += regcalc.stage(image, regcalc.datarate_regs(image, receiver.r_data))
+    pairs += regcalc.stage(image, regcalc.filter_bandwidth_regs(image, receiver.bw))
+    return pairs
+
+
+def test_setup_rx_spi_traffic(board):
+    receiver = importlib.import_module("receiver")
+    bus = board.spi1
+    calls, nbytes = bus.transactions, bus.bytes
+    receiver.setup_RX(receiver.spi_rx, receiver.cs_rx, 2)
+    assert (bus.transactions - calls, bus.bytes - nbytes) == (SETUP_RX_CALLS, SETUP_RX_BYTES)
+
+
+def test_bursts_match_per_register_writes(board):
+    receiver = importlib.import_module("receiver")
+    regcalc = importlib.import_module("regcalc")
+    spi, cs = receiver.spi_rx, receiver.cs_rx
+    receiver.setup_RX(spi, cs, 2)
+    burst = bytes(board.cc2500.regs)
+
+    # Same profile one register at a time, as write_register_RX did
+    receiver.write_strobe_RX(spi, cs, receiver.SRES)
+    receiver.write_strobe_RX(spi, cs, receiver.SIDLE)
+    bus = board.spi1
+    calls = bus.transactions
+    pairs = profile_pairs(regcalc, receiver)
+    for addr, value in pairs:
+        cs.value(0)
+        spi.write(bytes([addr, value & 0xFF]))
+        cs.value(1)
+    assert bus.transactions - calls == len(pairs) > SETUP_RX_CALLS
+    assert bytes(board.cc2500.regs) == burst
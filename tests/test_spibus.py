@@ -0,0 +1,37 @@
+"""SPI1 keeps its pins when the display starts (user-010)."""
+
+import importlib
+
+
+def read_back(board):
+    receiver = importlib.import_module("receiver")
+    spi, cs = receiver.spi_rx, receiver.cs_rx
+    receiver.setup_RX(spi, cs, 2)
+    shadow = bytes(receiver.shadow_RX)
+    receiver.sync_shadow_RX(spi, cs)
+    return shadow, bytes(receiver.shadow_RX)
+
+
+def test_display_import_keeps_miso(board):
+    # Production order: radios first, display started after setup_RX
+    importlib.import_module("carrier")
+    importlib.import_module("display")
+    written, read = read_back(board)
+    assert read == written
+    assert board.spi1.lost_pins() == [] and board.spi1.pin_faults == 0
+
+
+def test_bench_import_keeps_miso(board):
+    importlib.import_module("bench")    # imports display at module level
+    written, read = read_back(board)
+    assert read == written
+    assert board.spi1.pin_faults == 0
+
+
+def test_reassigned_miso_is_caught(board):
+    machine = importlib.import_module("machine")
+    spibus = importlib.import_module("spibus")
+    machine.Pin(spibus.PIN_MISO, machine.Pin.IN)
+    written, read = read_back(board)
+    assert read != written
+    assert board.spi1.lost_pins() == ["miso"] and board.spi1.pin_faults > 0
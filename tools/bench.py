@@ -0,0 +1,101 @@
+"""Run the firmware benchmarks on the host and compare result files.
+
+firmware/bench.py times setup_TX, setup_RX, rf_output, the receive path (IRQ to
+drain, drain_FIFO_RX, ring_pop, decode_packet_RX), the packet task's wake under
+asyncio (packet_wake), display.print_msg and a message on the retained UI
+(ui_message). On the Pico it writes bench_results.json; here it runs against
+tools/hostsim with a simulated tag:
+
+    python tools/bench.py [--firmware DIR] [--rate PPS] [--out DIR]
+
+writes bench-<build>.json per firmware directory (default: every
+humanscatter-v4.*/firmware), and
+
+    python tools/bench.py --compare OLD.json NEW.json [--threshold PCT]
+
+prints per-stage differences and exits with status 1 if a p50/p99
+latency, SPI or allocation figure got worse by more than the threshold.
+Host and device files can be compared with each other only loosely:
+host timings are CPU time of this machine plus modelled I/O.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import hostsim  # noqa: E402
+
+METRICS = ("p50_us", "p99_us", "spi_transactions", "spi_bytes", "alloc_bytes")
+
+
+def build_name(firmware_dir):
+    return os.path.basename(os.path.dirname(os.path.abspath(firmware_dir)))
+
+
+def run_host(firmware_dir, out_dir, rate, jitter, verbose):
+    board = hostsim.install()
+    board.cc2500.start_traffic(rate, jitter=jitter)
+    hostsim.use_firmware(firmware_dir)
+    name = build_name(firmware_dir)
+    path = os.path.join(out_dir, "bench-%s.json" % name)
+    out = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(out):
+        import bench
+        results = bench.run(path, label=name)
+    bench.report(results)
+    print("wrote", os.path.relpath(path))
+    return path
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print("%s -> %s" % (old.get("label"), new.get("label")))
+    worse = 0
+    for name in sorted(set(old["stages"]) | set(new["stages"])):
+        a = old["stages"].get(name, {})
+        b = new["stages"].get(name, {})
+        if not a.get("n") or not b.get("n"):
+            print("%-16s missing in %s" % (name, "old" if not a.get("n") else "new"))
+            continue
+        for key in METRICS:
+            mark = ""
+            if a[key] or b[key]:
+                change = 100.0 * (b[key] - a[key]) / a[key] if a[key] else float("inf")
+                if change > threshold:
+                    mark = "  WORSE"
+                    worse += 1
+                print("%-16s %-16s %10.1f -> %10.1f  %+7.1f%%%s" % (name, key, a[key], b[key], change, mark))
+    return worse
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--firmware", action="append", help="firmware directory (repeatable)")
+    ap.add_argument("--rate", type=float, default=100.0, help="tag packets per second")
+    ap.add_argument("--jitter", type=float, default=0.2, help="+/- fraction of the packet period")
+    ap.add_argument("--out", default=".", help="directory for the result files")
+    ap.add_argument("--verbose", action="store_true", help="show firmware output")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    ap.add_argument("--threshold", type=float, default=10.0, help="percent change reported as worse")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+    dirs = args.firmware or sorted(glob.glob(os.path.join(ROOT, "humanscatter-v4.*", "firmware")))
+    os.makedirs(args.out, exist_ok=True)
+    for firmware_dir in dirs:
+        run_host(firmware_dir, args.out, args.rate, args.jitter, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare the boot profiles: time from reset until the receiver listens.
+
+Runs main.py on tools/hostsim once per boot profile (firmware
+boot_profile.py), with a tag sending packets from reset, and prints the
+boot phase timestamps the firmware recorded:
+
+    python tools/check_boot.py [--firmware DIR] [--seconds S] [--limit-ms MS]
+
+Exits with status 1 if the production profile is not listening within
+--limit-ms of reset, or not sooner than the debug profile, or if a
+profile muxes an SPI1 pin away from the bus (the display start used to
+take the CC2500 MISO).
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import hostsim  # noqa: E402
+
+
+def run(firmware_dir, profile, seconds):
+    board = hostsim.install()
+    board.cc2500.start_traffic(50, jitter=0.2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # The Pico filesystem: boot_profile.txt names the profile
+        hostsim.run_firmware(firmware_dir, seconds=seconds, files={"boot_profile.txt": profile})
+    boot_profile = sys.modules["boot_profile"]
+    return boot_profile.name, list(boot_profile.phases), board.spi1.pin_faults
+
+
+def check(firmware_dir, seconds, limit_ms):
+    print(os.path.relpath(firmware_dir, ROOT))
+    listening = {}
+    failed = 0
+    for profile in ("debug", "production"):
+        name, phases, pin_faults = run(firmware_dir, profile, seconds)
+        stamps = dict(phases)
+        listening[profile] = stamps.get("listening")
+        print("  %-10s %s" % (name, ", ".join("%s %.1f ms" % (p, t / 1000) for p, t in phases)))
+        if pin_faults:
+            print("  FAIL: %s profile: %d SPI1 transfers with a pin muxed away" % (profile, pin_faults))
+            failed += 1
+    fast = listening["production"]
+    if fast is None or fast > limit_ms * 1000:
+        print("  FAIL: production profile not listening within %d ms" % limit_ms)
+        failed += 1
+    elif listening["debug"] is not None and fast >= listening["debug"]:
+        print("  FAIL: production profile not listening sooner than debug")
+        failed += 1
+    else:
+        print("  ok: listening %.1f ms after reset, debug %.1f ms" % (
+            fast / 1000, (listening["debug"] or 0) / 1000))
+    return failed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--firmware", action="append", help="firmware directory (repeatable)")
+    ap.add_argument("--seconds", type=float, default=6.0, help="board time per run")
+    ap.add_argument("--limit-ms", type=int, default=100, help="production time to listening")
+    args = ap.parse_args(argv)
+
+    dirs = args.firmware or sorted(glob.glob(os.path.join(ROOT, "humanscatter-v4.*", "firmware")))
+    failed = 0
+    for firmware_dir in dirs:
+        failed += check(os.path.abspath(firmware_dir), args.seconds, args.limit_ms)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
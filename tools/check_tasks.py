@@ -0,0 +1,98 @@
+"""Check that packet intake keeps up while the display is busy.
+
+Runs main.py (the firmware's asyncio tasks on core 0, the display
+renderer on core 1) on tools/hostsim, booted in the production profile,
+with a tag sending packets, once with the normal display and once with
+every display update slowed to --display-ms, and compares what the
+packet task took from the receiver ring:
+
+    python tools/check_tasks.py [--firmware DIR] [--seconds S] [--rate PPS] [--display-ms MS]
+
+Exits with status 1 if the slow display cost packets (FIFO overflows,
+receiver ring drops, or a ring still full when the run ends) or if the
+renderer drew nothing or failed.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import hostsim  # noqa: E402
+from hostsim import picographics  # noqa: E402
+
+PICO_FILES = {"boot_profile.txt": "production"}    # no 3 s debug boot delay
+
+
+def run(firmware_dir, seconds, rate, display_ms):
+    board = hostsim.install()
+    board.cc2500.start_traffic(rate, jitter=0.2)
+    spi_hz = picographics.DISPLAY_SPI_HZ
+    if display_ms:
+        # update() is charged one frame at the display SPI clock and
+        # partial_update() its box
+        picographics.DISPLAY_SPI_HZ = 240 * 135 * 2 * 8 * 1000 // display_ms
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = hostsim.run_firmware(firmware_dir, seconds=seconds, files=PICO_FILES)
+    finally:
+        picographics.DISPLAY_SPI_HZ = spi_hz
+    receiver = sys.modules["receiver"]
+    render = sys.modules["render"]
+    return {
+        "fifo": board.cc2500.received,
+        "overflow": board.cc2500.lost_overflow,
+        "ring": receiver.ring_count_total,
+        "ring_dropped": receiver.ring_dropped,
+        "taken": g["received"],
+        "ring_full": receiver.ring_count() >= receiver.RING_SIZE - 1,
+        "merged": g["ui_q"].dropped + render.coalesced,
+        "updates": sum(d.updates for d in board.displays),
+        "partial": sum(d.partial_updates for d in board.displays),
+        "drawn": render.drawn,
+        "render_failed": render.failed,
+    }
+
+
+def check(firmware_dir, seconds, rate, display_ms):
+    print(os.path.relpath(firmware_dir, ROOT))
+    failed = 0
+    for label, ms in (("normal", 0), ("busy", display_ms)):
+        r = run(firmware_dir, seconds, rate, ms)
+        print("  %-6s display: %5d into FIFO, %3d FIFO overflows, %5d ring, %3d ring drops, "
+              "%5d taken, %5d screens merged, %5d full + %5d partial updates" % (
+                  label, r["fifo"], r["overflow"], r["ring"], r["ring_dropped"],
+                  r["taken"], r["merged"], r["updates"], r["partial"]))
+        if r["render_failed"] or not r["drawn"]:
+            print("  FAIL: renderer drew %d screens, error %r" % (r["drawn"], r["render_failed"]))
+            failed += 1
+        if ms and (r["overflow"] or r["ring_dropped"] or r["ring_full"]):
+            print("  FAIL: the busy display held up packet intake")
+            failed += 1
+    if not failed:
+        print("  ok")
+    return failed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--firmware", action="append", help="firmware directory (repeatable)")
+    ap.add_argument("--seconds", type=float, default=15.0, help="board time per run")
+    ap.add_argument("--rate", type=float, default=100.0, help="tag packets per second")
+    ap.add_argument("--display-ms", type=int, default=100, help="time per display update when busy")
+    args = ap.parse_args(argv)
+
+    dirs = args.firmware or sorted(glob.glob(os.path.join(ROOT, "humanscatter-v4.*", "firmware")))
+    failed = 0
+    for firmware_dir in dirs:
+        failed += check(os.path.abspath(firmware_dir), args.seconds, args.rate, args.display_ms)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compile declarative radio profiles into the firmware's profiles.py.
+
+A profile names the carrier frequency, the backscatter subcarrier offset,
+the data rate, the channel filter bandwidth and the FSK deviation. The
+CC2500 registers are computed on the host with the firmware's own
+regcalc.py, so the board only has to burst-write a frozen table at boot:
+
+    python tools/compile_profile.py [tools/radio_profiles.json]
+
+writes profiles.py into every humanscatter-v4.*/firmware directory (or
+the ones given with --firmware) and prints the achieved values.
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEYS = ("carrier_hz", "offset_hz", "datarate", "bandwidth", "deviation")
+
+
+def load_regcalc(firmware_dir):
+    sys.path.insert(0, firmware_dir)
+    try:
+        sys.modules.pop("regcalc", None)
+        return importlib.import_module("regcalc")
+    finally:
+        sys.path.remove(firmware_dir)
+
+
+def compile_profiles(regcalc, declared):
+    """{name: (blobs, requested, achieved)} for every declared profile"""
+    out = {}
+    for name, p in sorted(declared.items()):
+        missing = [k for k in KEYS if k not in p]
+        if missing:
+            raise SystemExit("profile %r lacks %s" % (name, ", ".join(missing)))
+        frequency = p["carrier_hz"] + p["offset_hz"]
+        requested = (frequency, p["deviation"], p["datarate"], p["bandwidth"])
+        image = bytearray(regcalc.CC2500_RESET)
+        blobs = regcalc.compile_rx(*requested, image=image)
+        out[name] = ([bytes(b) for b in blobs], requested, regcalc.achieved(image))
+    return out
+
+
+def render(compiled, source):
+    lines = [
+        "# Generated by tools/compile_profile.py from %s, do not edit." % source,
+        "",
+        "# name: (CC2500 burst blobs, (frequency, f_dev, r_data, bw) requested,",
+        "#        achieved values)",
+        "RX_PROFILES = {",
+    ]
+    for name, (blobs, requested, achieved) in compiled.items():
+        lines.append("    %r: (" % name)
+        lines.append("        (")
+        for blob in blobs:
+            lines.append('            b"%s",' % "".join("\\x%02x" % b for b in blob))
+        lines.append("        ),")
+        lines.append("        %r," % (requested,))
+        lines.append("        {%s}," % ", ".join(
+            "%r: %d" % (k, achieved[k]) for k in sorted(achieved)))
+        lines.append("    ),")
+    lines.append("}")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("profiles", nargs="?", default=os.path.join(ROOT, "tools", "radio_profiles.json"))
+    ap.add_argument("--firmware", action="append", help="firmware directory (repeatable)")
+    args = ap.parse_args(argv)
+
+    with open(args.profiles) as f:
+        declared = json.load(f)
+    dirs = args.firmware or sorted(glob.glob(os.path.join(ROOT, "humanscatter-v4.*", "firmware")))
+    source = os.path.relpath(os.path.abspath(args.profiles), ROOT).replace(os.sep, "/")
+
+    for firmware_dir in dirs:
+        compiled = compile_profiles(load_regcalc(os.path.abspath(firmware_dir)), declared)
+        target = os.path.join(firmware_dir, "profiles.py")
+        with open(target, "w", newline="") as f:
+            f.write(render(compiled, source))
+        print("wrote", os.path.relpath(target, ROOT))
+
+    for name, (blobs, requested, achieved) in compiled.items():
+        print("%s: %d SPI writes, %d bytes" % (name, len(blobs), sum(len(b) for b in blobs)))
+        for key, want in zip(("frequency", "deviation", "datarate", "bandwidth"), requested):
+            print("  %-10s %12d requested %12d achieved" % (key, want, achieved[key]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Host-side stand-ins for the Pico hardware used by the firmware.
+
+``install()`` registers fake ``machine``, ``micropython``, ``_thread``
+(one thread standing in for core 1) and ``picographics`` modules, adds the MicroPython-only helpers to ``time``,
+``gc`` and ``asyncio`` (whose ``run()`` then uses a board-time event
+loop), and wires a CC2500 and an ADF4351 model onto SPI1 with the
+pins the firmware uses, so the files in ``firmware/`` import and run
+unmodified on CPython::
+
+    from hostsim import install, run_firmware
+    board = install()
+    board.cc2500.start_traffic(200)
+    run_firmware("humanscatter-v4.2/firmware", seconds=5)
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .core import sim, SimulationEnd, TICKS_PERIOD
+from . import machine as _machine
+from . import micropython as _micropython
+from . import picographics as _picographics
+from . import aio as _aio
+from . import thread as _thread
+from .adf4351 import ADF4351
+from .cc2500 import CC2500
+
+
+class Board:
+    """Handles to the simulated parts of one Humanscatter reader."""
+
+    def __init__(self, sim, cc2500, adf4351):
+        self.sim = sim
+        self.cc2500 = cc2500
+        self.adf4351 = adf4351
+        self.spi1 = sim.spi_bus(1)
+
+    @property
+    def displays(self):
+        return _picographics.PicoGraphics.instances
+
+
+def _ticks_us():
+    return sim.now_us() % TICKS_PERIOD
+
+
+def _ticks_ms():
+    return (sim.now_us() // 1000) % TICKS_PERIOD
+
+
+def _ticks_diff(a, b):
+    half = TICKS_PERIOD // 2
+    return ((a - b + half) % TICKS_PERIOD) - half
+
+
+def _ticks_add(t, delta):
+    return (t + delta) % TICKS_PERIOD
+
+
+_gc_disable = gc.disable
+_gc_enable = gc.enable
+_gc_collect = gc.collect
+GC_COLLECT_US = 1500    # gc.collect() of a lightly used rp2 heap
+_alloc_window = False
+
+
+def _mem_alloc():
+    # With the GC disabled MicroPython frees nothing, so mem_alloc() only
+    # grows; CPython frees temporaries at once, so report the peak.
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        return current if gc.isenabled() else peak
+    return 0
+
+
+def _disable():
+    """gc.disable() also opens an allocation window traced by tracemalloc."""
+    global _alloc_window
+    _gc_disable()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _alloc_window = True
+    tracemalloc.reset_peak()
+
+
+def _enable():
+    global _alloc_window
+    _gc_enable()
+    if _alloc_window:
+        tracemalloc.stop()
+        _alloc_window = False
+
+
+def _patch_time():
+    time.sleep = lambda s: sim.sleep_us(s * 1e6)
+    time.sleep_ms = lambda ms: sim.sleep_us(ms * 1000)
+    time.sleep_us = sim.sleep_us
+    time.ticks_us = _ticks_us
+    time.ticks_ms = _ticks_ms
+    time.ticks_cpu = _ticks_us
+    time.ticks_diff = _ticks_diff
+    time.ticks_add = _ticks_add
+
+
+def _collect(*args):
+    """Charge a board-sized collection instead of CPython's full one."""
+    t0 = sim.now_us()
+    n = _gc_collect(*args)
+    with sim._lock:
+        sim.offset_us -= sim.now_us() - t0
+    sim.advance_us(GC_COLLECT_US)
+    return n
+
+
+def _patch_gc():
+    gc.mem_alloc = _mem_alloc
+    gc.mem_free = lambda: 200000 - _mem_alloc()
+    gc.threshold = lambda *a: -1
+    gc.disable = _disable
+    gc.enable = _enable
+    gc.collect = _collect
+
+
+def install(cs_pin=22, gdo0_pin=2, le_pin=9, muxout_pin=4, cpu_scale=1.0):
+    """Reset the simulator and make the fake modules importable."""
+    sim.reset()
+    sim.cpu_scale = cpu_scale
+    _picographics.PicoGraphics.instances = []
+    sys.modules["machine"] = _machine
+    sys.modules["micropython"] = _micropython
+    sys.modules["picographics"] = _picographics
+    sys.modules["_thread"] = _thread
+    _patch_time()
+    _patch_gc()
+    _aio.patch()
+    adf = ADF4351(le_pin=le_pin, muxout_pin=muxout_pin)
+    cc = CC2500(cs_pin=cs_pin, gdo0_pin=gdo0_pin, carrier=adf)
+    return Board(sim, cc, adf)
+
+
+def forget_firmware(firmware_dir):
+    """Drop firmware modules imported from ``firmware_dir`` so the next
+    import starts from a fresh module state."""
+    firmware_dir = os.path.abspath(firmware_dir)
+    for name, mod in list(sys.modules.items()):
+        path = getattr(mod, "__file__", None) or ""
+        if path and os.path.dirname(os.path.abspath(path)) == firmware_dir:
+            del sys.modules[name]
+
+
+_firmware_dirs = []
+
+
+def use_firmware(firmware_dir):
+    """Put ``firmware_dir`` first on the import path, dropping modules of
+    any firmware tree used before."""
+    firmware_dir = os.path.abspath(firmware_dir)
+    for old in _firmware_dirs + [firmware_dir]:
+        forget_firmware(old)
+        if old in sys.path:
+            sys.path.remove(old)
+    _firmware_dirs[:] = [firmware_dir]
+    sys.path.insert(0, firmware_dir)
+    return firmware_dir
+
+
+def run_firmware(firmware_dir, seconds=None, script="main.py", files=None):
+    """Run ``script`` from ``firmware_dir`` for ``seconds`` of board time.
+
+    With ``files`` ({name: text}) the run gets a fresh Pico filesystem: a
+    temporary working directory holding those files, e.g.
+    ``{"boot_profile.txt": "production"}``.
+
+    Returns normally when the time is up; the firmware's module globals
+    are returned so callers can inspect its state.
+    """
+    if files is None:
+        return _run(firmware_dir, seconds, script)
+    firmware_dir = os.path.abspath(firmware_dir)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as fs:
+        for name, text in files.items():
+            with open(os.path.join(fs, name), "w") as f:
+                f.write(text)
+        os.chdir(fs)
+        try:
+            return _run(firmware_dir, seconds, script)
+        finally:
+            os.chdir(cwd)
+
+
+def _run(firmware_dir, seconds, script):
+    firmware_dir = use_firmware(firmware_dir)
+    if seconds is not None:
+        sim.end_us = sim.now_us() + int(seconds * 1e6)
+    path = os.path.join(firmware_dir, script)
+    g = {"__name__": "__main__", "__file__": path}
+    try:
+        # Not runpy.run_path(): its globals are lost when the run ends
+        # with SimulationEnd
+        with open(path, encoding="utf-8") as f:
+            code = compile(f.read(), path, "exec")
+        exec(code, g)
+    except SimulationEnd:
+        pass
+    finally:
+        sim.end_us = None
+    return g
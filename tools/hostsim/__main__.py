@@ -0,0 +1,56 @@
+"""Run a firmware tree on the host: python -m hostsim FIRMWARE_DIR [options]"""
+
+import argparse
+import contextlib
+import io
+import sys
+
+from . import install, run_firmware
+
+
+def _summary(values):
+    if not values:
+        return "none"
+    values = sorted(values)
+    return "%d, mean %.0f us, p50 %d us, max %d us" % (
+        len(values), sum(values) / len(values), values[len(values) // 2], values[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="hostsim", description=__doc__)
+    ap.add_argument("firmware", help="firmware directory, e.g. humanscatter-v4.2/firmware")
+    ap.add_argument("--seconds", type=float, default=10.0, help="board time to run")
+    ap.add_argument("--rate", type=float, default=0.0, help="tag packets per second")
+    ap.add_argument("--jitter", type=float, default=0.0, help="+/- fraction of the packet period")
+    ap.add_argument("--quiet", action="store_true", help="hide firmware output")
+    ap.add_argument("--profile", help="boot profile (boot_profile.txt), default: none, i.e. debug")
+    args = ap.parse_args(argv)
+
+    board = install()
+    if args.rate:
+        board.cc2500.start_traffic(args.rate, jitter=args.jitter)
+    out = io.StringIO() if args.quiet else sys.stdout
+    with contextlib.redirect_stdout(out):
+        files = {"boot_profile.txt": args.profile} if args.profile else None
+        run_firmware(args.firmware, seconds=args.seconds, files=files)
+
+    cc, adf, bus = board.cc2500, board.adf4351, board.spi1
+    print("---- hostsim: %.2f s board time ----" % (board.sim.now_us() / 1e6))
+    print("tag packets sent       %d" % cc.sent)
+    print("  into RX FIFO         %d" % cc.received)
+    print("  lost, radio not RX   %d" % cc.lost_not_rx)
+    print("  lost, FIFO overflow  %d" % cc.lost_overflow)
+    print("  lost, CRC autoflush  %d" % cc.lost_autoflush)
+    print("  lost, tuning/carrier %d" % cc.lost_tuning)
+    print("RX dead time           %s" % _summary(cc.dead_times()))
+    print("FIFO drain time        %s" % _summary(cc.fifo_drains))
+    print("FIFO bytes read        %d" % cc.fifo_reads)
+    print("SPI1 transactions      %d (%d bytes, %d reconfigs)" % (bus.transactions, bus.bytes, bus.reconfigs))
+    print("ADF4351 latches        %d, carrier on %.2f s" % (len(adf.latches), adf.total_on_us() / 1e6))
+    for d in board.displays:
+        print("display updates        %d full, %d partial (%d SPI bytes)" % (
+            d.updates, d.partial_updates, d.spi_bytes))
+
+
+if __name__ == "__main__":
+    main()
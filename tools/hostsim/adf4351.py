@@ -0,0 +1,166 @@
+"""Latch-level model of the ADF4351 synthesizer on the shared SPI1 bus.
+
+The part has no chip select: every byte clocked on SCK/MOSI shifts into
+its 32-bit register and the word is latched on the rising edge of LE.
+Decodes the written registers into PFD, VCO and output frequency, models
+double-buffering of R4 divider bits, VCO band select and lock time, and
+drives MUXOUT when it is configured as digital lock detect.
+"""
+
+from .core import sim
+
+VCO_MIN = 2200000000
+VCO_MAX = 4400000000
+
+
+class ADF4351:
+    def __init__(self, bus_id=1, le_pin=9, muxout_pin=4, ref_hz=25000000):
+        self.bus = sim.spi_bus(bus_id)
+        self.bus.devices.append(self)
+        self.le = sim.pin(le_pin)
+        self.le.listeners.append(self._le_changed)
+        self.muxout = sim.pin(muxout_pin)
+        self.ref_hz = ref_hz
+        self.regs = [0] * 6
+        self.active_r4 = 0       # R4 with double-buffered fields applied
+        self.shift = 0
+        self.locked = False
+        self.lock_at = None
+        self._lock_gen = 0
+        self.latches = []        # (t_us, register, word)
+        self.locks = []          # (t_us written, t_us locked)
+        self.on_us = 0
+        self._on_since = None
+        self.garbage_latches = 0
+        self._bits = 0
+        sim.devices["adf4351"] = self
+
+    # ------------------------------------------------------------------
+    # Serial interface
+
+    def spi_byte(self, b, bus):
+        self.shift = ((self.shift << 8) | b) & 0xFFFFFFFF
+        self._bits += 8
+        return None     # ADF4351 has no data output on MISO
+
+    def _le_changed(self, level):
+        if level == 0:
+            self._bits = 0
+            return
+        if self._bits == 0:
+            return
+        if self._bits != 32:
+            self.garbage_latches += 1
+        self._latch(self.shift)
+        self._bits = 0
+
+    def _latch(self, word):
+        was_on = self.rf_active()
+        reg = word & 0x7
+        if reg > 5:
+            return
+        self.regs[reg] = word
+        self.latches.append((sim.now_us(), reg, word))
+        double_buffered = (self.regs[2] >> 13) & 1
+        if reg == 4:
+            if double_buffered:
+                # Divider select (DB22:20) waits for the next R0 write.
+                keep = self.active_r4 & (0x7 << 20)
+                self.active_r4 = (word & ~(0x7 << 20)) | keep
+            else:
+                self.active_r4 = word
+        if reg == 0:
+            self.active_r4 = self.regs[4]
+            self._relock()
+        self._update_muxout()
+        self._account(was_on)
+
+    def _relock(self):
+        before = getattr(self, "_last_vco", None)
+        vco = self.vco_frequency()
+        self._last_vco = vco
+        # Band select (10 BS clock cycles) plus loop settle, longer for
+        # larger jumps.
+        pfd = self.pfd()
+        bs = (self.regs[4] >> 12) & 0xFF or 1
+        t_bs = 10 * 1e6 * bs / pfd if pfd else 0
+        jump = abs(vco - before) / 1e6 if before else 1000
+        t_lock = int(t_bs + 40 + min(jump * 0.1, 300))
+        self._lock_gen += 1
+        self.locked = False
+        now = sim.now_us()
+        self.lock_at = now + t_lock
+        sim.call_at(self.lock_at, self._lock_done, self._lock_gen, now)
+
+    def _lock_done(self, gen, started):
+        if gen != self._lock_gen:
+            return
+        was_on = self.rf_active()
+        self.locked = True
+        self.locks.append((started, sim.now_us()))
+        self._update_muxout()
+        self._account(was_on)
+
+    def _update_muxout(self):
+        mux = (self.regs[2] >> 26) & 0x7
+        if mux == 6:
+            self.muxout.drive(1 if self.locked else 0)
+        elif mux == 1:
+            self.muxout.drive(1)
+        else:
+            self.muxout.drive(0)
+
+    def _account(self, was_on):
+        now = sim.now_us()
+        on = self.rf_active()
+        if on and not was_on:
+            self._on_since = now
+        elif was_on and not on and self._on_since is not None:
+            self.on_us += now - self._on_since
+            self._on_since = None
+
+    # ------------------------------------------------------------------
+    # Decoded state
+
+    def pfd(self):
+        r2 = self.regs[2]
+        r = (r2 >> 14) & 0x3FF
+        if r == 0:
+            return 0
+        doubler = (r2 >> 25) & 1
+        div2 = (r2 >> 24) & 1
+        return self.ref_hz * (1 + doubler) / (r * (1 + div2))
+
+    def divider(self):
+        return 1 << ((self.active_r4 >> 20) & 0x7)
+
+    def vco_frequency(self):
+        r0 = self.regs[0]
+        n_int = (r0 >> 15) & 0xFFFF
+        frac = (r0 >> 3) & 0xFFF
+        mod = (self.regs[1] >> 3) & 0xFFF or 1
+        n = n_int + frac / mod
+        if (self.active_r4 >> 23) & 1:
+            return self.pfd() * n
+        return self.pfd() * n * self.divider()
+
+    def output_frequency(self):
+        return self.vco_frequency() / self.divider()
+
+    def output_enabled(self):
+        r4 = self.active_r4
+        return bool(r4 & (1 << 5)) and not (r4 & (1 << 11))
+
+    def power_dbm(self):
+        return (-4, -1, 2, 5)[(self.active_r4 >> 3) & 0x3]
+
+    def rf_active(self):
+        if not self.output_enabled() or (self.regs[2] >> 5) & 1:
+            return False
+        mtld = (self.active_r4 >> 10) & 1
+        return self.locked or not mtld
+
+    def total_on_us(self):
+        if self._on_since is not None:
+            return self.on_us + sim.now_us() - self._on_since
+        return self.on_us
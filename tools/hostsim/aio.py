@@ -0,0 +1,114 @@
+"""MicroPython ``asyncio`` on top of CPython's.
+
+The firmware's tasks run on an event loop whose clock is board time and
+whose idle wait moves board time forward event by event, so timers, IRQs
+and scheduled callbacks run while every task sleeps, as on the Pico.
+``patch()`` adds the MicroPython-only names (``sleep_ms``,
+``wait_for_ms``, ``ThreadSafeFlag``) to ``asyncio`` and makes
+``asyncio.run()`` use that loop.
+"""
+
+import asyncio
+import selectors
+
+from .core import sim, SimulationEnd
+
+IDLE_STEP_US = 10000    # longest idle jump when no timer or device event is due
+
+_woken = False          # a ThreadSafeFlag was set since the last select()
+
+
+class _BoardSelector(selectors.DefaultSelector):
+    """Selector whose wait is board time: it returns at the loop's next
+    timer or as soon as an IRQ or scheduled callback sets a flag."""
+
+    def select(self, timeout=None):
+        global _woken
+        sim.service()
+        deadline = None if timeout is None else sim.now_us() + int(timeout * 1e6)
+        while not _woken:
+            now = sim.now_us()
+            if deadline is not None and now >= deadline:
+                break
+            step = IDLE_STEP_US
+            nxt = sim.next_event_us()
+            if nxt is not None:
+                step = min(step, nxt - now)
+            if deadline is not None:
+                step = min(step, deadline - now)
+            sim.advance_us(max(sim.core1_bound(now + step) - sim.now_us(), 0))
+        _woken = False
+        return super().select(0)
+
+
+class BoardEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__(_BoardSelector())
+
+    def time(self):
+        return sim.now_us() / 1e6
+
+
+class ThreadSafeFlag:
+    """asyncio.ThreadSafeFlag: set() from IRQ or scheduled context wakes
+    the one task waiting in wait(), which clears the flag."""
+
+    def __init__(self):
+        self._flag = False
+        self._waiter = None
+
+    def set(self):
+        global _woken
+        self._flag = True
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+        _woken = True
+
+    def clear(self):
+        self._flag = False
+
+    async def wait(self):
+        if not self._flag:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        self._flag = False
+
+
+def _exception_handler(loop, context):
+    # A task that was running when the time was up ends with SimulationEnd
+    if not isinstance(context.get("exception"), SimulationEnd):
+        loop.default_exception_handler(context)
+
+
+def run(main):
+    """asyncio.run() on a BoardEventLoop"""
+    loop = BoardEventLoop()
+    loop.set_exception_handler(_exception_handler)
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        # As CPython's asyncio.run(): unwind the tasks still pending (here
+        # usually because the run time is up) before closing the loop
+        end_us, sim.end_us = sim.end_us, None
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        finally:
+            sim.end_us = end_us
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def patch():
+    asyncio.sleep_ms = lambda ms: asyncio.sleep(ms / 1000)
+    asyncio.wait_for_ms = lambda aw, ms: asyncio.wait_for(aw, ms / 1000)
+    asyncio.ThreadSafeFlag = ThreadSafeFlag
+    asyncio.run = run
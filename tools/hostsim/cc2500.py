@@ -0,0 +1,451 @@
+"""Register-level model of the TI CC2500 receiver on the shared SPI1 bus.
+
+Covers what the firmware touches: configuration registers with their
+reset values, command strobes, status registers, the 64-byte RX FIFO,
+chip status bytes, frequency synthesizer calibration and GDO0 signalling
+(IOCFG0 = 0x06, "asserts on sync word, de-asserts at end of packet").
+Tag traffic is injected with ``send()`` or ``start_traffic()``.
+"""
+
+import math
+import random
+
+from .core import sim
+
+F_XOSC = 26000000
+
+# Reset values, datasheet table 36 (0x00 IOCFG2 .. 0x2E TEST0)
+RESET_VALUES = bytes([
+    0x29, 0x2E, 0x3F, 0x07, 0xD3, 0x91, 0xFF, 0x04,
+    0x45, 0x00, 0x00, 0x0F, 0x00, 0x5E, 0xC4, 0xEC,
+    0x8C, 0x22, 0x02, 0x22, 0xF8, 0x47, 0x07, 0x30,
+    0x04, 0x36, 0x6C, 0x03, 0x40, 0x91, 0x87, 0x6B,
+    0xF8, 0x56, 0x10, 0xA9, 0x0A, 0x20, 0x0D, 0x41,
+    0x00, 0x59, 0x7F, 0x3F, 0x88, 0x31, 0x0B,
+])
+
+# Register addresses
+IOCFG0 = 0x02
+PKTLEN = 0x06
+PKTCTRL1 = 0x07
+CHANNR = 0x0A
+FREQ2 = 0x0D
+MDMCFG4 = 0x10
+MDMCFG3 = 0x11
+MDMCFG1 = 0x13
+MDMCFG0 = 0x14
+DEVIATN = 0x15
+MCSM1 = 0x17
+MCSM0 = 0x18
+FSCAL3 = 0x23
+FSCAL2 = 0x24
+FSCAL1 = 0x25
+
+# Strobes
+SRES, SFSTXON, SXOFF, SCAL, SRX, STX, SIDLE = 0x30, 0x31, 0x32, 0x33, 0x34, 0x35, 0x36
+SWOR, SPWD, SFRX, SFTX, SWORRST, SNOP = 0x38, 0x39, 0x3A, 0x3B, 0x3C, 0x3D
+
+# Chip status STATE field
+IDLE, RX, TX, FSTXON, CALIBRATE, SETTLING, RX_OVERFLOW, TX_UNDERFLOW = range(8)
+SLEEP = -1
+
+MARCSTATE = {SLEEP: 0x00, IDLE: 0x01, CALIBRATE: 0x08, SETTLING: 0x0A,
+             RX: 0x0D, RX_OVERFLOW: 0x11, FSTXON: 0x12, TX: 0x13}
+
+CAL_US = 720        # FS calibration from IDLE (datasheet ~712-809 us)
+SETTLE_US = 88      # IDLE -> RX with a calibrated synthesizer
+FIFO_SIZE = 64
+
+
+class Tag:
+    """The backscatter tag population as the receiver sees it."""
+
+    def __init__(self, offset_hz=6597222, deviation_hz=347222, datarate=100000,
+                 rssi_dbm=-60):
+        self.offset_hz = offset_hz
+        self.deviation_hz = deviation_hz
+        self.datarate = datarate
+        self.rssi_dbm = rssi_dbm
+
+
+class CC2500:
+    def __init__(self, bus_id=1, cs_pin=22, gdo0_pin=2, carrier=None,
+                 carrier_hz=2450000000, seed=1):
+        self.bus = sim.spi_bus(bus_id)
+        self.bus.devices.append(self)
+        self.cs = sim.pin(cs_pin)
+        self.cs.level = 1
+        self.cs.listeners.append(self._cs_changed)
+        self.gdo0 = sim.pin(gdo0_pin)
+        self.carrier = carrier
+        self.carrier_hz = carrier_hz
+        self.track_carrier = False
+        self.tag = Tag()
+        self.rng = random.Random(seed)
+        self.max_burst_hz = 6500000
+        sim.devices["cc2500"] = self
+        self._reset()
+        self.clear_stats()
+
+    def _reset(self):
+        self.regs = bytearray(RESET_VALUES)
+        self.fifo = bytearray()
+        self.state = IDLE
+        self.rx_since = None
+        self._pending = 0       # generation of queued state transitions
+        self._hdr = None
+        self._idle_at = None
+        self._filled_at = None
+        self.gdo0.drive(0)
+
+    def clear_stats(self):
+        self.sent = 0
+        self.received = 0       # complete packets put in the FIFO
+        self.lost_not_rx = 0
+        self.lost_overflow = 0
+        self.lost_tuning = 0
+        self.lost_autoflush = 0     # good packets flushed with a bad one
+        self.crc_failed = 0
+        self.fifo_reads = 0
+        self.underflows = 0
+        self.strobes = {}
+        self.calibrations = 0
+        self.cs_windows = 0
+        self.reg_reads = 0
+        self.reg_writes = 0
+        self.spi_too_fast = 0
+        self.rx_gaps = []       # (idle_at_us, rx_again_at_us)
+        self.fifo_drains = []   # us from a frame landing in the empty FIFO to FIFO empty
+        self.packet_log = []    # (t_end_us, fate)
+
+    # ------------------------------------------------------------------
+    # SPI
+
+    def _cs_changed(self, level):
+        if level == 0:
+            self.cs_windows += 1
+        self._hdr = None
+
+    def _status(self, read):
+        state = self.state if self.state != SLEEP else IDLE
+        if read:
+            avail = min(len(self.fifo), 15)
+        else:
+            avail = 15
+        return (state << 4) | avail
+
+    def spi_byte(self, b, bus):
+        if self.cs.level:
+            return None
+        if bus.baudrate > self.max_burst_hz:
+            self.spi_too_fast += 1
+        if self._hdr is None:
+            reply = self._status(b & 0x80)
+            addr = b & 0x3F
+            burst = b & 0x40
+            if 0x30 <= addr <= 0x3D and not burst:
+                self._strobe(addr)
+                return reply
+            self._hdr = b
+            self._addr = addr
+            return reply
+        hdr = self._hdr
+        read = hdr & 0x80
+        burst = hdr & 0x40
+        addr = self._addr
+        if addr == 0x3F:
+            if read:
+                reply = self._pop_fifo()
+            else:
+                reply = self._status(False)
+        elif addr >= 0x30:
+            reply = self._status_reg(addr)
+            burst = 0
+        elif read:
+            self.reg_reads += 1
+            reply = self.regs[addr]
+        else:
+            self.reg_writes += 1
+            self.regs[addr] = b
+            reply = self._status(False)
+        if burst:
+            self._addr = addr if addr == 0x3F else (addr + 1) & 0x3F
+        else:
+            self._hdr = None
+        return reply
+
+    def _pop_fifo(self):
+        if not self.fifo:
+            self.underflows += 1
+            return 0
+        self.fifo_reads += 1
+        b = self.fifo[0]
+        del self.fifo[0]
+        if not self.fifo and self._filled_at is not None:
+            self.fifo_drains.append(sim.now_us() - self._filled_at)
+            self._filled_at = None
+        return b
+
+    def _status_reg(self, addr):
+        if addr == 0x30:
+            return 0x80     # PARTNUM
+        if addr == 0x31:
+            return 0x03     # VERSION
+        if addr == 0x34:
+            return (self.tag_rssi_dbm() + 72) * 2 & 0xFF
+        if addr == 0x35:
+            return MARCSTATE.get(self.state, 0x01)
+        if addr == 0x3B:
+            n = min(len(self.fifo), 0x7F)
+            return n | (0x80 if self.state == RX_OVERFLOW else 0)
+        return 0
+
+    # ------------------------------------------------------------------
+    # Strobes and radio states
+
+    def _frames_in_fifo(self, status_len):
+        n = pos = 0
+        while pos < len(self.fifo):
+            pos += 1 + self.fifo[pos] + status_len
+            if pos <= len(self.fifo):
+                n += 1
+        return n
+
+    def _strobe(self, s):
+        self.strobes[s] = self.strobes.get(s, 0) + 1
+        if s == SRES:
+            self._reset()
+        elif s == SIDLE:
+            self._go_idle()
+        elif s == SRX:
+            if self.state in (IDLE, CALIBRATE):
+                self._start_rx()
+        elif s == SFRX:
+            if self.state in (IDLE, RX_OVERFLOW):
+                self.fifo = bytearray()
+                self._filled_at = None
+                if self.state == RX_OVERFLOW:
+                    self._go_idle()
+        elif s == SCAL:
+            if self.state == IDLE:
+                self._pending += 1
+                self.state = CALIBRATE
+                sim.call_later(CAL_US, self._cal_done, self._pending, False)
+        elif s == SPWD:
+            self._go_idle()
+            self.state = SLEEP
+
+    def _go_idle(self):
+        if self.state in (RX, SETTLING, CALIBRATE) and self.rx_since is not None:
+            self._idle_at = sim.now_us()
+        self._pending += 1
+        self.state = IDLE
+        self.rx_since = None
+
+    def _autocal(self):
+        return (self.regs[MCSM0] >> 4) & 0x03 == 1
+
+    def _start_rx(self):
+        self._pending += 1
+        if self._autocal():
+            self.state = CALIBRATE
+            sim.call_later(CAL_US, self._cal_done, self._pending, True)
+        else:
+            self.state = SETTLING
+            sim.call_later(SETTLE_US, self._rx_on, self._pending)
+
+    def _cal_done(self, gen, then_rx):
+        if gen != self._pending:
+            return
+        self.calibrations += 1
+        f1, f2, f3 = self.expected_fscal()
+        self.regs[FSCAL1] = f1
+        self.regs[FSCAL2] = f2
+        self.regs[FSCAL3] = f3
+        if then_rx:
+            self.state = SETTLING
+            sim.call_later(SETTLE_US, self._rx_on, gen)
+        else:
+            self.state = IDLE
+
+    def _rx_on(self, gen):
+        if gen != self._pending:
+            return
+        self.state = RX
+        now = sim.now_us()
+        self.rx_since = now
+        idle_at = self._idle_at
+        if idle_at is not None:
+            self.rx_gaps.append((idle_at, now))
+            self._idle_at = None
+
+    # ------------------------------------------------------------------
+    # Derived radio parameters
+
+    def dead_times(self):
+        """us the receiver was blind after each packet (IDLE -> RX again)"""
+        return [rx - idle for idle, rx in self.rx_gaps]
+
+    def freq_word(self):
+        r = self.regs
+        return (r[FREQ2] << 16) | (r[FREQ2 + 1] << 8) | r[FREQ2 + 2]
+
+    def expected_fscal(self):
+        """Deterministic stand-in for the synthesizer calibration result."""
+        w = self.freq_word()
+        return (w >> 10) & 0x3F, 0x0A, 0xE9 if w & 0x100 else 0xEA
+
+    def calibrated(self):
+        r = self.regs
+        return (r[FSCAL1], r[FSCAL2], r[FSCAL3]) == self.expected_fscal()
+
+    def rx_frequency(self):
+        r = self.regs
+        spc_e = r[MDMCFG1] & 0x03
+        spc_m = r[MDMCFG0]
+        spacing = F_XOSC / (1 << 18) * (256 + spc_m) * (1 << spc_e)
+        return F_XOSC / (1 << 16) * self.freq_word() + r[CHANNR] * spacing
+
+    def bandwidth(self):
+        m4 = self.regs[MDMCFG4]
+        return F_XOSC / (8 * (4 + ((m4 >> 4) & 0x03)) * (1 << (m4 >> 6)))
+
+    def datarate(self):
+        e = self.regs[MDMCFG4] & 0x0F
+        m = self.regs[MDMCFG3]
+        return (256 + m) * (1 << e) * F_XOSC / (1 << 28)
+
+    def deviation(self):
+        d = self.regs[DEVIATN]
+        return F_XOSC / (1 << 17) * (8 + (d & 0x07)) * (1 << ((d >> 4) & 0x07))
+
+    def airtime_us(self, nbytes):
+        # 4 preamble + 4 sync + length + payload + 2 CRC
+        return int((nbytes + 11) * 8 * 1e6 / self.tag.datarate)
+
+    # ------------------------------------------------------------------
+    # Tag traffic
+
+    def send(self, payload, crc_ok=True, at_us=None):
+        """Queue one tag packet whose last bit arrives at ``at_us``."""
+        t_end = sim.now_us() if at_us is None else at_us
+        sim.call_at(t_end, self._deliver, bytes(payload), crc_ok,
+                    t_end - self.airtime_us(len(payload)))
+
+    def start_traffic(self, rate_hz, payload=None, jitter=0.0, count=None):
+        """Tags transmitting at ``rate_hz`` packets per second."""
+        self._traffic = (int(1e6 / rate_hz), payload, jitter, count)
+        self._seq = 0
+        # Tags keep their own schedule, also while the firmware blocks
+        self._traffic_at = sim.now_us() + self._traffic[0]
+        sim.call_at(self._traffic_at, self._traffic_tick)
+
+    def stop_traffic(self):
+        self._traffic = None
+
+    def _traffic_tick(self):
+        if not getattr(self, "_traffic", None):
+            return
+        period, payload, jitter, count = self._traffic
+        self._seq = (self._seq + 1) & 0xFF
+        if payload is None:
+            data = bytes([self._seq]) + b"tag packet %d" % self._seq
+        else:
+            data = payload(self._seq) if callable(payload) else payload
+        self.send(data)
+        if count is not None:
+            count -= 1
+            self._traffic = (period, payload, jitter, count)
+            if count <= 0:
+                self._traffic = None
+                return
+        delay = period
+        if jitter:
+            delay = int(period * (1 + self.rng.uniform(-jitter, jitter)))
+        self._traffic_at += max(1, delay)
+        sim.call_at(self._traffic_at, self._traffic_tick)
+
+    def tag_rssi_dbm(self):
+        """Tag signal at the receiver; Tag.rssi_dbm holds for a +5 dBm carrier."""
+        rssi = self.tag.rssi_dbm
+        if self.carrier is not None:
+            rssi += self.carrier.power_dbm() - 5
+        return rssi
+
+    def _link(self):
+        """(lost, crc_fail_probability, lqi) for the current tuning."""
+        carrier = self.carrier
+        if carrier is not None and not carrier.rf_active():
+            return True, 1.0, 127
+        base = self.carrier_hz
+        if self.track_carrier and carrier is not None:
+            base = carrier.output_frequency()
+        df = abs(self.rx_frequency() - (base + self.tag.offset_hz))
+        half_bw = self.bandwidth() / 2
+        if df > half_bw or not self.calibrated():
+            return True, 1.0, 127
+        rate_err = abs(self.datarate() - self.tag.datarate) / self.tag.datarate
+        if rate_err > 0.05:
+            return True, 1.0, 127
+        margin = df / half_bw
+        dev_err = min(1.0, abs(self.deviation() - self.tag.deviation_hz) / self.tag.deviation_hz)
+        noise_floor = -100 + 10 * math.log10(self.bandwidth() / 100000)
+        snr = self.tag_rssi_dbm() - noise_floor
+        p_fail = 0.01 + 0.6 * margin * margin + 0.4 * dev_err + 4 * rate_err
+        p_fail += max(0.0, (12 - snr) / 20)
+        lqi = int(4 + 40 * margin + 30 * dev_err + max(0.0, 20 - snr))
+        return False, min(1.0, p_fail), min(lqi, 127)
+
+    def _deliver(self, payload, crc_ok, t_start):
+        self.sent += 1
+        t_end = sim.now_us()
+        if self.state != RX or self.rx_since is None or self.rx_since > t_start:
+            self.lost_not_rx += 1
+            self.packet_log.append((t_end, "not_rx"))
+            return
+        lost, p_fail, lqi = self._link()
+        if lost:
+            self.lost_tuning += 1
+            self.packet_log.append((t_end, "tuning"))
+            return
+        if crc_ok and self.rng.random() < p_fail:
+            crc_ok = False
+        if len(payload) > self.regs[PKTLEN]:
+            return
+        append = self.regs[PKTCTRL1] & 0x04
+        autoflush = self.regs[PKTCTRL1] & 0x08
+        frame = bytes([len(payload)]) + payload
+        if append:
+            rssi = (self.tag_rssi_dbm() + 70) * 2 & 0xFF
+            frame += bytes([rssi, (0x80 if crc_ok else 0) | lqi])
+        self.gdo0.drive(1)
+        if len(self.fifo) + len(frame) > FIFO_SIZE:
+            self.fifo += frame[:FIFO_SIZE - len(self.fifo)]
+            self._go_idle()
+            self.state = RX_OVERFLOW
+            self.lost_overflow += 1
+            self.packet_log.append((t_end, "overflow"))
+        elif not crc_ok and autoflush:
+            # CRC_AUTOFLUSH flushes the whole RX FIFO, not just this frame
+            # (the datasheet allows only one packet in the FIFO with it on)
+            flushed = self._frames_in_fifo(2 if append else 0)
+            self.lost_autoflush += flushed
+            for _ in range(flushed):
+                self.packet_log.append((t_end, "autoflushed"))
+            self.fifo = bytearray()
+            self._filled_at = None
+            self.crc_failed += 1
+            self.packet_log.append((t_end, "crc_flushed"))
+        else:
+            if not self.fifo:
+                self._filled_at = t_end
+            self.fifo += frame
+            self.received += 1
+            if not crc_ok:
+                self.crc_failed += 1
+            self.packet_log.append((t_end, "fifo"))
+        if self.state == RX:
+            rxoff = (self.regs[MCSM1] >> 2) & 0x03
+            if rxoff != 3:
+                self._go_idle()
+        self.gdo0.drive(0)
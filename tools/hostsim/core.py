@@ -0,0 +1,244 @@
+import heapq
+import threading
+import traceback
+import time as _time
+
+_perf_counter = _time.perf_counter
+_real_sleep = _time.sleep
+
+# =================== CLOCK / SCHEDULER ====================
+
+SCHEDULE_DEPTH = 8      # MICROPY_SCHEDULER_DEPTH on rp2
+TICKS_PERIOD = 1 << 30  # MicroPython ticks wrap at 2**30
+CORE1_POLL_S = 0.0005   # real-time poll period while one core waits for the other
+CORE1_RUNNING = -1      # Simulator.core1 states; >= 0: sleeping until that board time
+CORE1_BLOCKED = -2      # waiting on a lock, can wait forever
+
+_run = [0]              # reset() count; core 1 threads of earlier runs end at their next sleep
+_core1_local = threading.local()
+
+
+class SimulationEnd(BaseException):
+    """Raised on the main thread once the configured run time is over.
+
+    Derived from BaseException so the firmware's ``except Exception``
+    safety nets do not swallow it.
+    """
+
+
+class Simulator:
+    """Virtual time base, IRQ/schedule queue and peripheral registry.
+
+    Time is host CPU time since start plus every modelled delay (sleeps,
+    SPI clocking, radio settling), so firmware code is measured at host
+    speed while waiting costs nothing in wall-clock time.  Set
+    ``cpu_scale`` to 0 for a purely virtual, deterministic clock.
+    A thread started through the fake ``_thread`` stands in for core 1:
+    its sleeps and device time wait for board time to pass instead of
+    moving it, and the main thread's idle jumps stop where core 1 wakes
+    up (``core1_bound``), so the two cores go through board time together.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._t0 = _perf_counter()
+        self.offset_us = 0
+        self.cpu_scale = 1.0
+        self.end_us = None
+        self._events = []
+        self._seq = 0
+        self._scheduled = []
+        self._lock = threading.RLock()
+        self._servicing = False
+        self._main = threading.main_thread().ident
+        self.pins = {}
+        self.spi_buses = {}
+        self.devices = {}
+        self.schedule_overflows = 0
+        self.trace = []
+        _run[0] += 1
+        self.core1 = None
+        self._core1_ident = None
+
+    # ------------- time -------------
+
+    def now_us(self):
+        cpu = (_perf_counter() - self._t0) * 1e6 * self.cpu_scale
+        return int(cpu) + self.offset_us
+
+    def advance_us(self, us):
+        if threading.get_ident() != self._main:
+            # Busy on core 1: in parallel with the main thread
+            self._core1_wait(us)
+            return
+        if us > 0:
+            with self._lock:
+                self.offset_us += int(us)
+        self.service()
+
+    def sleep_us(self, us):
+        # Like the real board, sleeping lets timers and IRQs run; jump
+        # event by event so callbacks see the right timestamps.
+        us = max(0, int(us))
+        if threading.get_ident() != self._main:
+            self._core1_wait(us)
+            return
+        if self._servicing:
+            # Sleeping inside an IRQ/scheduled callback: nothing else may
+            # run, so just let the time pass.
+            with self._lock:
+                self.offset_us += us
+            return
+        target = self.now_us() + us
+        while True:
+            with self._lock:
+                nxt = self._events[0][0] if self._events else None
+            end = target if nxt is None else min(nxt, target)
+            self.advance_us(self.core1_bound(end) - self.now_us())
+            if self.now_us() >= target:
+                return
+
+    def call_at(self, t_us, fn, *args):
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._events, (int(t_us), self._seq, fn, args))
+
+    def call_later(self, us, fn, *args):
+        self.call_at(self.now_us() + us, fn, *args)
+
+    def next_event_us(self):
+        """Board time of the next timer or device event, None if none"""
+        with self._lock:
+            return self._events[0][0] if self._events else None
+
+    # ------------- core 1 -------------
+
+    def core1_start(self):
+        with self._lock:
+            if self.core1 is not None:
+                raise OSError(16, "core1 in use")
+            self.core1 = CORE1_RUNNING
+
+    def core1_enter(self):
+        _core1_local.run = _run[0]
+        self._core1_ident = threading.get_ident()
+
+    def _is_core1(self):
+        return (self._core1_ident == threading.get_ident()
+                and getattr(_core1_local, "run", None) == _run[0])
+
+    def core1_exit(self):
+        if self._is_core1():
+            self.core1 = None
+            self._core1_ident = None
+
+    def core1_state(self, state):
+        if self._is_core1():
+            self.core1 = state
+            return True
+        return False
+
+    def core1_wake(self):
+        if self.core1 == CORE1_BLOCKED:
+            self.core1 = CORE1_RUNNING
+
+    def _core1_wait(self, us):
+        # Wait until board time has passed; the main thread moves it by
+        # its CPU time and its sleeps, up to our wake-up time
+        target = self.now_us() + us
+        self.core1_state(target)
+        while self.now_us() < target:
+            if getattr(_core1_local, "run", _run[0]) != _run[0]:
+                raise SimulationEnd()
+            _real_sleep(CORE1_POLL_S)
+        self.core1_state(CORE1_RUNNING)
+
+    def core1_bound(self, t_us):
+        """Board time up to ``t_us`` the main thread may jump to without
+        getting ahead of core 1 (no further than now while it runs)."""
+        while True:
+            state = self.core1
+            if state is None or state == CORE1_BLOCKED:
+                return t_us
+            if state == CORE1_RUNNING:
+                _real_sleep(CORE1_POLL_S)
+                return min(t_us, self.now_us())
+            if state > self.now_us():
+                return min(t_us, state)
+            _real_sleep(CORE1_POLL_S)   # core 1 is due to wake up first
+
+    # ------------- micropython.schedule -------------
+
+    def schedule(self, fn, arg):
+        with self._lock:
+            if len(self._scheduled) >= SCHEDULE_DEPTH:
+                self.schedule_overflows += 1
+                raise RuntimeError("schedule queue full")
+            self._scheduled.append((fn, arg))
+
+    def service(self):
+        """Run due hardware events and pending scheduled callbacks.
+
+        Called from every fake peripheral entry point, which is where a
+        real MicroPython VM would get a chance to run IRQ handlers.
+        """
+        if threading.get_ident() != self._main:
+            return
+        with self._lock:
+            if self._servicing:
+                return
+            self._servicing = True
+        try:
+            # A callback scheduled by an event runs before the events due
+            # after it, as on the board; when the host stalled the main
+            # thread, several events can be due at once
+            last_us = None
+            while True:
+                with self._lock:
+                    now = self.now_us()
+                    if (self._events and self._events[0][0] <= now
+                            and (not self._scheduled
+                                 or last_us is not None and self._events[0][0] <= last_us)):
+                        last_us, _, fn, args = heapq.heappop(self._events)
+                    elif self._scheduled:
+                        fn, arg = self._scheduled.pop(0)
+                        args = (arg,)
+                    else:
+                        break
+                try:
+                    fn(*args)
+                except Exception:
+                    print("Uncaught exception in IRQ callback handler")
+                    traceback.print_exc()
+            if self.end_us is not None and self.now_us() >= self.end_us:
+                raise SimulationEnd()
+        finally:
+            self._servicing = False
+
+    def run_until(self, t_us):
+        """Drive time forward from host code (outside the firmware)."""
+        self.sleep_us(t_us - self.now_us())
+
+    # ------------- registry -------------
+
+    def pin(self, pin_id):
+        from .machine import _PinState
+        state = self.pins.get(pin_id)
+        if state is None:
+            state = self.pins[pin_id] = _PinState(self, pin_id)
+        return state
+
+    def spi_bus(self, bus_id):
+        from .machine import _SPIBus
+        bus = self.spi_buses.get(bus_id)
+        if bus is None:
+            bus = self.spi_buses[bus_id] = _SPIBus(self, bus_id)
+        return bus
+
+    def log(self, *item):
+        self.trace.append((self.now_us(),) + item)
+
+
+sim = Simulator()
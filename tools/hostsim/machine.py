@@ -0,0 +1,303 @@
+"""Fake ``machine`` module backed by the simulator's pins, buses and clock."""
+
+from .core import sim
+
+# =================== PINS ====================
+
+
+class _PinState:
+    """Electrical state of one GPIO, shared by every Pin object for it."""
+
+    def __init__(self, owner, pin_id):
+        self.sim = owner
+        self.id = pin_id
+        self.mode = None
+        self.function = None    # (bus, role) while an SPI block owns the pad
+        self.level = 0
+        self.listeners = []     # callables(level) notified on changes
+        self.handler = None
+        self.trigger = 0
+        self.hard = False
+        self.irq_count = 0
+        self.irq_dropped = 0
+
+    def set_level(self, level):
+        level = 1 if level else 0
+        if level == self.level:
+            return
+        self.level = level
+        for listener in self.listeners:
+            listener(level)
+        edge = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+        if self.handler is not None and self.trigger & edge:
+            self.irq_count += 1
+            if self.hard:
+                self.handler(Pin(self.id))
+            else:
+                try:
+                    self.sim.schedule(self.handler, Pin(self.id))
+                except RuntimeError:
+                    self.irq_dropped += 1
+
+    # Devices drive inputs through this; firmware writes go through Pin.
+    drive = set_level
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, *, value=None, **kwargs):
+        self._state = sim.pin(id)
+        self._id = id
+        self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, *, value=None, **kwargs):
+        if mode != -1:
+            self._state.mode = mode
+            if mode != Pin.ALT:
+                # As on the rp2: a GPIO mode muxes the pad back to SIO
+                self._state.function = None
+        if pull == Pin.PULL_UP and self._state.mode == Pin.IN:
+            self._state.level = 1
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        sim.service()
+        if v is None:
+            return self._state.level
+        self._state.set_level(v)
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def toggle(self):
+        self.value(1 - self._state.level)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, *, hard=False, **kwargs):
+        self._state.handler = handler
+        self._state.trigger = trigger
+        self._state.hard = hard
+
+    def __repr__(self):
+        return "Pin(%s)" % (self._id,)
+
+
+# =================== SPI ====================
+
+
+class _SPIBus:
+    """One hardware SPI block; all SPI objects with its id share it."""
+
+    CALL_OVERHEAD_US = 3    # Python -> C call and FIFO setup on the RP2040
+
+    def __init__(self, owner, bus_id):
+        self.sim = owner
+        self.id = bus_id
+        self.baudrate = 1000000
+        self.polarity = 0
+        self.phase = 0
+        self.devices = []
+        self.transactions = 0
+        self.bytes = 0
+        self.reconfigs = 0
+        self.busy_us = 0
+        self.pins = {}          # role ("sck", "mosi", "miso") -> pin id
+        self.pin_faults = 0     # transfers with a pin taken by another function
+
+    def configure(self, baudrate, polarity, phase):
+        cfg = (baudrate, polarity, phase)
+        if cfg != (self.baudrate, self.polarity, self.phase):
+            self.reconfigs += 1
+        self.baudrate, self.polarity, self.phase = cfg
+
+    def claim(self, role, pin):
+        if pin is None:
+            return
+        state = self.sim.pin(pin._id)
+        state.function = (self.id, role)
+        self.pins[role] = pin._id
+
+    def lost_pins(self):
+        """Roles whose pad was muxed away from this block since it was claimed"""
+        return [role for role, pin_id in self.pins.items()
+                if self.sim.pin(pin_id).function != (self.id, role)]
+
+    def transfer(self, data):
+        self.sim.service()
+        self.transactions += 1
+        self.bytes += len(data)
+        lost = self.lost_pins()
+        if lost:
+            self.pin_faults += 1
+        # No clock or data out: the devices see nothing; no MISO: reads 0
+        clocked = "sck" not in lost and "mosi" not in lost
+        out = bytearray(len(data))
+        for i, b in enumerate(data):
+            reply = 0xFF
+            if clocked:
+                for dev in self.devices:
+                    r = dev.spi_byte(b, self)
+                    if r is not None:
+                        reply = r
+            out[i] = 0 if "miso" in lost else reply
+        us = self.CALL_OVERHEAD_US + len(data) * 8 * 1e6 / self.baudrate
+        self.busy_us += us
+        self.sim.advance_us(us)
+        return out
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, id, baudrate=1000000, *, polarity=0, phase=0, bits=8,
+                 firstbit=MSB, sck=None, mosi=None, miso=None):
+        self._bus = sim.spi_bus(id)
+        self.init(baudrate=baudrate, polarity=polarity, phase=phase, sck=sck, mosi=mosi, miso=miso)
+
+    def init(self, baudrate=None, *, polarity=None, phase=None, sck=None, mosi=None, miso=None, **kwargs):
+        bus = self._bus
+        bus.configure(baudrate if baudrate is not None else bus.baudrate,
+                      polarity if polarity is not None else bus.polarity,
+                      phase if phase is not None else bus.phase)
+        # Only pins passed here are muxed to the block; init() without
+        # them leaves the pads as they are, as on the rp2
+        bus.claim("sck", sck)
+        bus.claim("mosi", mosi)
+        bus.claim("miso", miso)
+
+    def deinit(self):
+        pass
+
+    def read(self, nbytes, write=0x00):
+        return bytes(self._bus.transfer(bytes([write]) * nbytes))
+
+    def readinto(self, buf, write=0x00):
+        buf[:] = self._bus.transfer(bytes([write]) * len(buf))
+
+    def write(self, buf):
+        self._bus.transfer(bytes(buf))
+
+    def write_readinto(self, write_buf, read_buf):
+        read_buf[:] = self._bus.transfer(bytes(write_buf))
+
+
+# =================== TIMERS ====================
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self._gen = 0
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, *, mode=PERIODIC, period=-1, freq=-1, callback=None, hard=True, tick_hz=1000):
+        self._gen += 1
+        if freq > 0:
+            self._period_us = int(1e6 / freq)
+        else:
+            self._period_us = int(period * 1e6 / tick_hz)
+        self._mode = mode
+        self._callback = callback
+        self._hard = hard
+        self.fired = 0
+        sim.call_later(self._period_us, self._fire, self._gen)
+
+    def _fire(self, gen):
+        if gen != self._gen:
+            return
+        if self._mode == Timer.PERIODIC:
+            sim.call_later(self._period_us, self._fire, gen)
+        self.fired += 1
+        if self._callback is None:
+            return
+        if self._hard:
+            self._callback(self)
+        else:
+            try:
+                sim.schedule(self._callback, self)
+            except RuntimeError:
+                pass
+
+    def deinit(self):
+        self._gen += 1
+
+
+# =================== MISC ====================
+
+
+class ADC:
+    def __init__(self, pin):
+        self._pin = pin
+
+    def read_u16(self):
+        return 0
+
+
+class WDT:
+    def __init__(self, id=0, timeout=5000):
+        self.timeout = timeout
+
+    def feed(self):
+        pass
+
+
+PWRON_RESET = 1
+WDT_RESET = 3
+
+_reset_cause = PWRON_RESET
+_freq = 125000000
+
+
+def reset_cause():
+    return _reset_cause
+
+
+def freq(hz=None):
+    global _freq
+    if hz is None:
+        return _freq
+    _freq = hz
+
+
+def unique_id():
+    return b"HOSTSIM0"
+
+
+def idle():
+    sim.advance_us(1)
+
+
+def lightsleep(ms=None):
+    sim.sleep_us((ms or 0) * 1000)
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state=0):
+    pass
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+soft_reset = reset
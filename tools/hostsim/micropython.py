@@ -0,0 +1,38 @@
+"""Fake ``micropython`` module."""
+
+from .core import sim
+
+
+def const(x):
+    return x
+
+
+def schedule(func, arg):
+    sim.schedule(func, arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def opt_level(level=None):
+    return 0
+
+
+def mem_info(verbose=False):
+    print("mem: hostsim")
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def native(f):
+    return f
+
+
+viper = native
@@ -0,0 +1,117 @@
+"""Fake ``picographics`` module for the Pimoroni Pico Display (ST7789).
+
+Draw calls are recorded, and ``update()`` is charged the time a full
+240x135 RGB565 frame takes on the display's 62.5 MHz SPI bus;
+``partial_update()`` the time its box takes.
+"""
+
+from .core import sim
+
+DISPLAY_PICO_DISPLAY = 1
+DISPLAY_PICO_DISPLAY_2 = 2
+PEN_1BIT = 0
+PEN_P4 = 2
+PEN_P8 = 3
+PEN_RGB332 = 4
+PEN_RGB565 = 5
+
+_SIZES = {DISPLAY_PICO_DISPLAY: (240, 135), DISPLAY_PICO_DISPLAY_2: (320, 240)}
+DISPLAY_SPI_HZ = 62500000
+WINDOW_BYTES = 11       # ST7789 CASET + RASET + RAMWR before a partial update
+
+
+class PicoGraphics:
+    instances = []
+
+    def __init__(self, display=DISPLAY_PICO_DISPLAY, pen_type=PEN_RGB565, rotate=0, **kwargs):
+        self.width, self.height = _SIZES.get(display, (240, 135))
+        self.pens = []
+        self.pen = 0
+        self.clip = None
+        self.ops = []           # draw calls since the last update()
+        self.texts = []         # (x, y, text) currently visible, newest last
+        self.updates = 0
+        self.partial_updates = 0
+        self.spi_bytes = 0
+        self.draw_calls = 0
+        self.backlight = 0
+        self.font = None
+        PicoGraphics.instances.append(self)
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def create_pen(self, r, g, b):
+        self.pens.append((r, g, b))
+        return len(self.pens) - 1
+
+    def set_pen(self, pen):
+        self.pen = pen
+
+    def set_backlight(self, level):
+        self.backlight = level
+
+    def set_font(self, font):
+        self.font = font
+
+    def set_clip(self, x, y, w, h):
+        self.clip = (x, y, w, h)
+
+    def remove_clip(self):
+        self.clip = None
+
+    def _op(self, *op):
+        sim.service()
+        self.draw_calls += 1
+        self.ops.append(op)
+
+    def clear(self):
+        self._op("clear", self.pen)
+        if self.clip is None:
+            self.texts = []
+        else:
+            self._erase(*self.clip)
+
+    def rectangle(self, x, y, w, h):
+        self._op("rectangle", x, y, w, h, self.pen)
+        self._erase(x, y, w, h)
+
+    def _erase(self, x, y, w, h):
+        self.texts = [t for t in self.texts
+                      if not (x <= t[0] < x + w and y <= t[1] < y + h)]
+
+    def circle(self, x, y, r):
+        self._op("circle", x, y, r, self.pen)
+
+    def line(self, x1, y1, x2, y2, thickness=1):
+        self._op("line", x1, y1, x2, y2, self.pen)
+
+    def triangle(self, x1, y1, x2, y2, x3, y3):
+        self._op("triangle", x1, y1, x2, y2, x3, y3, self.pen)
+
+    def pixel(self, x, y):
+        self._op("pixel", x, y, self.pen)
+
+    def text(self, text, x, y, wordwrap=None, scale=2, angle=0, spacing=1):
+        self._op("text", text, x, y, self.pen)
+        self.texts.append((x, y, text))
+
+    def measure_text(self, text, scale=2, spacing=1):
+        return len(text) * 6 * scale
+
+    def update(self):
+        frame = self.width * self.height * 2
+        self.updates += 1
+        self.spi_bytes += frame
+        self.ops = []
+        sim.advance_us(frame * 8 * 1e6 / DISPLAY_SPI_HZ)
+
+    def partial_update(self, x, y, w, h):
+        # Clipped to the panel; plus the column/row window commands
+        w = max(0, min(x + w, self.width) - max(x, 0))
+        h = max(0, min(y + h, self.height) - max(y, 0))
+        nbytes = w * h * 2 + WINDOW_BYTES
+        self.partial_updates += 1
+        self.spi_bytes += nbytes
+        self.ops = []
+        sim.advance_us(nbytes * 8 * 1e6 / DISPLAY_SPI_HZ)
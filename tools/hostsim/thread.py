@@ -0,0 +1,74 @@
+"""Fake ``_thread``: the thread it starts stands in for RP2040 core 1.
+
+As on the board only one can run. The simulator keeps the main thread
+from jumping board time past it (``Simulator.core1_bound``); a blocking
+``acquire()`` on a lock from ``allocate_lock()`` marks core 1 idle.
+Everything else is CPython's ``_thread``.
+"""
+
+import _thread as _real
+import sys
+
+from .core import sim, SimulationEnd, CORE1_RUNNING, CORE1_BLOCKED
+
+# CPython hands the GIL over every 5 ms by default, and board time runs on
+# while the main thread waits for it: at high packet rates that is long
+# enough to overflow the CC2500 FIFO, which the board's IRQ would drain.
+SWITCH_INTERVAL_S = 0.0002
+
+
+def __getattr__(name):
+    return getattr(_real, name)
+
+
+class LockType:
+    def __init__(self):
+        self._lock = _real.allocate_lock()
+        self._core1_waiting = False
+
+    def acquire(self, waitflag=1, timeout=-1):
+        if self._lock.acquire(False):
+            return True
+        if not waitflag:
+            return False
+        self._core1_waiting = sim.core1_state(CORE1_BLOCKED)
+        try:
+            return self._lock.acquire(True, timeout)
+        finally:
+            self._core1_waiting = False
+            sim.core1_state(CORE1_RUNNING)
+
+    def release(self):
+        if self._core1_waiting:
+            # Core 1 runs from here on, before the host gets to schedule it
+            sim.core1_wake()
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def allocate_lock():
+    return LockType()
+
+
+def start_new_thread(function, args, kwargs=None):
+    sim.core1_start()
+    sys.setswitchinterval(SWITCH_INTERVAL_S)
+
+    def core1():
+        sim.core1_enter()
+        try:
+            function(*args, **(kwargs or {}))
+        except SimulationEnd:
+            pass    # left over from an earlier run
+        finally:
+            sim.core1_exit()
+
+    return _real.start_new_thread(core1, ())